@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+import tapr
+
+
+class FromDictionary:
+    params = [[10, 100, 300]]
+    param_names = ["size"]
+
+    def setup(self, size):
+        self.dictionary = {
+            f"row{i}": {f"col{j}": i * size + j for j in range(size)}
+            for i in range(size)
+        }
+
+    def time_ntable(self, size):
+        tapr.ntable(self.dictionary)
+
+    def time_ntable_sparse(self, size):
+        tapr.ntable(self.dictionary, sparse=True)
+
+
+class FromDataFrame:
+    params = [[100, 10000], ["float64", "object"]]
+    param_names = ["rows", "dtype"]
+
+    def setup(self, rows, dtype):
+        self.frame = pd.DataFrame(
+            np.arange(rows * 10, dtype="float64").reshape(rows, 10)
+        ).astype(dtype)
+
+    def time_ntable(self, rows, dtype):
+        tapr.ntable(self.frame)
+
+    def time_round_trip(self, rows, dtype):
+        tapr.ntable(self.frame).to_pandas()
+
+
+class FromArray:
+    params = [[10, 300], ["float64", "object"]]
+    param_names = ["size", "dtype"]
+
+    def setup(self, size, dtype):
+        self.array = np.arange(size * size, dtype="float64").reshape(
+            size, size
+        ).astype(dtype)
+
+    def time_ntable(self, size, dtype):
+        tapr.ntable(self.array)
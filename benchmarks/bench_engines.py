@@ -0,0 +1,32 @@
+import numpy as np
+
+import tapr
+from tapr.main.engines import StandardEngine, ThreadEngine, ProcessEngine
+
+ENGINES = {
+    "standard": StandardEngine,
+    "thread": lambda: ThreadEngine(4),
+    "process": lambda: ProcessEngine(2),
+}
+
+
+def work(x):
+    return sum(i * x for i in range(100))
+
+
+class Engines:
+    params = [list(ENGINES), [100, 10000]]
+    param_names = ["engine", "elements"]
+
+    def setup(self, engine, elements):
+        self.ntbl = tapr.ntable(
+            np.arange(elements, dtype="float64").astype(object),
+            engine=ENGINES[engine](),
+        )
+        self.func = tapr.tabularize(self.ntbl.engine)(work)
+
+    def time_map(self, engine, elements):
+        self.func(self.ntbl)
+
+    def time_binary_operation(self, engine, elements):
+        self.ntbl * self.ntbl
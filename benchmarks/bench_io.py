@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+import numpy as np
+
+import tapr
+
+
+class SaveLoad:
+    params = [[100, 10000]]
+    param_names = ["elements"]
+
+    def setup(self, elements):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.directory.name, "bench.ntbl")
+        values = np.arange(elements, dtype="float64").reshape(-1, 10)
+        self.ntbl = tapr.ntable(values.astype(object))
+        tapr.save_ntable(self.ntbl, self.fname)
+
+    def teardown(self, elements):
+        self.directory.cleanup()
+
+    def time_save(self, elements):
+        tapr.save_ntable(self.ntbl, self.fname)
+
+    def time_load(self, elements):
+        tapr.load_ntable(self.fname)
@@ -0,0 +1,57 @@
+import numpy as np
+
+import tapr
+
+
+def _table(size, dtype="object"):
+    return tapr.ntable(
+        np.arange(size * size, dtype="float64").reshape(size, size).astype(dtype)
+    )
+
+
+class BinaryOperations:
+    params = [[10, 100, 300]]
+    param_names = ["size"]
+
+    def setup(self, size):
+        self.a = _table(size)
+        self.b = _table(size)
+        # a single row, broadcast along the first dimension
+        self.row = self.b.struct[0]
+
+    def time_add(self, size):
+        self.a + self.b
+
+    def time_add_scalar(self, size):
+        self.a + 1
+
+    def time_add_broadcast(self, size):
+        self.a + self.row
+
+    def time_compare(self, size):
+        self.a < self.b
+
+
+class MethodDispatch:
+    params = [[10, 100]]
+    param_names = ["size"]
+
+    def setup(self, size):
+        self.strings = tapr.ntable(
+            np.array(
+                [[f"r{i}c{j}" for j in range(size)] for i in range(size)],
+                dtype=object,
+            )
+        )
+        self.complexes = tapr.ntable(
+            (np.arange(size * size) * 1j).reshape(size, size).astype(object)
+        )
+
+    def time_method(self, size):
+        self.strings.upper()
+
+    def time_method_with_arguments(self, size):
+        self.strings.replace("r", "R")
+
+    def time_attribute(self, size):
+        self.complexes.imag
@@ -0,0 +1,27 @@
+import tapr
+from tapr.main.filtering import matches, contains
+
+
+class Selection:
+    params = [[1000, 10000]]
+    param_names = ["labels"]
+
+    def setup(self, labels):
+        self.ntbl = tapr.ntable(
+            {
+                f"row{i}": {"col1": i, "col2": -i, "col3": 2 * i}
+                for i in range(labels)
+            }
+        )
+
+    def time_filter(self, labels):
+        self.ntbl.filter[{"dim0": matches(r"row\d*7$"), "dim1": contains("2")}]
+
+    def time_filter_call(self, labels):
+        self.ntbl.filter(dim0=lambda label: label.endswith("0"))
+
+    def time_alchemy(self, labels):
+        self.ntbl.dim0.alchemy[r"row(\d*)1"]
+
+    def time_loc(self, labels):
+        self.ntbl.struct.loc[["row1", "row10", "row100"], "col2"]
@@ -0,0 +1,54 @@
+import numpy as np
+
+import tapr
+
+
+class Concatenation:
+    params = [[10, 1000]]
+    param_names = ["tables"]
+
+    def setup(self, tables):
+        ntbl = tapr.ntable(np.arange(100, dtype="float64").astype(object))
+        self.views = [ntbl] * tables
+        self.tables = [
+            tapr.ntable(np.arange(100, dtype="float64").astype(object))
+            for _ in range(tables)
+        ]
+
+    def time_concatenate_new_dim(self, tables):
+        tapr.concatenate(self.tables, "new")
+
+    def time_concatenate_shared(self, tables):
+        tapr.concatenate(self.views, "new")
+
+
+class Iteration:
+    params = [[10, 100]]
+    param_names = ["size"]
+
+    def setup(self, size):
+        lists = np.empty((size, size), dtype=object)
+        for index in np.ndindex(lists.shape):
+            lists[index] = list(range(20))
+        self.ntbl = tapr.ntable(lists)
+
+    def time_iterate(self, size):
+        for _ in self.ntbl:
+            pass
+
+    def time_iterate_raw(self, size):
+        for _ in self.ntbl.struct.iterate(raw=True):
+            pass
+
+
+class Rendering:
+    params = [[10, 1000]]
+    param_names = ["size"]
+
+    def setup(self, size):
+        self.ntbl = tapr.ntable(
+            np.arange(size * size, dtype="float64").reshape(size, size).astype(object)
+        )
+
+    def time_str(self, size):
+        str(self.ntbl)
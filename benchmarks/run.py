@@ -0,0 +1,278 @@
+"""
+Runs the tapr benchmark suite and reports its results as JSON.
+
+Benchmarks follow the conventions of asv (airspeed velocity), so the suite
+can also be run with asv, but this runner needs nothing besides tapr and
+its dependencies, and runs offline:
+
+- benchmarks live in the bench_*.py modules of this directory
+- a benchmark is a time_* method of a class, or a time_* function
+- a class may define params (a list of lists of values) and param_names,
+  in which case every combination of params is benchmarked, and passed on
+  to setup, teardown and the time_* methods
+- setup may raise NotImplementedError to skip a combination
+- a benchmark that raises is reported with an error, and makes the run
+  fail
+
+Examples
+--------
+Run every benchmark and write the results to results.json::
+
+    python -m benchmarks.run --output results.json
+
+Run the construction benchmarks only, and fail (exit status 1) if any of
+them got more than 20% slower than in a previous run::
+
+    python -m benchmarks.run --filter construction --compare results.json
+
+"""
+
+import argparse
+import datetime
+import importlib
+import importlib.metadata
+import inspect
+import itertools as it
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover(pattern=None):
+    """
+    Yield the (name, factory, params) triplet of every benchmark whose name
+    matches pattern. factory returns the object owning the benchmark (an
+    instance of its class, or its module) and the name of the benchmark
+    within it.
+    """
+    regex = re.compile(pattern) if pattern else None
+    for fname in sorted(os.listdir(BENCHMARK_DIR)):
+        if not (fname.startswith("bench_") and fname.endswith(".py")):
+            continue
+        module = importlib.import_module(f"benchmarks.{fname[:-3]}")
+        for obj_name, obj in vars(module).items():
+            if obj_name.startswith("time_") and inspect.isfunction(obj):
+                name = f"{module.__name__}.{obj_name}"
+                if regex is None or regex.search(name):
+                    yield name, (
+                        lambda module=module, obj_name=obj_name: (module, obj_name)
+                    ), None
+            elif (
+                inspect.isclass(obj)
+                and obj.__module__ == module.__name__
+                and not obj_name.startswith("_")
+            ):
+                for attr in sorted(vars(obj)):
+                    if not attr.startswith("time_"):
+                        continue
+                    name = f"{module.__name__}.{obj_name}.{attr}"
+                    if regex is None or regex.search(name):
+                        yield name, (lambda obj=obj, attr=attr: (obj(), attr)), obj
+
+
+def _combinations(cls):
+    params = getattr(cls, "params", None)
+    if not params:
+        return [((), {})]
+    if not isinstance(params[0], (list, tuple)):
+        params = [params]
+    names = getattr(cls, "param_names", None) or [
+        f"param{k}" for k in range(len(params))
+    ]
+    return [
+        (combination, dict(zip(names, map(repr, combination))))
+        for combination in it.product(*params)
+    ]
+
+
+def time_benchmark(owner, attr, args, repeat, min_time):
+    """
+    Time a benchmark the way timeit does: the number of calls per sample is
+    increased until a sample takes at least min_time seconds, and repeat
+    samples are then taken. Returns the seconds per call of every sample.
+    """
+    func = getattr(owner, attr)
+    timer = timeit.Timer(lambda: func(*args))
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / number]
+    samples.extend(t / number for t in timer.repeat(repeat - 1, number))
+    return samples, number
+
+
+def run(pattern=None, repeat=5, min_time=0.05, stream=None):
+    """Run the benchmarks whose name matches pattern and return their results."""
+    results = []
+    for name, factory, cls in discover(pattern):
+        for args, params in _combinations(cls):
+            owner, attr = factory()
+            record = {"name": name, "params": params}
+            try:
+                if hasattr(owner, "setup") and cls is not None:
+                    owner.setup(*args)
+                samples, number = time_benchmark(
+                    owner, attr, args, repeat, min_time
+                )
+            except NotImplementedError:
+                continue
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+            else:
+                record.update(
+                    {
+                        "unit": "seconds",
+                        "number": number,
+                        "repeat": len(samples),
+                        "min": min(samples),
+                        "median": statistics.median(samples),
+                        "mean": statistics.fmean(samples),
+                        "stdev": statistics.stdev(samples)
+                        if len(samples) > 1
+                        else 0.0,
+                    }
+                )
+            finally:
+                if hasattr(owner, "teardown") and cls is not None:
+                    owner.teardown(*args)
+            results.append(record)
+            if stream is not None:
+                _print_record(record, stream)
+    return results
+
+
+def _print_record(record, stream):
+    params = ", ".join(f"{k}={v}" for k, v in record["params"].items())
+    label = f"{record['name']}({params})" if params else record["name"]
+    if "error" in record:
+        stream.write(f"{label:<80} ERROR {record['error']}\n")
+    else:
+        stream.write(f"{label:<80} {record['median'] * 1e3:>12.4f} ms\n")
+    stream.flush()
+
+
+def _version(package):
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def metadata():
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "versions": {
+            "tapr": _version("tapr"),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "xarray": xr.__version__,
+        },
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    The benchmarks of results whose median got slower than that of the
+    same benchmark in baseline by more than a factor of threshold.
+    """
+    key = lambda record: (record["name"], json.dumps(record["params"]))
+    previous = {key(record): record for record in baseline["results"]}
+    regressions = []
+    for record in results:
+        before = previous.get(key(record))
+        if before is None or "median" not in before or "median" not in record:
+            continue
+        ratio = record["median"] / before["median"]
+        if ratio > threshold:
+            regressions.append(
+                {
+                    "name": record["name"],
+                    "params": record["params"],
+                    "before": before["median"],
+                    "after": record["median"],
+                    "ratio": ratio,
+                }
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument(
+        "--filter", help="only run benchmarks whose name matches this regex"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="samples per benchmark (default 5)"
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.05,
+        help="minimum seconds per sample (default 0.05)",
+    )
+    parser.add_argument(
+        "--output", help="file to write the JSON results to (default stdout)"
+    )
+    parser.add_argument(
+        "--compare", help="JSON results of a previous run to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="slowdown factor reported as a regression (default 1.2)",
+    )
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    report = {
+        "metadata": metadata(),
+        "results": run(args.filter, args.repeat, args.min_time, sys.stderr),
+    }
+    status = 0
+    if args.compare:
+        with open(args.compare) as fo:
+            baseline = json.load(fo)
+        report["regressions"] = compare(
+            report["results"], baseline, args.threshold
+        )
+        for regression in report["regressions"]:
+            sys.stderr.write(
+                f"REGRESSION {regression['name']}{regression['params']}: "
+                f"{regression['ratio']:.2f}x slower\n"
+            )
+        status = 1 if report["regressions"] else 0
+    if any("error" in record for record in report["results"]):
+        status = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fo:
+            fo.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,20 +4,29 @@ conversion = il.import_module(".main.conversion", package=__name__)
 defs = il.import_module(".main.defs", package=__name__)
 engines = il.import_module(".main.engines", package=__name__)
 filtering = il.import_module(".main.filtering", package=__name__)
+grouping = il.import_module(".main.grouping", package=__name__)
 handling = il.import_module(".main.handling", package=__name__)
+joining = il.import_module(".main.joining", package=__name__)
+memoization = il.import_module(".main.memoization", package=__name__)
 ntable = il.import_module(".main.ntable", package=__name__)
 processing = il.import_module(".main.processing", package=__name__)
+profiling = il.import_module(".main.profiling", package=__name__)
+progress = il.import_module(".main.progress", package=__name__)
 qol = il.import_module(".main.qol", package=__name__)
+reduction = il.import_module(".main.reduction", package=__name__)
+sparse = il.import_module(".main.sparse", package=__name__)
 structure = il.import_module(".main.structure", package=__name__)
 tabularization = il.import_module(".main.tabularization", package=__name__)
+tracking = il.import_module(".main.tracking", package=__name__)
 ttypes = il.import_module(".main.ttypes", package=__name__)
 utils = il.import_module(".main.utils", package=__name__)
 
 io = il.import_module(".io_", package=__name__)
 
-from .main.conversion import ntable
+from .main.conversion import ntable, ntable_from_stream
 from .main.qol import blank, sblank, cartograph, count
 from .main.tabularization import tabularize
+from .main.joining import align, join
 from .main.utils import full, full_lite, full_like, concatenate_ntables as concatenate
 
 from .io_.ntableio import save_ntable, load_ntable
@@ -1,2 +1,3 @@
 from .ntableio import save_ntable, load_ntable
-from .serialization import serializer, deserializer
\ No newline at end of file
+from .serialization import serializer, deserializer
+from .checkpoint import Checkpoint
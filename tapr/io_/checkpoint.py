@@ -0,0 +1,161 @@
+import base64
+import json
+import os
+
+from .serialization import serialize, deserialize
+
+
+def _label(label):
+    # numpy scalars are turned into the python objects they wrap, so that
+    # keys are the same whichever way the labels were obtained
+    try:
+        return label.item()
+    except AttributeError:
+        return label
+
+
+def _key(labels, func, element):
+    # cells are keyed by their labels along with a fingerprint of the
+    # function and of their arguments, so that results are only reused for
+    # the very same computation
+    from ..main.memoization import fingerprint
+
+    digest = fingerprint(func, element)
+    if digest is None:
+        return None
+    return json.dumps(
+        [[_label(label) for label in labels], digest], default=str
+    )
+
+
+class Checkpoint:
+    """
+    Persists the elements of a tabular map to a file as they are computed,
+    so that a rerun of the same computation (after the process died, for
+    example) only computes the cells that weren't completed yet.
+
+    Completed elements are appended to the file, one JSON line per cell, in
+    chunks of chunksize elements. Cells are keyed by their labels along with
+    a fingerprint of the function and of the arguments of the cell (see
+    tapr.main.memoization.fingerprint), so a completed element is only
+    reused when the same function is called with the same arguments for the
+    same cell. Elements that are errors (see tapr.main.handling.is_error),
+    elements that can't be serialized with the tapr.io_ serializers, and
+    elements whose arguments can't be fingerprinted aren't persisted and are
+    therefore computed again on every run.
+
+    Parameters
+    ----------
+    path : str
+        The checkpoint file. It is created if it doesn't exist.
+    chunksize : int, optional
+        How many elements are computed between two writes to the file. The
+        default is 64.
+    allow_pickle : bool, optional
+        Whether or not pickle may be used to serialize elements. The default
+        is False.
+
+    """
+
+    def __init__(self, path, chunksize=64, allow_pickle=False):
+        if chunksize < 1:
+            raise ValueError("chunksize must be at least 1")
+        self._path = path
+        self._chunksize = chunksize
+        self._allow_pickle = allow_pickle
+
+    @property
+    def path(self):
+        return self._path
+
+    def __str__(self):
+        return f"Checkpoint\nPath: {self._path}\nChunk size: {self._chunksize}"
+
+    def __repr__(self):
+        return str(self)
+
+    def load(self):
+        """
+        The completed elements of the checkpoint file, as a dictionary of
+        element by key. A line that was only partially written (because the
+        process died while writing it) is ignored.
+        """
+        completed = {}
+        if not os.path.exists(self._path):
+            return completed
+        with open(self._path, "r") as fo:
+            for line in fo:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                completed[record["key"]] = deserialize(
+                    base64.b64decode(record["data"]),
+                    record["type"],
+                    allow_pickle=self._allow_pickle,
+                )
+        return completed
+
+    def clear(self):
+        """Remove the checkpoint file."""
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+    def _write(self, fo, key, value):
+        try:
+            bytes_, type_id = serialize(value, allow_pickle=self._allow_pickle)
+        except ValueError:
+            return
+        record = {
+            "key": key,
+            "type": type_id,
+            "data": base64.b64encode(bytes_).decode(),
+        }
+        fo.write(json.dumps(record) + "\n")
+
+    def _terminated(self):
+        with open(self._path, "rb") as fo:
+            fo.seek(-1, os.SEEK_END)
+            return fo.read(1) == b"\n"
+
+    def map(self, engine, func, labels, *iterables, cache=None):
+        """
+        Map func over iterables with engine, skipping the elements whose
+        cell (given by labels, the tuple of labels of every element) was
+        completed before with the same function and arguments. The remaining
+        elements are computed chunk by chunk, and each chunk is persisted
+        before the next one is computed.
+        """
+        from ..main.handling import is_error
+
+        completed = self.load()
+        elements = list(zip(*iterables))
+        keys = [
+            _key(cell, func, element) for cell, element in zip(labels, elements)
+        ]
+        results = [None] * len(elements)
+        pending = []
+        for i, key in enumerate(keys):
+            if key is not None and key in completed:
+                results[i] = completed[key]
+            else:
+                pending.append(i)
+
+        with open(self._path, "a") as fo:
+            if fo.tell() and not self._terminated():
+                # end a line that was only partially written
+                fo.write("\n")
+            for start in range(0, len(pending), self._chunksize):
+                chunk = pending[start : start + self._chunksize]
+                todo = zip(*(elements[i] for i in chunk))
+                if cache is None:
+                    computed = engine.__tapr_engine_map__(func, *todo)
+                else:
+                    computed = cache.map(engine, func, *todo)
+                for i, value in zip(chunk, computed):
+                    results[i] = value
+                    if keys[i] is not None and not is_error(value):
+                        self._write(fo, keys[i], value)
+                fo.flush()
+                os.fsync(fo.fileno())
+        return results
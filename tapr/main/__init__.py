@@ -1,7 +1,18 @@
 from .conversion import ntable, tabulate
-from .engines import StandardEngine, ProcessEngine, ThreadEngine
+from .engines import (
+    StandardEngine,
+    ProcessEngine,
+    ThreadEngine,
+    CancelToken,
+    TimedOut,
+    Cancelled,
+)
 from .ntable import NTable
+from .sparse import SparseNTable
 from .tabularization import tabularize
-from .handling import handled_by, FunctionError
+from .handling import handled_by, FunctionError, ErrorRecord, error_policy
+from .memoization import MemoCache
+from .progress import TextProgressBar, LoggingProgress, ProgressStats
+from .profiling import profile
 from .filtering import contains, matches
 from .utils import NULL
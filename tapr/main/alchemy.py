@@ -1,10 +1,42 @@
-import re
+import numpy as np
 
 from .filtering import matches
 
 ALCHEMY_STRING = "__ALCHEMY__"
 
 
+def _alchemize(match):
+    # replace whatever the groups of a match matched with the alchemy string,
+    # or the whole label if the pattern has no groups.
+    label = match.string
+    if not match.re.groups:
+        return label.replace(match.string, ALCHEMY_STRING)
+    for string in match.groups():
+        label = label.replace(string, ALCHEMY_STRING)
+    return label
+
+
+def _alchemize_labels(regex, labels):
+    # _alchemize every label of a pandas Index, all of which match regex, at
+    # once when the labels are strings
+    if labels.inferred_type != "string":
+        return [_alchemize(regex.match(label)) for label in labels]
+    if not regex.groups:
+        return np.full(len(labels), ALCHEMY_STRING, dtype="object")
+    groups = labels.str.extract(regex.pattern, flags=regex.flags, expand=True)
+    new_labels = labels.to_numpy(dtype="object", copy=True)
+    for column in groups:
+        strings = groups[column]
+        # optional groups that didn't take part in the match are skipped
+        found = strings.notna().to_numpy()
+        new_labels[found] = np.char.replace(
+            new_labels[found].astype(str),
+            strings[found].to_numpy(dtype=str),
+            ALCHEMY_STRING,
+        )
+    return new_labels
+
+
 class NTableAlchemy:
     def __init__(self, ntbl):
         self._ntbl = ntbl
@@ -13,21 +45,13 @@ class NTableAlchemy:
         ntbl = self._ntbl
         for k, v in index.items():
             # k should be a dimension name, v should be a regex
-            findex = list(filter(matches(v), ntbl.ntable_map(k)))
-            ntbl = ntbl.ntable_map(k)[findex]
-            label_map = {}
-            for label in ntbl.ntable_map(k):
-                match = re.match(v, label)
-                if len(match.groups()) == 0:
-                    label_map[label] = label.replace(
-                        match.string, ALCHEMY_STRING
-                    )
-                else:
-                    new_label = label
-                    for string in match.groups():
-                        new_label = new_label.replace(string, ALCHEMY_STRING)
-                    label_map[label] = new_label
-            ntbl = ntbl.ntable_map(k).relabel(**label_map)
+            predicate = matches(v)
+            ntbl = ntbl.filter[{k: predicate}]
+            labels = ntbl.struct.label_index(k)
+            label_map = dict(
+                zip(labels, _alchemize_labels(predicate.regex, labels))
+            )
+            ntbl = ntbl.struct.relabel(**{k: label_map})
 
         return ntbl
 
@@ -40,18 +64,13 @@ class NTableAlchemy:
             )
 
         for k, v in index.items():
-            my_ntable_map = self._ntbl.ntable_map(k)
-            ur_ntable_map = value.ntable_map(k)
-            alchemy_labels = list(
-                ur_ntable_map.contains(ALCHEMY_STRING).ntable_map(k)
-            )
-            label_map = {
-                label: label.replace(ALCHEMY_STRING, v)
-                for label in alchemy_labels
-            }
-
-            for old_label, new_label in label_map.items():
-                my_ntable_map[new_label] = ur_ntable_map[old_label]
+            ur_ntable = value.ntable_map(k).contains(ALCHEMY_STRING)
+            new_labels = [
+                label.replace(ALCHEMY_STRING, v)
+                for label in ur_ntable.struct.label_index(k)
+            ]
+            # a single, batched assignment for all of the labels
+            self._ntbl.ntable_map(k)[new_labels] = ur_ntable
 
 
 class NTableMapAlchemy:
@@ -7,10 +7,11 @@ import numpy as np
 import pandas as pd
 import xarray as xr
 
-from .utils import basic_refmap, NULL, default_refmap
+from .utils import basic_refmap, NULL, default_refmap, typed_storage
 from .processing import broadcast_tables, tabular_map
 from .engines import StandardEngine
 from .ttypes import STANDARD_TTYPE
+from .sparse import SparseNTable, walker_to_sparse_ntable
 
 
 def _tuplefy(*args):
@@ -94,24 +95,6 @@ def tabulate(con):
     raise TypeError(f"unable to tabulate object of type {type(con)}")
 
 
-def _mapping_depth(mapping):
-    if isinstance(mapping, Mapping):
-        return (
-            max(map(_mapping_depth, mapping.values())) if mapping else 0
-        ) + 1
-    return 0
-
-
-# def _flatten_mapping_values(mapping):
-#     result = []
-#     for item in mapping.values():
-#         if not isinstance(item, Mapping):
-#             result.append(item)
-#         else:
-#             result.extend(_flatten_mapping_values(item))
-#     return result
-
-
 def _get_nested_value(data, index, default=None):
     try:
         return ft.reduce(op.getitem, index, data)
@@ -119,39 +102,170 @@ def _get_nested_value(data, index, default=None):
         return default
 
 
-def _extract_mapping_coords(mapping, dest=None, depth=0, dims=None):
-    retflag = False
-    if dest is None:
-        # if dest is None we are in the top-most call
-        maxdepth = _mapping_depth(mapping)
-        dest = {i: [] for i in range(maxdepth)}
-        retflag = True
-    for k, v in mapping.items():
-        if k not in dest[depth]:
-            dest[depth].append(k)
-        if isinstance(v, Mapping):
-            _extract_mapping_coords(v, dest=dest, depth=depth + 1)
-    if retflag:
-        if dims is None:
-            return {f"dim{k}": v for k, v in dest.items()}
-        else:
-            return {dims[k]: v for k, v in dest.items()}
+class _MappingWalker:
+    """
+    Collects the labels and populated cells of nested mappings in a single
+    pass. Labels are kept per depth, in order of first appearance, in dicts
+    used as ordered sets (label -> position). Populated cells are kept by
+    their tuple of label positions, so cells added later replace cells
+    added earlier.
+    """
 
+    def __init__(self):
+        self.labels = []
+        self.leaves = {}
+
+    def _position(self, depth, label):
+        while len(self.labels) <= depth:
+            self.labels.append({})
+        positions = self.labels[depth]
+        position = positions.get(label)
+        if position is None:
+            position = positions[label] = len(positions)
+        return position
+
+    def add_mapping(self, mapping, path=()):
+        """Add every cell of a (possibly nested) mapping."""
+        depth = len(path)
+        while len(self.labels) <= depth:
+            self.labels.append({})
+        for k, v in mapping.items():
+            here = path + (self._position(depth, k),)
+            if isinstance(v, Mapping):
+                self.add_mapping(v, here)
+            else:
+                self.leaves[here] = v
+
+    def add_path(self, path, value):
+        """Add a single cell, given by its labels along each dimension."""
+        if isinstance(value, Mapping):
+            self.add_mapping(
+                value,
+                tuple(self._position(d, k) for d, k in enumerate(path)),
+            )
+        else:
+            self.leaves[
+                tuple(self._position(d, k) for d, k in enumerate(path))
+            ] = value
 
-def _mapping_to_ntable(mapping, dims=None, engine=None, ttype=None):
+    def coords(self, dims=None):
+        if dims is None:
+            dims = [f"dim{k}" for k in range(len(self.labels))]
+        return {dims[k]: list(v) for k, v in enumerate(self.labels)}
+
+    @property
+    def shape(self):
+        return tuple(len(labels) for labels in self.labels)
+
+    def cells(self):
+        """
+        Iterate over the (flat position, value) pairs of the populated cells.
+        A leaf that isn't as deep as the deepest leaf is indexed with the
+        labels of the remaining dimensions, and every resulting value that
+        isn't missing populates a cell.
+        """
+        shape = self.shape
+        strides = [1] * len(shape)
+        for i in range(len(shape) - 2, -1, -1):
+            strides[i] = strides[i + 1] * shape[i + 1]
+        for path, value in self.leaves.items():
+            position = sum(p * s for p, s in zip(path, strides))
+            if len(path) == len(shape):
+                yield position, value
+                continue
+            remaining = [
+                list(labels.items()) for labels in self.labels[len(path) :]
+            ]
+            for index in it.product(*remaining):
+                nested = _get_nested_value(
+                    value, tuple(label for label, _ in index), NULL()
+                )
+                if nested is not NULL():
+                    yield position + sum(
+                        p * s
+                        for (_, p), s in zip(index, strides[len(path) :])
+                    ), nested
+
+
+def _walker_to_ntable(walker, dims=None, engine=None, ttype=None):
     from .ntable import NTable
 
-    coords = _extract_mapping_coords(mapping, dims=dims)
+    coords = walker.coords(dims)
     dmap = basic_refmap(coords, tuple(coords.keys()))
-    data_keys = it.product(*coords.values())
-    dlist = [_get_nested_value(mapping, index, NULL()) for index in data_keys]
-
+    # one element per cell, so that writing to one cell never affects another
+    dlist = [NULL()] * dmap.size
+    for position, value in walker.cells():
+        dlist[position] = value
     return NTable(dlist, dmap, engine=engine, ttype=ttype)
 
+
+def _mapping_to_ntable(mapping, dims=None, engine=None, ttype=None):
+    walker = _MappingWalker()
+    walker.add_mapping(mapping)
+    return _walker_to_ntable(walker, dims, engine=engine, ttype=ttype)
+
+
+def ntable_from_stream(
+    iterable, dims=None, engine=None, ttype=None, sparse=False
+):
+    """
+    Create a NTable object from a stream of cells, without materializing
+    them as a single nested mapping first. Useful for JSON lines sources,
+    for example.
+
+    Parameters
+    ----------
+    iterable : Iterable
+        Yields either nested mappings, whose cells are merged together (later
+        cells replace earlier cells with the same labels), or (path, value)
+        pairs, where path is the tuple of labels of a cell.
+    dims : Sequence, optional
+        The desired dimension names. If None, dim names will be dim0, dim1,
+        dim2, etc. The default is None.
+    engine : Engine, optional
+        The engine to be used when doing computations. If None, a standard
+        serial engine will be used. The default is None.
+    ttype : set, optional
+        Set of objects that the NTable may contain. The default is None.
+    sparse : bool, optional
+        Whether or not to create a SparseNTable object. The default is False.
+
+    Returns
+    -------
+    NTable or SparseNTable
+        The NTable object, where cells missing from the stream are NULL.
+
+    """
+    walker = _MappingWalker()
+    for item in iterable:
+        if isinstance(item, Mapping):
+            walker.add_mapping(item)
+        else:
+            path, value = item
+            walker.add_path(tuple(path), value)
+    if sparse:
+        return walker_to_sparse_ntable(walker, dims, engine=engine, ttype=ttype)
+    return _walker_to_ntable(walker, dims, engine=engine, ttype=ttype)
+
+
+def _borrowed(ntbl, source):
+    # A typed reflist may be a view of the data it was converted from, in
+    # which case it is marked as shared so that writes copy it first instead
+    # of modifying the data of the caller.
+    if np.shares_memory(ntbl.reflist, source):
+        ntbl._shared_reflist = True
+    return ntbl
+
+
 def _ndarray_to_ntable(ndarray, engine=None, ttype=None):
     from .ntable import NTable
 
     dmap = default_refmap(*ndarray.shape)
+    typed = typed_storage(ndarray)
+    if typed is not None:
+        dlist, refarray = typed
+        dmap.values[...] = refarray
+        return _borrowed(NTable(dlist, dmap, engine=engine, ttype=ttype), ndarray)
     dlist = list(ndarray.flat)
     return NTable(dlist, dmap, engine=engine, ttype={type(dlist[0])}) # dlist should all have same type
 
@@ -159,29 +273,52 @@ def _ndarray_to_ntable(ndarray, engine=None, ttype=None):
 def _data_array_to_ntable(data_array, engine=None, ttype=None):
     from .ntable import NTable
 
-    dlist = list(data_array.values.flat)
-    dmap_values = np.arange(len(dlist)).reshape(*(data_array.shape))
+    typed = typed_storage(data_array.values)
+    if typed is not None:
+        dlist, dmap_values = typed
+    else:
+        dlist = list(data_array.values.flat)
+        dmap_values = np.arange(len(dlist)).reshape(*(data_array.shape))
     dmap = xr.DataArray(dmap_values, data_array.coords, data_array.dims)
-    return NTable(dlist, dmap, engine=engine, ttype=ttype)
+    ntbl = NTable(dlist, dmap, engine=engine, ttype=ttype)
+    if typed is not None:
+        _borrowed(ntbl, data_array.values)
+    return ntbl
 
 
 def _pandas_to_ntable(pds, dims=None, engine=None, ttype=None):
     from .ntable import NTable
 
-    reflist = list(pds.values.flat)
+    # a frame whose columns share a numeric dtype is kept as typed storage,
+    # usually without copying its data
+    values = pds.to_numpy()
+    typed = typed_storage(values)
+    if typed is not None:
+        reflist, refarray = typed
+    else:
+        reflist = list(pds.values.flat)
+        refarray = None
     if isinstance(pds, pd.DataFrame):
         if dims is None:
             dims = ("rows", "cols")
-        coords = {dims[0]: list(pds.index), dims[1]: list(pds.columns)}
+        coords = {dims[0]: pds.index, dims[1]: pds.columns}
     elif isinstance(pds, pd.Series):
         if dims is None:
             dims = ("rows",)
-        coords = {dims[0]: list(pds.index)}
-    refmap = basic_refmap(coords, dims)
-    return NTable(reflist, refmap, engine=engine, ttype=ttype)
-
-
-def ntable(obj, dims=None, engine=None, ttype=None, coords=None, shape=None):
+        coords = {dims[0]: pds.index}
+    if refarray is None:
+        refmap = basic_refmap(coords, dims)
+    else:
+        refmap = xr.DataArray(refarray, coords, dims)
+    ntbl = NTable(reflist, refmap, engine=engine, ttype=ttype)
+    if refarray is not None:
+        _borrowed(ntbl, values)
+    return ntbl
+
+
+def ntable(
+    obj, dims=None, engine=None, ttype=None, coords=None, shape=None, sparse=False
+):
     """
     Parameters
     ----------
@@ -196,6 +333,10 @@ def ntable(obj, dims=None, engine=None, ttype=None, coords=None, shape=None):
     ttype : set, optional
         Set of objects that the NTable may contain. If None, a set of common
         objects is used. The default is None.
+    sparse : bool, optional
+        Whether or not to create a SparseNTable object, which only stores
+        the cells that aren't NULL. If obj is a Mapping, it is converted
+        without ever building the dense layout. The default is False.
 
     Raises
     ------
@@ -210,6 +351,24 @@ def ntable(obj, dims=None, engine=None, ttype=None, coords=None, shape=None):
     """
     from .ntable import NTable
 
+    if sparse:
+        if isinstance(obj, Mapping):
+            walker = _MappingWalker()
+            walker.add_mapping(obj)
+            return walker_to_sparse_ntable(
+                walker, dims, engine=engine, ttype=ttype
+            )
+        return SparseNTable.from_ntable(
+            ntable(
+                obj,
+                dims=dims,
+                engine=engine,
+                ttype=ttype,
+                coords=coords,
+                shape=shape,
+            )
+        )
+
     if isinstance(obj, Mapping):
         ntbl = _mapping_to_ntable(obj, dims, engine=engine, ttype=ttype)
         return ntbl
@@ -224,6 +383,8 @@ def ntable(obj, dims=None, engine=None, ttype=None, coords=None, shape=None):
         return ntbl
     if isinstance(obj, NTable):
         ntbl = NTable(obj.reflist, obj.refmap, engine=engine, ttype=ttype)
+        obj._shared_reflist = True
+        ntbl._shared_reflist = True
         return ntbl
 
     try:
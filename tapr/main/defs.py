@@ -5,6 +5,22 @@ import datetime as dt
 
 TAPR_RESERVED_KEYWORD = "__TAPR_RESERVED_COORDS__"
 
+# Views (struct indexing, loc, filter, alchemy) whose refmap references less
+# than this fraction of the shared reflist are compacted into their own,
+# minimal reflist. None disables automatic compaction.
+AUTO_COMPACT_FRACTION = None
+
+# What tabularized NTable operations (operators, element attributes,
+# methods and indexing) store for an element whose call raised an exception.
+# One of "function_error", "raise", "record" or "null". This is the default,
+# which tapr.main.handling.error_policy overrides within a context.
+ERROR_POLICY = "function_error"
+
+# numpy dtype kinds (bool, integer, float, complex, timedelta and datetime)
+# that are stored as typed 1 dimensional ndarray reflists, rather than lists
+# of boxed python objects, when converting from numpy, pandas or xarray.
+TYPED_STORAGE_KINDS = "biufcmM"
+
 # TODO: Ensure that all operators are handled
 
 UFUNC_TO_OP = {
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
 from concurrent import futures as ft
+import concurrent.futures.process
+import threading
+import time
 
 # from dask.distributed import Client
 
@@ -10,15 +13,391 @@ class Engine(ABC):
         pass
 
 
-class ProcessEngine(Engine):
-    def __init__(self, processes):
+class TimedOut:
+    """
+    Marker stored for an element that didn't finish within the timeout of
+    its engine.
+    """
+
+    __slots__ = ("timeout",)
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"TimedOut({self.timeout}s)"
+
+    def __repr__(self):
+        return str(self)
+
+    def __ntable_element__str__(self):
+        return "TIMED OUT"
+
+    def __bool__(self):
+        return False
+
+    def __eq__(self, other):
+        return isinstance(other, TimedOut) and self.timeout == other.timeout
+
+    def __hash__(self):
+        return hash((TimedOut, self.timeout))
+
+
+class Cancelled:
+    """
+    Marker stored for an element that wasn't computed because the map was
+    cancelled.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return "Cancelled"
+
+    def __repr__(self):
+        return str(self)
+
+    def __ntable_element__str__(self):
+        return "CANCELLED"
+
+    def __bool__(self):
+        return False
+
+    def __eq__(self, other):
+        return isinstance(other, Cancelled)
+
+    def __hash__(self):
+        return hash(Cancelled)
+
+
+class CancelToken:
+    """
+    Cooperative cancellation of the maps of the engines it is given to.
+    Calling cancel (from another thread, for example) stops an in-flight map:
+    elements that are already computed are kept and every other element is
+    a Cancelled marker.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def reset(self):
+        self._event.clear()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, timeout):
+        return self._event.wait(timeout)
+
+    def __getstate__(self):
+        # events can't be pickled
+        return self.cancelled
+
+    def __setstate__(self, state):
+        self._event = threading.Event()
+        if state:
+            self._event.set()
+
+
+def _failure(result):
+    # the exception type of a result that stands for a handled exception
+    # (see tapr.main.handling), or None
+    from .handling import FunctionError, ErrorRecord
+    from .profiling import peel
+
+    result = peel(result)
+    if isinstance(result, FunctionError):
+        return type(result._e)
+    if isinstance(result, ErrorRecord):
+        return result.exc_type
+    return None
+
+
+class _Retrying:
+    """
+    Calls func again, after an exponentially growing delay, whenever it
+    raises (or returns the handled form of) one of the retry_on exceptions.
+    """
+
+    def __init__(self, func, retries, retry_on, backoff):
+        self._func = func
+        self._retries = retries
+        self._retry_on = retry_on
+        self._backoff = backoff
+
+    def __call__(self, *args):
+        for attempt in range(self._retries + 1):
+            last = attempt == self._retries
+            try:
+                result = self._func(*args)
+            except self._retry_on:
+                if last:
+                    raise
+            else:
+                failure = _failure(result)
+                if last or failure is None or not issubclass(
+                    failure, self._retry_on
+                ):
+                    return result
+            if self._backoff:
+                time.sleep(self._backoff * 2**attempt)
+
+
+class _PolicyEngine(Engine):
+    # Shared implementation of the timeout, retry and cancellation policies
+    # of the pool based engines.
+
+    _POLL = 0.05
+
+    def __init__(
+        self,
+        timeout=None,
+        retries=0,
+        retry_on=(Exception,),
+        backoff=0.0,
+        cancel=None,
+        progress=None,
+    ):
+        self._timeout = timeout
+        self._retries = retries
+        self._retry_on = retry_on
+        self._backoff = backoff
+        self._cancel = cancel
+        self._progress = progress
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def cancel_token(self):
+        return self._cancel
+
+    @abstractmethod
+    def _executor(self):
+        pass
+
+    def _recycle(self, executor):
+        # Replace an executor whose workers may be stuck with a new one.
+        # Elements that haven't started yet are cancelled (see _lost) and
+        # resubmitted to the new executor, while stuck workers are abandoned.
+        executor.shutdown(wait=False, cancel_futures=True)
+        return self._executor()
+
+    def _lost(self, future):
+        # whether the element of future has to be resubmitted after its
+        # executor was recycled
+        return future.cancelled()
+
+    def _has_policies(self):
+        return (
+            self._timeout is not None
+            or self._retries
+            or self._cancel is not None
+            or self._progress is not None
+        )
+
+    def _wait(self, future, started):
+        # Wait for future to finish, within the timeout and unless cancelled.
+        # started() is the time the element of future was seen starting, or
+        # None if it hasn't started yet. While there is a timeout, the
+        # futures are polled so that the elements queued behind future are
+        # seen starting on time. Returns "done", "timeout" or "cancelled".
+        while True:
+            if self._cancel is not None and self._cancel.cancelled:
+                return "cancelled"
+            step = None
+            if self._timeout is not None:
+                step = self._POLL
+                start = started()
+                if start is not None:
+                    remaining = start + self._timeout - time.monotonic()
+                    if remaining <= 0:
+                        return "timeout"
+                    step = min(step, remaining)
+            elif self._cancel is not None:
+                step = self._POLL
+            done, _ = ft.wait([future], timeout=step)
+            if done:
+                return "done"
+
+    @staticmethod
+    def _report(reporter, index):
+        # report an element from the done callback of its future
+        def callback(future):
+            if future.cancelled():
+                return
+            exception = future.exception()
+            if isinstance(exception, ft.process.BrokenProcessPool):
+                # its worker was recycled, it will be resubmitted
+                return
+            if exception is not None:
+                reporter.finished(index, exception)
+            else:
+                reporter.finished(index, *future.result())
+
+        return callback
+
+    def _policy_map(self, func, *args):
+        if self._retries:
+            func = _Retrying(func, self._retries, self._retry_on, self._backoff)
+        elements = list(zip(*args))
+        results = [None] * len(elements)
+        reporter = None
+        if self._progress is not None:
+            from .progress import _Reporter, _Timed
+
+            reporter = _Reporter(self._progress, len(elements))
+            func = _Timed(func)
+
+        # when every element was seen starting, so that timeouts are
+        # measured from there. Executors start elements in the order they
+        # were submitted, so only the first element not seen starting yet
+        # (next_start) and the ones after it have to be looked at.
+        starts = [None] * len(elements)
+        next_start = 0
+
+        def started(i):
+            nonlocal next_start
+            now = time.monotonic()
+            while next_start < len(futures) and (
+                futures[next_start].running() or futures[next_start].done()
+            ):
+                if starts[next_start] is None:
+                    starts[next_start] = now
+                next_start += 1
+            return starts[i]
+
+        def submit(i):
+            nonlocal next_start
+            starts[i] = None
+            next_start = min(next_start, i)
+            future = executor.submit(func, *elements[i])
+            if reporter is not None:
+                reporter.submitted(i)
+                future.add_done_callback(self._report(reporter, i))
+            return future
+
+        def value(i, future):
+            result = future.result()
+            if reporter is None:
+                return result
+            # done callbacks may run after the future is seen as done, so
+            # the element is also reported here (only once in all)
+            reporter.finished(i, *result)
+            return result[0]
+
+        def give_up(i, marker):
+            results[i] = marker
+            if reporter is not None:
+                reporter.finished(i, marker)
+
+        executor = self._executor()
+        futures = []
+        for i in range(len(elements)):
+            futures.append(submit(i))
+        try:
+            for i, future in enumerate(futures):
+                if future.done() and not future.cancelled():
+                    state = "done"
+                else:
+                    state = self._wait(future, lambda: started(i))
+                if state == "done":
+                    results[i] = value(i, future)
+                elif state == "timeout":
+                    give_up(i, TimedOut(self._timeout))
+                    future.cancel()
+                    # so that the elements queued behind the stuck one still
+                    # get their full timeout
+                    executor = self._recycle(executor)
+                    for j in range(i + 1, len(futures)):
+                        if self._lost(futures[j]):
+                            futures[j] = submit(j)
+                else:
+                    for j in range(i, len(futures)):
+                        futures[j].cancel()
+                    for j in range(i, len(futures)):
+                        if futures[j].done() and not futures[j].cancelled():
+                            results[j] = value(j, futures[j])
+                        else:
+                            give_up(j, Cancelled())
+                    # don't leave workers busy with abandoned elements
+                    executor = self._recycle(executor)
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+
+class ProcessEngine(_PolicyEngine):
+    """
+    Maps functions with a pool of processes.
+
+    Parameters
+    ----------
+    processes : int
+        The number of processes.
+    timeout : float, optional
+        Seconds an element may take, from when it is seen starting (polled
+        every 50ms). Elements that take longer get a TimedOut marker, and the
+        processes of the pool are replaced so that they don't stay stuck on
+        them. A process pool hands elements to its processes slightly ahead
+        of time, so an element waiting for a free process may already be
+        counted as started. If None, elements may take as long as they need.
+        The default is None.
+    retries : int, optional
+        How many times an element that failed with one of the retry_on
+        exceptions is retried. The default is 0.
+    retry_on : tuple of type, optional
+        The exceptions (raised, or handled into a FunctionError or
+        ErrorRecord) that are retried. The default is (Exception,).
+    backoff : float, optional
+        Seconds waited before the first retry, doubled for every further
+        retry. The default is 0.
+    cancel : CancelToken, optional
+        Token that cancels in-flight maps when cancelled. The default is None.
+    progress : callable or sequence of callable, optional
+        Called with a tapr.main.progress.ProgressEvent whenever an element is
+        submitted, completes or fails (see tapr.main.progress for built-in
+        callbacks). Completion events may be emitted from other threads. If
+        None, no events are emitted. The default is None.
+
+    """
+
+    def __init__(self, processes, **policies):
+        super().__init__(**policies)
         self._processes = processes
 
     @property
     def processes(self):
         return self._processes
 
+    def _executor(self):
+        return ft.ProcessPoolExecutor(self._processes)
+
+    def _recycle(self, executor):
+        # a stuck process can't be interrupted, so every process of the pool
+        # is stopped before a new pool is started
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        return super()._recycle(executor)
+
+    def _lost(self, future):
+        # the elements running in the stopped processes are lost too
+        return (
+            future.cancelled()
+            or not future.done()
+            or isinstance(future.exception(), ft.process.BrokenProcessPool)
+        )
+
     def __tapr_engine_map__(self, func, *args):
+        if self._has_policies():
+            return self._policy_map(func, *args)
         with ft.ProcessPoolExecutor(self._processes) as ex:
             return list(ex.map(func, *args))
 
@@ -29,15 +408,35 @@ class ProcessEngine(Engine):
         return str(self)
 
 
-class ThreadEngine(Engine):
-    def __init__(self, threads):
+class ThreadEngine(_PolicyEngine):
+    """
+    Maps functions with a pool of threads. Takes the same policies as
+    ProcessEngine, except that a thread stuck on an element that timed out
+    can't be stopped: it is abandoned, and keeps running in the background,
+    while the remaining elements are mapped with a new pool of threads.
+    Timeouts are measured from when a thread starts running the element.
+
+    Parameters
+    ----------
+    threads : int
+        The number of threads.
+
+    """
+
+    def __init__(self, threads, **policies):
+        super().__init__(**policies)
         self._threads = threads
 
     @property
     def threads(self):
         return self._threads
 
+    def _executor(self):
+        return ft.ThreadPoolExecutor(self._threads)
+
     def __tapr_engine_map__(self, func, *args):
+        if self._has_policies():
+            return self._policy_map(func, *args)
         with ft.ThreadPoolExecutor(self._threads) as ex:
             return list(ex.map(func, *args))
 
@@ -49,11 +448,74 @@ class ThreadEngine(Engine):
 
 
 class StandardEngine(Engine):
-    def __init__(self):
-        pass
+    """
+    Maps functions serially.
+
+    Parameters
+    ----------
+    retries : int, optional
+        See ProcessEngine. The default is 0.
+    retry_on : tuple of type, optional
+        See ProcessEngine. The default is (Exception,).
+    backoff : float, optional
+        See ProcessEngine. The default is 0.
+    cancel : CancelToken, optional
+        Token that cancels in-flight maps when cancelled. It is checked
+        between elements. The default is None.
+    progress : callable or sequence of callable, optional
+        See ProcessEngine. The default is None.
+
+    """
+
+    def __init__(
+        self,
+        retries=0,
+        retry_on=(Exception,),
+        backoff=0.0,
+        cancel=None,
+        progress=None,
+    ):
+        self._retries = retries
+        self._retry_on = retry_on
+        self._backoff = backoff
+        self._cancel = cancel
+        self._progress = progress
+
+    @property
+    def cancel_token(self):
+        return self._cancel
 
     def __tapr_engine_map__(self, func, *args):
-        return list(map(func, *args))
+        if self._retries:
+            func = _Retrying(func, self._retries, self._retry_on, self._backoff)
+        if self._cancel is None and self._progress is None:
+            return list(map(func, *args))
+        elements = list(zip(*args))
+        reporter = None
+        if self._progress is not None:
+            from .progress import _Reporter, _Timed
+
+            reporter = _Reporter(self._progress, len(elements))
+            func = _Timed(func)
+        results = []
+        for i, element in enumerate(elements):
+            if self._cancel is not None and self._cancel.cancelled:
+                results.append(Cancelled())
+                if reporter is not None:
+                    reporter.finished(i, results[-1])
+                continue
+            if reporter is None:
+                results.append(func(*element))
+                continue
+            reporter.submitted(i)
+            try:
+                result, duration = func(*element)
+            except BaseException as e:
+                reporter.finished(i, e)
+                raise
+            reporter.finished(i, result, duration)
+            results.append(result)
+        return results
 
     def __str__(self):
         return "Standard (serial) Engine"
@@ -1,30 +1,90 @@
 import re
 
+import numpy as np
 
 
+def _label_mask(predicate, labels):
+    # Evaluate a filtering predicate on every label of a pandas Index at
+    # once. Predicates may implement __tapr_label_mask__ to provide a
+    # vectorized implementation, otherwise they are called once per label.
+    try:
+        label_mask = predicate.__tapr_label_mask__
+    except AttributeError:
+        return np.fromiter(map(predicate, labels), dtype=bool, count=len(labels))
+    return np.asarray(label_mask(labels), dtype=bool)
 
 
+class _LabelPredicate:
+    # Base class for the predicates below. The mask of the last index the
+    # predicate was evaluated on is cached, since label indexes are
+    # themselves cached on the NTable objects they belong to.
+    _labels = None
+    _mask = None
 
+    def __tapr_label_mask__(self, labels):
+        if labels is not self._labels:
+            self._mask = self._vectorized_mask(labels)
+            self._labels = labels
+        return self._mask
 
-def isin(collection):
-    def function(value):
-        return value in collection
+    def _vectorized_mask(self, labels):
+        return np.fromiter(map(self, labels), dtype=bool, count=len(labels))
 
-    return function
 
+class _IsIn(_LabelPredicate):
+    def __init__(self, collection):
+        self._collection = collection
 
-def contains(string):
-    def function(value):
-        return string in value
+    def __call__(self, value):
+        return value in self._collection
 
-    return function
+    def _vectorized_mask(self, labels):
+        if isinstance(self._collection, str):
+            # substring semantics, can't be done by a hash lookup
+            return super()._vectorized_mask(labels)
+        return labels.isin(list(self._collection))
 
 
-def matches(pattern):
-    def function(value):
-        return bool(re.match(pattern, value))
+class _Contains(_LabelPredicate):
+    def __init__(self, string):
+        self._string = string
+
+    def __call__(self, value):
+        return self._string in value
+
+    def _vectorized_mask(self, labels):
+        if labels.inferred_type != "string":
+            return super()._vectorized_mask(labels)
+        return labels.str.contains(self._string, regex=False)
+
+
+class _Matches(_LabelPredicate):
+    def __init__(self, pattern):
+        self._regex = re.compile(pattern)
+
+    @property
+    def regex(self):
+        return self._regex
+
+    def __call__(self, value):
+        return bool(self._regex.match(value))
 
-    return function
+    def _vectorized_mask(self, labels):
+        if labels.inferred_type != "string":
+            return super()._vectorized_mask(labels)
+        return labels.str.match(self._regex.pattern, flags=self._regex.flags)
+
+
+def isin(collection):
+    return _IsIn(collection)
+
+
+def contains(string):
+    return _Contains(string)
+
+
+def matches(pattern):
+    return _Matches(pattern)
 
 
 class NTableFilter:
@@ -37,8 +97,10 @@ class NTableFilter:
             # v should be a function that returns True or False based on some
             # condition on the items of the iterable (in this case the keys of
             # the dimension mapping)
-            findex = list(filter(v, ntbl.ntable_map(k)))
-            ntbl = ntbl.ntable_map(k)[findex]
+            if k not in ntbl.struct.dims:
+                raise ValueError(f"{k} dimension does not exist")
+            mask = _label_mask(v, ntbl.struct.label_index(k))
+            ntbl = ntbl.struct.take(np.flatnonzero(mask), k)
 
         return ntbl
 
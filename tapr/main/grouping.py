@@ -0,0 +1,150 @@
+import functools as ft
+
+import numpy as np
+import pandas as pd
+
+from .engines import ProcessEngine
+from .reduction import reduce
+from .utils import concatenate_ntables
+
+
+def _is_missing(key):
+    # whether key is a missing (None or NaN) key
+    return pd.api.types.is_scalar(key) and pd.isna(key)
+
+
+def _reduce_group(ntbl, func, dim, ufunc):
+    return reduce(ntbl, func, dim, ufunc=ufunc)
+
+
+class NTableGroupBy:
+    """
+    Groups the labels along a dimension of a NTable object by a key
+    function, for split-apply-combine operations.
+
+    Parameters
+    ----------
+    ntbl : NTable
+        The NTable object to group.
+    dim : str
+        The dimension whose labels are grouped.
+    key : callable
+        Function called on each label along dim. Labels with equal keys
+        belong to the same group, and so do labels with missing (None or
+        NaN) keys.
+
+    """
+
+    def __init__(self, ntbl, dim, key):
+        if dim not in ntbl.struct.dims:
+            raise ValueError(f"{dim} dimension does not exist")
+        self._ntbl = ntbl
+        self._dim = dim
+        labels = ntbl.struct.label_index(dim)
+        keys = np.empty(len(labels), dtype="object")
+        keys[:] = [key(label) for label in labels]
+        # missing keys (None and NaN) form a group of their own
+        codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+        # positions of the labels of each group, in order of appearance
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=len(uniques))
+        starts = np.cumsum(counts) - counts
+        # the keys are taken from the labels rather than from uniques, in
+        # which missing keys are all NaN
+        self._keys = list(keys[order[starts]])
+        self._positions = np.split(order, starts[1:])
+
+    @property
+    def ntable(self):
+        return self._ntbl
+
+    @property
+    def dim(self):
+        return self._dim
+
+    def keys(self):
+        """The keys of the groups, in order of first appearance."""
+        return list(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, key):
+        if _is_missing(key):
+            missing = [i for i, k in enumerate(self._keys) if _is_missing(k)]
+            if not missing:
+                raise KeyError(key)
+            i = missing[0]
+        else:
+            try:
+                i = self._keys.index(key)
+            except ValueError:
+                raise KeyError(key)
+        return self._ntbl.struct.take(self._positions[i], self._dim)
+
+    def __iter__(self):
+        for key, positions in zip(self._keys, self._positions):
+            yield key, self._ntbl.struct.take(positions, self._dim)
+
+    def __str__(self):
+        return f"NTableGroupBy\nDim: {self._dim}\nGroups: {len(self)}"
+
+    def __repr__(self):
+        return str(self)
+
+    def apply(self, func):
+        """
+        Call func on the sub-NTable object of every group, with the engine
+        of the NTable object, and combine the results.
+
+        Parameters
+        ----------
+        func : callable
+            Function taking the NTable object of a group.
+
+        Returns
+        -------
+        NTable
+            If func returns NTable objects that still have dim, they are
+            concatenated along dim. If they don't, they are concatenated
+            along a new dim labeled by the group keys. Any other results
+            become the elements of a 1 dimensional NTable object labeled by
+            the group keys.
+
+        """
+        from .ntable import NTable
+        from .conversion import ntable
+
+        groups = [ntbl for _, ntbl in self]
+        if isinstance(self._ntbl.engine, ProcessEngine):
+            # avoid sending the full reflist to every process
+            groups = [ntbl.struct.compact() for ntbl in groups]
+        results = list(self._ntbl.engine.__tapr_engine_map__(func, groups))
+
+        if all(isinstance(result, NTable) for result in results):
+            if all(self._dim in result.struct.dims for result in results):
+                return concatenate_ntables(results, dim=self._dim)
+            return concatenate_ntables(
+                results, dim=self._dim, coords=self._keys
+            )
+        return ntable(
+            results,
+            coords={self._dim: self._keys},
+            dims=(self._dim,),
+            engine=self._ntbl.engine,
+        )
+
+    def reduce(self, func, ufunc=None):
+        """
+        Reduce every group along dim. See tapr.main.reduction.reduce.
+
+        Returns
+        -------
+        NTable
+            The reduced NTable object, where dim is labeled by the group
+            keys.
+
+        """
+        return self.apply(
+            ft.partial(_reduce_group, func=func, dim=self._dim, ufunc=ufunc)
+        )
@@ -1,7 +1,17 @@
+import contextlib
+import contextvars
+import traceback as tb
 import warnings as wn
 
+import numpy as np
+
+from . import defs
+from .engines import TimedOut, Cancelled
+
 
 class _CallAndHandle:
+    __slots__ = ("_handler", "_func")
+
     def __init__(self, handler, func):
         self._handler = handler
         self._func = func
@@ -12,6 +22,16 @@ class _CallAndHandle:
         except Exception as e:
             return self._handler(e, self._func, *args, **kwargs)
 
+    # wrappers of the same function are interchangeable, so that caches
+    # keyed by function (see tapr.main.memoization) hit across calls
+    def __eq__(self, other):
+        if not isinstance(other, _CallAndHandle):
+            return NotImplemented
+        return (self._handler, self._func) == (other._handler, other._func)
+
+    def __hash__(self):
+        return hash((self._handler, self._func))
+
 
 def handled_by(handler):
     def decorator(func):
@@ -58,3 +78,202 @@ def print_warning_return_function_error(e, func, *args, **kwargs):
         f"Warning: the function {func.__name__} raised a {type(e)} exception when given arguments {args} and kwargs {kwargs}"
     )
     return FunctionError(e, func, *args, **kwargs)
+
+
+class ErrorRecord:
+    """
+    A compact record of an exception raised by an element, stored instead of
+    a FunctionError by the "record" error policy. Unlike a FunctionError, it
+    doesn't keep the arguments of the call alive.
+
+    Attributes
+    ----------
+    exc_type : type
+        The type of the exception.
+    message : str
+        The message of the exception.
+    traceback : str
+        The formatted traceback of the exception.
+    coords : dict
+        The labels of the cell of the element along each dimension, or None
+        if unknown.
+
+    """
+
+    __slots__ = ("exc_type", "message", "traceback", "coords")
+
+    def __init__(self, exc_type, message, traceback, coords=None):
+        self.exc_type = exc_type
+        self.message = message
+        self.traceback = traceback
+        self.coords = coords
+
+    def __str__(self):
+        return f"ErrorRecord({self.exc_type.__name__}: {self.message})"
+
+    def __repr__(self):
+        return str(self)
+
+    def __ntable_element__str__(self):
+        return f"{self.exc_type.__name__}!"
+
+    def __bool__(self):
+        return False
+
+    def __eq__(self, other):
+        if not isinstance(other, ErrorRecord):
+            return NotImplemented
+        return (self.exc_type, self.message) == (other.exc_type, other.message)
+
+    def __hash__(self):
+        return hash((self.exc_type, self.message))
+
+
+def record_error(e, func, *args, **kwargs):
+    return ErrorRecord(type(e), str(e), tb.format_exc())
+
+
+def return_null(e, func, *args, **kwargs):
+    from .utils import NULL
+
+    return NULL()
+
+
+POLICIES = ("function_error", "raise", "record", "null")
+
+_POLICY_HANDLERS = {"record": record_error, "null": return_null}
+
+
+# the error policy set by error_policy, if any. A context variable, so that
+# the policy of a thread (or an asyncio task) doesn't leak into another one
+_POLICY = contextvars.ContextVar("tapr_error_policy", default=None)
+
+
+def current_policy():
+    """
+    The error policy of the current context: the one set by error_policy,
+    or defs.ERROR_POLICY if there is none.
+    """
+    policy = _POLICY.get()
+    return defs.ERROR_POLICY if policy is None else policy
+
+
+def _validate_policy(policy):
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {POLICIES}, not {policy}")
+
+
+def handled(func, policy=None, default=FunctionError):
+    """
+    Wrap func so that exceptions it raises are handled according to an error
+    policy. Wrappers of the same function under the same policy compare (and
+    hash) equal, so that caches hit across tabularized calls.
+
+    Parameters
+    ----------
+    func : callable
+        The function to wrap.
+    policy : str, optional
+        The error policy. If None, the current policy (see error_policy) is
+        used. The default is None.
+    default : callable, optional
+        The handler used by the "function_error" policy. The default is
+        FunctionError.
+
+    Returns
+    -------
+    callable
+        The wrapped function, or func itself if the policy is "raise".
+
+    """
+    if policy is None:
+        policy = current_policy()
+    _validate_policy(policy)
+    if policy == "raise":
+        return func
+    return handled_by(_POLICY_HANDLERS.get(policy, default))(func)
+
+
+@contextlib.contextmanager
+def error_policy(policy):
+    """
+    Context manager setting what tabularized NTable operations store for
+    elements that raise an exception.
+
+    Parameters
+    ----------
+    policy : str
+        "function_error" stores a FunctionError (the default), which keeps
+        the function and its arguments so that the call can be retried.
+        "raise" lets the exception propagate. "record" stores a compact
+        ErrorRecord. "null" stores NULL.
+
+    Notes
+    -----
+    The policy is set for the current context (thread or asyncio task)
+    only, so concurrent callers don't see each other's policy. Functions
+    are wrapped before an engine maps them, so the elements of a map follow
+    the policy of its caller whatever thread they run in.
+
+    """
+    _validate_policy(policy)
+    token = _POLICY.set(policy)
+    try:
+        yield
+    finally:
+        _POLICY.reset(token)
+
+
+def is_error(item):
+    return isinstance(item, (FunctionError, ErrorRecord, TimedOut, Cancelled))
+
+
+def error_indices(reflist):
+    """
+    The indices of the FunctionError, ErrorRecord, TimedOut and Cancelled
+    items of reflist.
+    """
+    if isinstance(reflist, np.ndarray):
+        return np.empty(0, dtype="int64")
+    return np.flatnonzero(
+        np.fromiter(map(is_error, reflist), dtype=bool, count=len(reflist))
+    )
+
+
+def cell_labels(ntbl, positions):
+    """The tuple of labels of each of the cells at the given flat positions."""
+    dims = ntbl.struct.dims
+    if not dims:
+        return [()] * len(positions)
+    multi_index = np.unravel_index(positions, ntbl.refmap.shape)
+    labels = [
+        ntbl.struct.label_index(dim)[pos] for dim, pos in zip(dims, multi_index)
+    ]
+    return list(zip(*labels))
+
+
+def error_report(ntbl):
+    """
+    List the cells of a NTable object whose element is an error. Error
+    indices are only looked for the first time a report is asked for, and
+    are then kept with the NTable object until it gets written to.
+
+    Returns
+    -------
+    list of tuple
+        A (coords, error) pair per failed cell, in C order, where coords maps
+        every dimension to the label of the cell.
+
+    """
+    indices = ntbl._errors
+    if indices is None:
+        indices = ntbl._errors = error_indices(ntbl.reflist)
+    refs = ntbl.refmap.values.reshape(-1)
+    positions = np.flatnonzero(np.isin(refs, indices))
+    if not len(positions):
+        return []
+    dims = ntbl.struct.dims
+    return [
+        (dict(zip(dims, labels)), ntbl.reflist[i])
+        for labels, i in zip(cell_labels(ntbl, positions), refs[positions])
+    ]
@@ -0,0 +1,194 @@
+import numpy as np
+import xarray as xr
+
+from .utils import NULL
+from .structure import _share
+from .processing import broadcast_tables, tabular_map
+
+JOINS = ("inner", "left", "right", "outer")
+
+
+def _joined_index(indexes, how):
+    # The labels of a dimension after joining the given label indexes. Each
+    # step is a hashed, linear time operation.
+    if how == "left":
+        return indexes[0]
+    if how == "right":
+        return indexes[-1]
+    result = indexes[0]
+    for index in indexes[1:]:
+        if how == "inner":
+            result = result[result.isin(index)]
+        else:
+            result = result.append(index[~index.isin(result)])
+    return result
+
+
+def _reindex_coord(coord, indexers):
+    # Reindex a non-dimension coordinate along the joined dimensions it lies
+    # on. Missing labels get None.
+    data = coord.values
+    for axis, dim in enumerate(coord.dims):
+        if dim not in indexers:
+            continue
+        indexer, missing = indexers[dim]
+        data = np.take(data, np.where(missing, 0, indexer), axis=axis)
+        if missing.any():
+            data = data.astype(object)
+            selection = [slice(None)] * data.ndim
+            selection[axis] = missing
+            data[tuple(selection)] = None
+    return xr.Variable(coord.dims, data)
+
+
+def _reindex(ntbl, targets, fill_value):
+    # Reindex the refmap of ntbl onto the target labels of each joined
+    # dimension. Missing labels point to a single fill_value entry appended
+    # to (a copy of) the reflist.
+    from .ntable import NTable
+
+    refmap = ntbl.refmap
+    values = refmap.values
+    reflist = ntbl.reflist
+    fill_index = None
+    coords = {}
+    indexers = {}
+    for axis, dim in enumerate(refmap.dims):
+        if dim not in targets:
+            coords[dim] = ntbl.struct.label_index(dim)
+            continue
+        target = targets[dim]
+        coords[dim] = target
+        indexer = ntbl.struct.label_index(dim).get_indexer(target)
+        missing = indexer < 0
+        indexers[dim] = (indexer, missing)
+        values = np.take(values, np.where(missing, 0, indexer), axis=axis)
+        if missing.any():
+            if fill_index is None:
+                reflist = list(reflist)
+                reflist.append(fill_value)
+                fill_index = len(reflist) - 1
+            selection = [slice(None)] * values.ndim
+            selection[axis] = missing
+            values[tuple(selection)] = fill_index
+    for name, coord in refmap.coords.items():
+        if name not in refmap.dims:
+            coords[name] = _reindex_coord(coord, indexers)
+    new_ntbl = NTable(
+        reflist,
+        xr.DataArray(values, coords, refmap.dims),
+        ntbl.engine,
+        set(ntbl.ttype) | ({type(fill_value)} if fill_index is not None else set()),
+        validate=False,
+    )
+    return _share(ntbl, new_ntbl)
+
+
+def align(*ntbls, how="inner", dims=None, fill_value=NULL()):
+    """
+    Join NTable objects on the labels of one or more dimensions, so that
+    they end up with the same labels along them.
+
+    Labels are matched with hash-based label indexes, so the cost is linear
+    in the number of labels. Unlike the alignment done when broadcasting
+    NTable objects, no float (NaN) round trip is involved.
+
+    Parameters
+    ----------
+    *ntbls : NTable
+        The NTable objects to join.
+    how : str, optional
+        One of "inner" (labels found in every NTable object), "left" (labels
+        of the first NTable object), "right" (labels of the last NTable
+        object) or "outer" (labels found in any of the NTable objects). The
+        default is "inner".
+    dims : Sequence, optional
+        The dimensions to join on. If None, every dimension shared by all of
+        the NTable objects is joined on. The default is None.
+    fill_value : object, optional
+        The element used where a NTable object has no element for a label.
+        The default is NULL().
+
+    Raises
+    ------
+    ValueError
+        Raised if how is not a valid join, if a join dimension is missing or
+        has duplicate labels, or if a dimension shared by the NTable objects
+        but not joined on has different labels in different NTable objects.
+
+    Returns
+    -------
+    tuple of NTable
+        The joined NTable objects, in the order they were given.
+
+    """
+    if how not in JOINS:
+        raise ValueError(f"how must be one of {JOINS}, not {how}")
+    if len(ntbls) == 0:
+        return tuple()
+    if dims is None:
+        dims = [
+            dim
+            for dim in ntbls[0].struct.dims
+            if all(dim in ntbl.struct.dims for ntbl in ntbls[1:])
+        ]
+
+    targets = {}
+    for dim in dims:
+        indexes = []
+        for ntbl in ntbls:
+            if dim not in ntbl.struct.dims:
+                raise ValueError(f"{dim} dimension does not exist")
+            index = ntbl.struct.label_index(dim)
+            if not index.is_unique:
+                raise ValueError(f"Unable to join on {dim}, labels are not unique")
+            indexes.append(index)
+        targets[dim] = _joined_index(indexes, how)
+
+    # dimensions that aren't joined on must already line up
+    for dim in set().union(*(ntbl.struct.dims for ntbl in ntbls)) - set(dims):
+        indexes = [
+            ntbl.struct.label_index(dim)
+            for ntbl in ntbls
+            if dim in ntbl.struct.dims
+        ]
+        if not all(index.equals(indexes[0]) for index in indexes[1:]):
+            raise ValueError(
+                f"{dim} has different labels in different NTable objects but is not joined on"
+            )
+
+    return tuple(_reindex(ntbl, targets, fill_value) for ntbl in ntbls)
+
+
+def _pair(*args):
+    return args
+
+
+def join(left, right, how="inner", dims=None, fill_value=NULL()):
+    """
+    Join two NTable objects on the labels of one or more dimensions into a
+    single NTable object, whose elements are (left, right) pairs. The
+    labels are joined as in align, and the aligned NTable objects are then
+    broadcast against each other.
+
+    Parameters
+    ----------
+    left : NTable
+        The NTable object providing the first element of every pair.
+    right : NTable
+        The NTable object providing the second element of every pair.
+    how : str, optional
+        See align. The default is "inner".
+    dims : Sequence, optional
+        See align. The default is None.
+    fill_value : object, optional
+        See align. The default is NULL().
+
+    Returns
+    -------
+    NTable
+        The joined NTable object.
+
+    """
+    left, right = align(left, right, how=how, dims=dims, fill_value=fill_value)
+    return tabular_map((_pair, left.engine), *broadcast_tables(left, right))
@@ -0,0 +1,324 @@
+import collections
+import hashlib
+import os
+import sys
+import threading
+import types
+import weakref
+
+import numpy as np
+
+from .handling import is_error
+
+
+class _Unkeyable(Exception):
+    pass
+
+
+# immutable singletons, which are hashed by identity but keyed by value
+_SINGLETONS = (type(None), type(Ellipsis), type(NotImplemented))
+
+
+def _freeze(obj, refs):
+    # Turn an element argument into a hashable key. Objects hashed by value
+    # are keyed by type and value, and containers are frozen recursively.
+    # Unhashable objects and callables hashed by identity are keyed by id,
+    # in which case a weakref is kept in refs so that a reused id can be
+    # told apart from the original object. Other objects hashed by identity
+    # can't be keyed: the cache would keep them alive, and return stale
+    # results once they are modified.
+    if isinstance(obj, tuple):
+        return (tuple, tuple(_freeze(item, refs) for item in obj))
+    if isinstance(obj, list):
+        return (list, tuple(_freeze(item, refs) for item in obj))
+    if isinstance(obj, dict):
+        return (
+            dict,
+            tuple((k, _freeze(v, refs)) for k, v in obj.items()),
+        )
+    try:
+        hash(obj)
+    except TypeError:
+        by_id = True
+    else:
+        by_id = type(obj).__hash__ is object.__hash__
+        if by_id and not callable(obj):
+            if isinstance(obj, _SINGLETONS):
+                return (type(obj), obj)
+            raise _Unkeyable
+    if by_id:
+        try:
+            refs.append(weakref.ref(obj))
+        except TypeError:
+            raise _Unkeyable
+        return (id, id(obj))
+    return (type(obj), obj)
+
+
+def _nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+def _digest_code(code, hasher):
+    hasher.update(code.co_code)
+    hasher.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _digest_code(const, hasher)
+        else:
+            hasher.update(repr(const).encode())
+
+
+def _state(obj):
+    # the attributes of an object, from its __dict__ and __slots__
+    state = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                state[name] = getattr(obj, name)
+    return dict(sorted(state.items()))
+
+
+def _digest(obj, hasher):
+    # Feed a stable (across runs) representation of an element argument to
+    # hasher, using the serializers of tapr.io_.
+    from ..io_.serialization import serialize
+
+    if isinstance(obj, (tuple, list)):
+        hasher.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _digest(item, hasher)
+    elif isinstance(obj, dict):
+        hasher.update(f"dict{len(obj)}".encode())
+        for k, v in obj.items():
+            _digest(k, hasher)
+            _digest(v, hasher)
+    elif isinstance(obj, types.MethodType):
+        hasher.update(b"method")
+        _digest(obj.__func__, hasher)
+        _digest(obj.__self__, hasher)
+    elif isinstance(obj, types.FunctionType):
+        # the name of a function doesn't identify it (lambdas, closures and
+        # redefined functions share names), so its code, defaults and
+        # closure are digested too
+        hasher.update(f"{obj.__module__}.{obj.__qualname__}".encode())
+        _digest_code(obj.__code__, hasher)
+        _digest(obj.__defaults__ or (), hasher)
+        _digest(obj.__kwdefaults__ or {}, hasher)
+        _digest(
+            tuple(cell.cell_contents for cell in obj.__closure__ or ()), hasher
+        )
+    elif callable(obj) and hasattr(obj, "__qualname__"):
+        # builtins and classes
+        hasher.update(f"{obj.__module__}.{obj.__qualname__}".encode())
+    elif callable(obj):
+        # callable objects are identified by their type and their state
+        cls = type(obj)
+        hasher.update(f"{cls.__module__}.{cls.__qualname__}".encode())
+        _digest(_state(obj), hasher)
+    else:
+        try:
+            bytes_, type_id = serialize(obj)
+        except ValueError:
+            raise _Unkeyable
+        hasher.update(type_id.encode())
+        hasher.update(len(bytes_).to_bytes(8, "little"))
+        hasher.update(bytes_)
+
+
+def fingerprint(func, element):
+    """
+    A digest of func and of the arguments of an element that is stable
+    across runs, or None if they can't be serialized with the tapr.io_
+    serializers.
+    """
+    hasher = hashlib.sha256()
+    try:
+        _digest(func, hasher)
+        _digest(element, hasher)
+    except _Unkeyable:
+        return None
+    return hasher.hexdigest()
+
+
+class MemoCache:
+    """
+    A memoization cache for tabularized functions. Results are keyed by the
+    function plus the arguments of each element so that elements whose
+    arguments haven't changed are not recomputed.
+
+    Arguments hashed by value are keyed by value. Unhashable arguments
+    (numpy arrays, for example) are keyed by identity and are therefore
+    assumed not to be modified in place, and so are callables hashed by
+    identity (functions, for example). Elements with other arguments hashed
+    by identity (instances of classes that don't define __hash__ and
+    __eq__) aren't memoized, and are computed on every call.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of results kept in memory. If None, the number of
+        results is not limited. The default is 1024.
+    maxbytes : int, optional
+        Maximum total size in bytes of the results kept in memory, as
+        estimated with ndarray.nbytes or sys.getsizeof. If None, the size of
+        the results is not limited. The default is None.
+    directory : str, optional
+        A directory to additionally persist results to, so that they survive
+        across runs. Only elements whose arguments and results can be
+        serialized with tapr.io_ serializers are persisted. If None, results
+        are only kept in memory. The default is None.
+    allow_pickle : bool, optional
+        Whether or not pickle may be used to serialize results persisted to
+        directory. The default is False.
+
+    """
+
+    def __init__(
+        self, maxsize=1024, maxbytes=None, directory=None, allow_pickle=False
+    ):
+        self._maxsize = maxsize
+        self._maxbytes = maxbytes
+        self._directory = directory
+        self._allow_pickle = allow_pickle
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def nbytes(self):
+        """The estimated size of the results kept in memory."""
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return f"MemoCache\nEntries: {len(self)}\nHits: {self.hits}\nMisses: {self.misses}"
+
+    def __repr__(self):
+        return str(self)
+
+    def key(self, func, element):
+        """
+        The in-memory key of an element (the tuple of arguments passed to
+        func), or None if the element can't be keyed.
+        """
+        refs = []
+        try:
+            key = (func, _freeze(element, refs))
+        except _Unkeyable:
+            return None
+        return key, refs
+
+    def _path(self, func, element):
+        digest = fingerprint(func, element)
+        if digest is None:
+            return None
+        return os.path.join(self._directory, digest)
+
+    def _get(self, key, func, element):
+        # Returns whether the element was a hit, its value, and the path it
+        # is persisted to (so that it's computed only once on a miss).
+        with self._lock:
+            entry = self._entries.get(key[0])
+            if entry is not None:
+                value, refs, _ = entry
+                if all(ref() is not None for ref in refs):
+                    self._entries.move_to_end(key[0])
+                    self.hits += 1
+                    return True, value, None
+        path = None
+        if self._directory is not None:
+            path = self._path(func, element)
+            if path is not None and os.path.exists(path):
+                from ..io_.serialization import deserialize
+
+                with open(path, "rb") as fo:
+                    type_id = fo.readline().decode().rstrip("\n")
+                    value = deserialize(
+                        fo.read(), type_id, allow_pickle=self._allow_pickle
+                    )
+                self._put(key, value)
+                with self._lock:
+                    self.hits += 1
+                return True, value, path
+        with self._lock:
+            self.misses += 1
+        return False, None, path
+
+    def _put(self, key, value):
+        nbytes = _nbytes(value)
+        with self._lock:
+            if key[0] in self._entries:
+                self._nbytes -= self._entries.pop(key[0])[2]
+            self._entries[key[0]] = (value, key[1], nbytes)
+            self._nbytes += nbytes
+            while self._entries and (
+                (self._maxsize is not None and len(self._entries) > self._maxsize)
+                or (self._maxbytes is not None and self._nbytes > self._maxbytes)
+            ):
+                _, (_, _, evicted_nbytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+
+    def _persist(self, path, value):
+        from ..io_.serialization import serialize
+
+        try:
+            bytes_, type_id = serialize(value, allow_pickle=self._allow_pickle)
+        except ValueError:
+            return
+        with open(path, "wb") as fo:
+            fo.write(type_id.encode() + b"\n")
+            fo.write(bytes_)
+
+    def clear(self):
+        """Remove every result kept in memory."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def map(self, engine, func, *iterables):
+        """
+        Map func over iterables with engine, reusing the cached result of
+        every element whose arguments were seen before. Only the remaining
+        elements are passed on to the engine.
+        """
+        elements = list(zip(*iterables))
+        results = [None] * len(elements)
+        pending = {}
+        for i, element in enumerate(elements):
+            key = self.key(func, element)
+            if key is None:
+                pending[("__unkeyable__", i)] = (None, [i], None)
+                continue
+            if key[0] in pending:
+                # identical elements within a call are computed only once
+                pending[key[0]][1].append(i)
+                with self._lock:
+                    self.misses += 1
+                continue
+            hit, value, path = self._get(key, func, element)
+            if hit:
+                results[i] = value
+            else:
+                pending[key[0]] = (key, [i], path)
+
+        if pending:
+            todo = [elements[positions[0]] for _, positions, _ in pending.values()]
+            computed = engine.__tapr_engine_map__(func, *zip(*todo))
+            for (key, positions, path), value in zip(pending.values(), computed):
+                for i in positions:
+                    results[i] = value
+                if key is None or is_error(value):
+                    continue
+                self._put(key, value)
+                if path is not None:
+                    self._persist(path, value)
+        return results
@@ -1,3 +1,5 @@
+import functools as ft
+import json
 import re
 from collections.abc import MutableMapping
 import itertools as it
@@ -19,20 +21,28 @@ from .utils import (
     concatenate_ntables,
     full,
     NULL,
-    NTableStopIteration,
+    basic_refmap,
     get_method_and_call,
     full_like,
+    is_typed,
+    fill_mapping,
+    iter_paths,
 )
 from .tabularization import tabularize
-from .engines import StandardEngine, ProcessEngine, ThreadEngine
+from .engines import StandardEngine
 from .handling import (
     handled_by,
+    handled,
     FunctionError,
     print_warning_return_function_error,
+    error_report,
 )
 from .structure import NTableStructure
+from . import profiling
 from .filtering import NTableFilter, contains, matches
 from .alchemy import NTableAlchemy, NTableMapAlchemy
+from .tracking import relayout, refresh
+from . import reduction
 
 
 class NTableMap(MutableMapping):
@@ -104,49 +114,63 @@ class NTableMap(MutableMapping):
         return str(self)
 
     def __getitem__(self, key):
-        return self._ntable.struct.loc[{self._dim: key}]
+        struct = self._ntable.struct
+        if isinstance(key, slice):
+            return struct.loc[{self._dim: key}]
+        if isinstance(key, (list, tuple, np.ndarray)):
+            return struct.take(struct.positions(self._dim, key), self._dim)
+        return struct.take(struct.label_index(self._dim).get_loc(key), self._dim)
 
     def __setitem__(self, key, value):
         if isinstance(key, list):
             if isinstance(value, NTable):
-                if len(key) != len(value.ntable_map(self._dim)):
+                value_labels = list(value.ntable_map(self._dim))
+                if len(key) != len(value_labels):
                     raise ValueError(
                         f"value.{self._dim} must have same length as key"
                     )
-                for k, v in zip(key, value.ntable_map(self.dim).values()):
-                    self[k] = v
-            else:
-                for k in key:
-                    self[k] = value
-        else:
-            try:
-                self._ntable.struct.loc[{self._dim: key}] = value
-            except KeyError:
-                sample_ntable = next(value for value in self.values())
-                sample_coords = xarray_coords_to_dict(
-                    sample_ntable.struct.coords
-                )
-                sample_coords[self._dim][0] = key
-                extension = full(
-                    NULL(), sample_coords, self._ntable.struct.dims
-                )
-                intermediate = concatenate_ntables(
-                    (self._ntable, extension), dim=self.dim
+                # line the labels of value up with key so that the whole
+                # assignment can be done in a single loc assignment
+                value = value.struct.relabel(
+                    **{self._dim: dict(zip(value_labels, key))}
                 )
-                intermediate.ntable_map(self.dim)[key] = value
-                self._ntable._reflist = intermediate.reflist
-                self._ntable._refmap = intermediate.refmap
+            new_keys = [k for k in key if k not in self]
+        else:
+            new_keys = [] if key in self else [key]
+        if new_keys:
+            self._extend(new_keys)
+        self._ntable.struct.loc[{self._dim: key}] = value
+
+    def _extend(self, keys):
+        # append NULL filled entries for every key in keys along dim, all
+        # with a single concatenation.
+        struct = self._ntable.struct
+        coords = {dim: struct.label_index(dim) for dim in struct.dims}
+        coords[self._dim] = keys
+        extension = full(NULL(), coords, struct.dims)
+        intermediate = concatenate_ntables(
+            (self._ntable, extension), dim=self._dim
+        )
+        self._ntable._reflist = intermediate.reflist
+        self._ntable._refmap = intermediate.refmap
+        self._ntable._shared_reflist = False
+        self._ntable._errors = None
+        relayout(self._ntable)
 
     def __delitem__(self, key):
         raise NotImplementedError
 
     def __iter__(self):
-        coords_dict = xarray_coords_to_dict(self._ntable.struct.coords)
-        return iter(coords_dict[self._dim])
+        return iter(self._ntable.struct.label_index(self._dim))
 
     def __len__(self):
-        coords_dict = xarray_coords_to_dict(self._ntable.struct.coords)
-        return len(coords_dict[self._dim])
+        return len(self._ntable.struct.label_index(self._dim))
+
+    def __contains__(self, key):
+        try:
+            return key in self._ntable.struct.label_index(self._dim)
+        except TypeError:
+            return False
 
     def contains(self, string):
         return self._ntable.filter[{self._dim: contains(string)}]
@@ -167,11 +191,22 @@ class TabularizedMethod:
         self._method_name = method_name
 
     def __call__(self,*args, **kwargs):
-        handled_ = handled_by(FunctionError)(get_method_and_call)
+        handled_ = handled(get_method_and_call)
         return tabularize(engine=self._ntbl.engine)(handled_)(self._ntbl, self._method_name, *args, **kwargs)
 
     def __str__(self):
-        method_name_ntbl = full_like(self._method_name, self._ntbl, lite=True)
+        # every element is the method name, so the refmap is a broadcast
+        # view of a single index rather than a full array
+        refmap = self._ntbl.refmap.copy(
+            data=np.broadcast_to(np.int64(0), self._ntbl.refmap.shape)
+        )
+        method_name_ntbl = NTable(
+            [self._method_name],
+            refmap,
+            self._ntbl.engine,
+            {str},
+            validate=False,
+        )
         return str(method_name_ntbl)
 
     def __repr__(self):
@@ -188,48 +223,62 @@ class TabularizedAttributes:
         super().__setattr__("_ntable", ntable)
 
     def __getattr__(self, attr):
-        handled_ = handled_by(FunctionError)(getattr)
+        handled_ = handled(getattr)
         return tabularize(engine=self._ntable.engine)(handled_)(
             self._ntable, attr
         )
 
     def __setattr__(self, attr, value):
-        handled_ = handled_by(FunctionError)(setattr)
+        handled_ = handled(setattr)
         tabularize(engine=self._ntable.engine)(handled_)(
             self._ntable, attr, value
         )
 
 
-def _next(iterator):
-    # this function exists to raise a different type of exception
-    # than StopIteration so that the tabularization proces doesn't
-    # continue after StopIteration is raised (since it wont be
-    # handled until the end of the end of the tabularized call) and
-    # issues arise when trying to complete the tabularized call.
-    # Throwing an error here prevents the process from finishing.
-    try:
-        next_item = next(iterator)
-        return next_item
-    except StopIteration:
-        raise NTableStopIteration
+class NTableIterator:
+    """
+    Iterates over the elements of a NTable object in lockstep: every step
+    advances the iterator of each element once, and iteration stops as soon
+    as any of them is exhausted.
 
+    The element iterators are kept in a flat list and advanced in a plain
+    loop. Each step either yields a NTable object, all of which share a
+    single refmap, or, if raw is True, an object ndarray shaped like the
+    NTable object.
 
-class _NTable_Iterator:
-    def __init__(self, ntbl):
-        self._ntbl = ntbl
+    Parameters
+    ----------
+    ntbl : NTable
+        The NTable object whose elements are iterated over.
+    raw : bool, optional
+        Whether or not to yield object ndarrays instead of NTable objects.
+        The default is False.
+
+    """
+
+    def __init__(self, ntbl, raw=False):
+        self._iterators = [iter(item) for item in ntbl.struct.flat]
+        self._shape = ntbl.refmap.shape
+        self._engine = ntbl.engine
+        self._raw = raw
+        self._refmap = None
+        if not raw:
+            self._refmap = basic_refmap(ntbl.refmap.coords, ntbl.refmap.dims)
+
+    def __iter__(self):
+        return self
+
+    def next_flat(self):
+        """Advance every element iterator once and return the list of results."""
+        return [next(iterator) for iterator in self._iterators]
 
     def __next__(self):
-        try:
-            if isinstance(self._ntbl.engine, ProcessEngine):
-                # if the engine is a ProcessEngine, then the StopIteration will
-                # be masked by the processes and cannot stop the iteration. As
-                # such, the tabularized next will be done with threads.
-                engine = ThreadEngine(self._ntbl.engine.processes)
-            else:
-                engine = self._ntbl.engine
-            return tabularize(engine=engine)(_next)(self._ntbl)
-        except NTableStopIteration:
-            raise StopIteration
+        flat = self.next_flat()
+        if self._raw:
+            array = np.empty(len(flat), dtype="object")
+            array[:] = flat
+            return array.reshape(self._shape)
+        return NTable(flat, self._refmap, self._engine, validate=False)
 
 
 class NTable(np.lib.mixins.NDArrayOperatorsMixin):
@@ -239,8 +288,11 @@ class NTable(np.lib.mixins.NDArrayOperatorsMixin):
 
     Parameters
     ----------
-    reflist : list
-        List containing the data to represent.
+    reflist : list or ndarray
+        List containing the data to represent. Data made up of numbers only
+        may be stored as a 1 dimensional ndarray (typed storage) instead,
+        which is turned into a list if an element that doesn't fit its dtype
+        is written to it.
     refmap : DataArray
         A dataarray whose elements correspond to indexes in the reflist.
         Describes the layout of the data.
@@ -272,18 +324,33 @@ class NTable(np.lib.mixins.NDArrayOperatorsMixin):
         if ttype is None:
             ttype = set()
         if validate:
-            validate_ntable_init(reflist, refmap, engine, ttype)
+            with profiling.stage("validation"):
+                validate_ntable_init(reflist, refmap, engine, ttype)
         if orig_ttype is None:
             # if ttype was originally None, needed to define it as
             # something that will pass the validation step. Once
             # passed, we can assign it types based on the contents
             # of the intended NTable
-            for item in (reflist[i] for i in refmap.values.flat):
-                ttype.add(type(item))
+            if is_typed(reflist):
+                ttype.add(reflist.dtype.type)
+            else:
+                for item in (reflist[i] for i in refmap.values.flat):
+                    ttype.add(type(item))
         self._reflist = reflist
         self._refmap = refmap
         self._engine = engine
         self._ttype = ttype
+        # set when the reflist is shared with a view (see NTableStructure)
+        # so that it gets copied before being written to.
+        self._shared_reflist = False
+        # (refmap, {dim: label index}) cache. See NTableStructure.label_index
+        self._label_indexes = (None, {})
+        # dependency tracking state. See tracking.py
+        self._writes = None
+        # reflist indices of the errors of a computed NTable object. See
+        # handling.error_report
+        self._errors = None
+        self._recipe = None
 
     @property
     def reflist(self):
@@ -375,33 +442,66 @@ class NTable(np.lib.mixins.NDArrayOperatorsMixin):
         return str(self)
 
     def __iter__(self):
-        ntable_of_iterators = tabularize(engine=self._engine)(iter)(self)
-        return _NTable_Iterator(ntable_of_iterators)
+        return NTableIterator(self)
 
     def __getitem__(self, index):
-        handled_ = handled_by(FunctionError)(op.getitem)
+        handled_ = handled(op.getitem)
         return tabularize(engine=self._engine)(handled_)(self, index)
 
     def __setitem__(self, index, value):
-        handled_ = handled_by(print_warning_return_function_error)(setitem)
+        handled_ = handled(
+            setitem, default=print_warning_return_function_error
+        )
         result = tabularize(engine=self._engine)(handled_)(self, index, value)
 
     def __call__(self, *args, **kwargs):
-        handled_ = handled_by(FunctionError)(call)
+        handled_ = handled(call)
         return tabularize(engine=self._engine)(handled_)(self, *args, **kwargs)
 
     def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
         ufunc = UFUNC_TO_OP.get(ufunc, ufunc)
-        handled_ = handled_by(FunctionError)(ufunc)
+        handled_ = handled(ufunc)
         return tabularize(engine=self._engine)(handled_)(*inputs, **kwargs)
 
     def __array_function__(self, func, types, args, kwargs):
-        handled_ = handled_by(FunctionError)(func)
+        handled_ = handled(func)
         return tabularize(engine=self._engine)(handled_)(*args, **kwargs)
 
     def item(self):
         return self.struct.item()
 
+    def error_report(self):
+        """
+        List the cells whose element is an error (a FunctionError or an
+        ErrorRecord). See tapr.main.handling.error_report.
+        """
+        return error_report(self)
+
+    def reduce(self, func, dim, ufunc=None):
+        """
+        Reduce the NTable object along a dimension by repeatedly combining
+        its elements with an associative binary function. See
+        tapr.main.reduction.reduce, which also provides reduce_sum,
+        reduce_min, reduce_max and concat helpers.
+        """
+        return reduction.reduce(self, func, dim, ufunc=ufunc)
+
+    def refresh(self):
+        """
+        Bring a NTable object returned by a tabularized function with
+        tracking enabled (see tabularize) up to date with its sources, by
+        recomputing only the elements that depend on source elements written
+        to since it was last computed. Tracked sources are refreshed first.
+        Does nothing for other NTable objects.
+
+        Returns
+        -------
+        NTable
+            The NTable object itself, updated in place.
+
+        """
+        return refresh(self)
+
     def ntable_map(self, dim):
         """
         Returns a ntable map object for the given dimension
@@ -449,23 +549,65 @@ class NTable(np.lib.mixins.NDArrayOperatorsMixin):
         """
         if into is None:
             into = {}
-        dim = self.struct.dims[0]
-        for k, v in self.ntable_map(dim).items():
-            if isinstance(v, NTable):
-                if v.struct.ndim > 0:
-                    if enforce_nested_typing:
-                        into[k] = type(into)()
-                    else:
-                        into[k] = {}
-                    v.to_dictionary(into[k])
-                else:
-                    into[k] = v.struct.item()
-            else:
-                into[k] = v
+        if enforce_nested_typing:
+            factory = type(into)
+        else:
+            factory = dict
+        labels = [self.struct.label_index(dim) for dim in self.struct.dims]
+        if not labels:
+            raise ValueError("Unable to convert 0 dimensional NTable to dictionary")
+        return fill_mapping(
+            into, self.refmap.values, labels, self.reflist, factory
+        )
 
-        return into
+    def to_paths(self):
+        """
+        Iterate over the cells of an NTable object, without building any
+        intermediate NTable or dictionary.
+
+        Yields
+        ------
+        tuple
+            The (path, element) pair of each cell, in C order, where path is
+            the tuple of the labels of the cell along each dimension.
 
-    def to_pandas(self, dtype="object"):
+        """
+        return iter_paths(self)
+
+    def to_json_lines(self, file=None, **kwargs):
+        """
+        Convert an NTable object into JSON lines, one line per cell. Every
+        line is the nested dictionary of a single cell, such as
+        {"x1": {"y1": 0}}, so that the lines can be read back with
+        tapr.main.conversion.ntable_from_stream.
+
+        Parameters
+        ----------
+        file : file-like, optional
+            A text file to write the lines to. If None, an iterator over the
+            lines is returned instead. The default is None.
+        **kwargs
+            Passed on to json.dumps (default, for example).
+
+        Returns
+        -------
+        Iterator of str or None
+            The lines (without trailing newlines) if file is None.
+
+        """
+        lines = (
+            json.dumps(
+                ft.reduce(lambda v, k: {k: v}, reversed(path), value),
+                **kwargs,
+            )
+            for path, value in iter_paths(self)
+        )
+        if file is None:
+            return lines
+        for line in lines:
+            file.write(line + "\n")
+
+    def to_pandas(self, dtype=None):
         """
         Convert an NTable object into a Pandas object
         (Series or DataFrame depending on the shape of the NTable object.)
@@ -473,8 +615,9 @@ class NTable(np.lib.mixins.NDArrayOperatorsMixin):
         Parameters
         ----------
         dtype : str, np.dtype, optional
-            Data type that the resulting Pandas object should be.
-            The default is "object".
+            Data type that the resulting Pandas object should be. If None,
+            NTable objects with typed storage keep their dtype and any other
+            NTable object is converted to "object". The default is None.
 
         Raises
         ------
@@ -494,15 +637,16 @@ class NTable(np.lib.mixins.NDArrayOperatorsMixin):
                 f"Unable to convert {self.struct.ndim} dimensional NTable to pandas object"
             )
 
-    def to_data_array(self, dtype="object"):
+    def to_data_array(self, dtype=None):
         """
         Convert an NTable object into a DataArray
 
         Parameters
         ----------
         dtype : str, np.dtype, optional
-            Data type that the resulting DataArray should be.
-            The default is "object".
+            Data type that the resulting DataArray should be. If None,
+            NTable objects with typed storage keep their dtype and any other
+            NTable object is converted to "object". The default is None.
 
         Returns
         -------
@@ -510,9 +654,13 @@ class NTable(np.lib.mixins.NDArrayOperatorsMixin):
             The resulting DataArray.
 
         """
-        array = np.empty(self.refmap.size, dtype="object")
-        array[:] = list(self.struct.flat)
-        array = array.reshape(self.refmap.shape)
-        return xr.DataArray(
-            array, self.refmap.coords, self.refmap.dims
-        ).astype(dtype)
+        if is_typed(self.reflist):
+            # a single take from the typed storage, without boxing elements
+            array = self.reflist[self.refmap.values]
+        else:
+            array = np.empty(self.refmap.size, dtype="object")
+            array[:] = list(self.struct.flat)
+            array = array.reshape(self.refmap.shape)
+        if dtype is not None:
+            array = array.astype(dtype, copy=False)
+        return xr.DataArray(array, self.refmap.coords, self.refmap.dims)
@@ -5,16 +5,25 @@ import xarray as xr
 
 from .utils import basic_refmap, full, full_lite, handle_improper_broadcast
 from .engines import StandardEngine
+from .handling import error_indices, cell_labels, current_policy, ErrorRecord
+from . import profiling
 
 
 def broadcast_tables(*args, lite=False):
     from .ntable import NTable
 
     ntbls = [arg for arg in args if isinstance(arg, NTable)]
-    nons = [arg for arg in args if not isinstance(arg, NTable)]
     # ensure there is at least one ntable object
     if len(ntbls) == 0:
         raise ValueError("args must contain at least one NTable object")
+    with profiling.stage("broadcast_tables"):
+        return _broadcast_tables(args, ntbls, lite)
+
+
+def _broadcast_tables(args, ntbls, lite):
+    from .ntable import NTable
+
+    nons = [arg for arg in args if not isinstance(arg, NTable)]
 
     dmaps = [ntbl.refmap for ntbl in ntbls]
     dlists = [ntbl.reflist for ntbl in ntbls]
@@ -30,6 +39,13 @@ def broadcast_tables(*args, lite=False):
             # took place. Try handling it.
             dlist, dmap = handle_improper_broadcast(dlist, dmap)
             new_ntbls.append(NTable(dlist, dmap, engine, ttype))
+    for ntbl, new_ntbl in zip(ntbls, new_ntbls):
+        # broadcast tables are only read from, so only they are marked as
+        # sharing the reflist of their input, and writing to the input later
+        # on doesn't copy its reflist
+        if new_ntbl.reflist is ntbl.reflist:
+            new_ntbl._shared_reflist = True
+            new_ntbl._errors = ntbl._errors
 
     if lite:
         non_ntbls = [
@@ -52,7 +68,7 @@ def broadcast_tables(*args, lite=False):
     return result
 
 
-def tabular_map(func_engine, *ntable_args):
+def tabular_map(func_engine, *ntable_args, cache=None, checkpoint=None):
     from .ntable import NTable
 
     if isinstance(func_engine, tuple):
@@ -61,11 +77,39 @@ def tabular_map(func_engine, *ntable_args):
     else:
         func = func_engine
         engine = StandardEngine()
-    new_reflist = list(
-        engine.__tapr_engine_map__(func, *(ntbl.struct.flat for ntbl in ntable_args))
-    )
-    new_refmap = basic_refmap(
-        ntable_args[0].refmap.coords, ntable_args[0].refmap.dims
-    )
-    result_engine = ntable_args[0].engine
-    return NTable(new_reflist, new_refmap, result_engine)
+    flats = (ntbl.struct.flat for ntbl in ntable_args)
+    profiler = profiling.active()
+    with profiling.stage("engine"):
+        if checkpoint is not None:
+            # cells are checkpointed by their labels
+            positions = np.arange(ntable_args[0].refmap.size)
+            labels = cell_labels(ntable_args[0], positions)
+            new_reflist = checkpoint.map(
+                engine, func, labels, *flats, cache=cache
+            )
+        elif cache is not None:
+            new_reflist = cache.map(engine, func, *flats)
+        elif profiler is not None:
+            new_reflist = profiler.unwrap(
+                engine.__tapr_engine_map__(profiling.profiled(func), *flats)
+            )
+        else:
+            new_reflist = list(engine.__tapr_engine_map__(func, *flats))
+    with profiling.stage("assembly"):
+        new_refmap = basic_refmap(
+            ntable_args[0].refmap.coords, ntable_args[0].refmap.dims
+        )
+        result_engine = ntable_args[0].engine
+        result = NTable(new_reflist, new_refmap, result_engine)
+        if current_policy() == "record":
+            # error records get the labels of their cell. Other error
+            # indices are only looked for by error_report. The refmap is
+            # basic, so reflist indices are flat positions
+            result._errors = error_indices(new_reflist)
+            dims = new_refmap.dims
+            for i, labels in zip(
+                result._errors, cell_labels(result, result._errors)
+            ):
+                if isinstance(new_reflist[i], ErrorRecord):
+                    new_reflist[i].coords = dict(zip(dims, labels))
+    return result
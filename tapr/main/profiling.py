@@ -0,0 +1,300 @@
+import atexit
+import contextvars
+import os
+import sys
+import threading
+import time
+
+
+# the profiler stages are recorded to, if any. A context variable, so that
+# profiling a thread (or an asyncio task) doesn't record the stages of
+# another one
+_ACTIVE = contextvars.ContextVar("tapr_profiler", default=None)
+
+
+class _StageStats:
+    __slots__ = ("calls", "wall", "self_wall", "cpu", "self_cpu", "blocks")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.self_wall = 0.0
+        self.cpu = 0.0
+        self.self_cpu = 0.0
+        self.blocks = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _NullStage:
+    # what stage returns when nothing is being profiled
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("_profiler", "_name", "_start", "_children")
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._profiler._stack().append(self)
+        self._children = [0.0, 0.0]
+        self._start = (
+            time.perf_counter(),
+            time.thread_time(),
+            sys.getallocatedblocks(),
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self._start[0]
+        cpu = time.thread_time() - self._start[1]
+        blocks = sys.getallocatedblocks() - self._start[2]
+        stack = self._profiler._stack()
+        stack.pop()
+        if stack:
+            stack[-1]._children[0] += wall
+            stack[-1]._children[1] += cpu
+        self._profiler.record(
+            self._name,
+            wall,
+            cpu,
+            blocks,
+            wall - self._children[0],
+            cpu - self._children[1],
+        )
+        return False
+
+
+class _ProfiledResult:
+    __slots__ = ("value", "wall", "cpu")
+
+    def __init__(self, value, wall, cpu):
+        self.value = value
+        self.wall = wall
+        self.cpu = cpu
+
+
+def peel(result):
+    """The result of an element function, whether it was profiled or not."""
+    if type(result) is _ProfiledResult:
+        return result.value
+    return result
+
+
+class _Profiled:
+    # Calls func and returns its result along with the wall and CPU time it
+    # took, measured in the worker so that the element function is profiled
+    # whatever the engine. Allocated blocks aren't counted, as
+    # sys.getallocatedblocks is too costly to call for every element.
+
+    __slots__ = ("_func",)
+
+    def __init__(self, func):
+        self._func = func
+
+    def __getstate__(self):
+        return (self._func,)
+
+    def __setstate__(self, state):
+        (self._func,) = state
+
+    def __call__(self, *args):
+        cpu = time.thread_time()
+        wall = time.perf_counter()
+        result = self._func(*args)
+        return _ProfiledResult(
+            result, time.perf_counter() - wall, time.thread_time() - cpu
+        )
+
+
+class Profiler:
+    """
+    Records the time spent in, and the memory blocks allocated by, the
+    stages of the tabularization pipeline while it is active (see profile):
+
+    - tabulate: turning the arguments of a tabularized call into NTables
+    - broadcast_tables: broadcasting NTables against each other
+    - validation: validating the reflist and refmap of new NTables
+    - engine: mapping the function over the elements with the engine
+    - function: the element function itself, measured in the workers of the
+      engine (and therefore only when no cache or checkpoint is used), and
+      without counting allocated blocks
+    - assembly: turning the mapped elements into the resulting NTable
+
+    Stages nest (tabulate broadcasts tables, for example), so besides the
+    total wall and CPU time of every stage, its self time (without nested
+    stages) is recorded as well. CPU time is that of the thread the stage
+    ran in, and blocks is the net change of sys.getallocatedblocks.
+
+    A profiler is only active in the context (thread or asyncio task) that
+    entered it, so concurrent profilers don't record each other's stages.
+    The function stage is still recorded whatever thread the engine runs
+    elements in.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _tokens(self):
+        # the context variable tokens of the with blocks of the thread
+        try:
+            return self._local.tokens
+        except AttributeError:
+            self._local.tokens = []
+            return self._local.tokens
+
+    def stage(self, name):
+        """A context manager recording the time spent in a stage."""
+        return _Stage(self, name)
+
+    def record(self, name, wall, cpu, blocks, self_wall=None, self_cpu=None):
+        """Record a call to a stage."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _StageStats()
+            stats.calls += 1
+            stats.wall += wall
+            stats.cpu += cpu
+            stats.blocks += blocks
+            stats.self_wall += wall if self_wall is None else self_wall
+            stats.self_cpu += cpu if self_cpu is None else self_cpu
+
+    @property
+    def stats(self):
+        """The stats of every stage, as a dictionary of dictionaries."""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    def unwrap(self, results):
+        """
+        Record the costs of the results of a profiled element function as
+        the function stage, and return the bare results.
+        """
+        values = []
+        for result in results:
+            if type(result) is _ProfiledResult:
+                self.record("function", result.wall, result.cpu, 0)
+                result = result.value
+            values.append(result)
+        return values
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def report(self):
+        """A table of the stats of every stage, slowest (self time) first."""
+        stats = sorted(
+            self.stats.items(), key=lambda item: item[1]["self_wall"], reverse=True
+        )
+        total = sum(s["self_wall"] for name, s in stats if name != "function")
+        lines = [
+            f"{'stage':<18}{'calls':>8}{'wall':>11}{'self':>11}{'self %':>8}"
+            f"{'cpu':>11}{'self cpu':>11}{'blocks':>10}"
+        ]
+        for name, s in stats:
+            share = (
+                f"{100 * s['self_wall'] / total:>7.1f}%"
+                if total and name != "function"
+                else f"{'-':>8}"
+            )
+            lines.append(
+                f"{name:<18}{s['calls']:>8}{s['wall']:>10.4f}s"
+                f"{s['self_wall']:>10.4f}s{share}{s['cpu']:>10.4f}s"
+                f"{s['self_cpu']:>10.4f}s{s['blocks']:>10}"
+            )
+        return "\n".join(lines)
+
+    def __enter__(self):
+        self._tokens().append(_ACTIVE.set(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        _ACTIVE.reset(self._tokens().pop())
+        return False
+
+    def __str__(self):
+        return self.report()
+
+    def __repr__(self):
+        return str(self)
+
+
+def profile():
+    """
+    Profile the tabularization pipeline within a with block.
+
+    Examples
+    --------
+    >>> with profile() as profiler:
+    ...     result = ntbl_a + ntbl_b
+    >>> print(profiler.report())
+
+    Profiling can also be enabled for a whole run by setting the TAPR_PROFILE
+    environment variable (to anything but 0), in which case the report is
+    written to stderr when the interpreter exits.
+
+    Returns
+    -------
+    Profiler
+
+    """
+    return Profiler()
+
+
+def stage(name):
+    """
+    A context manager recording the time spent in a stage of the active
+    profiler, which does nothing when nothing is being profiled.
+    """
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name)
+
+
+def active():
+    """The active profiler, or None if nothing is being profiled."""
+    return _ACTIVE.get()
+
+
+def profiled(func):
+    """
+    Wrap an element function so that it reports its own cost along with its
+    result (see Profiler.unwrap).
+    """
+    return _Profiled(func)
+
+
+def _report_at_exit(profiler):
+    sys.stderr.write(f"tapr profile\n{profiler.report()}\n")
+
+
+if os.environ.get("TAPR_PROFILE", "0") not in ("", "0"):
+    # a new default, so that every thread records to this profiler
+    _ACTIVE = contextvars.ContextVar("tapr_profiler", default=Profiler())
+    atexit.register(_report_at_exit, _ACTIVE.get())
@@ -0,0 +1,330 @@
+import logging
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+SUBMITTED = "submitted"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class ProgressEvent:
+    """
+    An event emitted by an engine while it maps a function.
+
+    Attributes
+    ----------
+    kind : str
+        "submitted" when an element is handed to a worker, "completed" when
+        its result is available, or "failed" when its result is an error
+        (see tapr.main.handling.is_error), a raised exception, or when it
+        timed out or was cancelled.
+    index : int
+        The position of the element within the map. For a tabularized call
+        without a cache or checkpoint, it is the flat position of the cell.
+    total : int
+        The number of elements of the map.
+    done : int
+        The number of elements that completed or failed so far.
+    failed : int
+        The number of elements that failed so far.
+    elapsed : float
+        Seconds since the map started.
+    duration : float or None
+        Seconds the element took in its worker, retries included. None for
+        submitted events and for elements that didn't finish in their
+        worker.
+
+    """
+
+    __slots__ = ("kind", "index", "total", "done", "failed", "elapsed", "duration")
+
+    def __init__(self, kind, index, total, done, failed, elapsed, duration=None):
+        self.kind = kind
+        self.index = index
+        self.total = total
+        self.done = done
+        self.failed = failed
+        self.elapsed = elapsed
+        self.duration = duration
+
+    @property
+    def fraction(self):
+        """The fraction of the elements that completed or failed so far."""
+        return self.done / self.total if self.total else 1.0
+
+    def __str__(self):
+        return (
+            f"ProgressEvent({self.kind}, index={self.index}, "
+            f"{self.done}/{self.total} done, {self.failed} failed, "
+            f"elapsed={self.elapsed:.3f}s)"
+        )
+
+    def __repr__(self):
+        return str(self)
+
+
+class _Timed:
+    # Calls func and returns its result along with the seconds it took, so
+    # that durations are measured in the worker, whatever the engine.
+
+    __slots__ = ("_func",)
+
+    def __init__(self, func):
+        self._func = func
+
+    def __getstate__(self):
+        return (self._func,)
+
+    def __setstate__(self, state):
+        (self._func,) = state
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        result = self._func(*args)
+        return result, time.perf_counter() - start
+
+
+class _Reporter:
+    # Turns what an engine observes into events for its progress callbacks.
+    # Results may be reported from worker threads, and only the first report
+    # of an element counts.
+
+    def __init__(self, callbacks, total):
+        if callable(callbacks):
+            callbacks = (callbacks,)
+        self._callbacks = tuple(callbacks)
+        self._total = total
+        self._done = 0
+        self._failed = 0
+        self._finished = np.zeros(total, dtype=bool)
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def _emit(self, event):
+        for callback in self._callbacks:
+            callback(event)
+
+    def submitted(self, index):
+        with self._lock:
+            event = ProgressEvent(
+                SUBMITTED,
+                index,
+                self._total,
+                self._done,
+                self._failed,
+                time.monotonic() - self._start,
+            )
+            self._emit(event)
+
+    def finished(self, index, value, duration=None):
+        from .handling import is_error
+        from .profiling import peel
+
+        value = peel(value)
+        failed = isinstance(value, BaseException) or is_error(value)
+        with self._lock:
+            if self._finished[index]:
+                return
+            self._finished[index] = True
+            self._done += 1
+            self._failed += failed
+            event = ProgressEvent(
+                FAILED if failed else COMPLETED,
+                index,
+                self._total,
+                self._done,
+                self._failed,
+                time.monotonic() - self._start,
+                duration,
+            )
+            self._emit(event)
+
+
+def _format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes:02}:{seconds:02}"
+
+
+class TextProgressBar:
+    """
+    Progress callback that draws a text progress bar, along with the number
+    of failed elements, the elapsed time and an estimate of the remaining
+    time.
+
+    Parameters
+    ----------
+    file : file-like, optional
+        Where the bar is drawn. If None, sys.stderr is used. The default is
+        None.
+    width : int, optional
+        The number of characters of the bar itself. The default is 40.
+    interval : float, optional
+        Minimum number of seconds between two redraws. The bar is always
+        redrawn when the map finishes. The default is 0.1.
+
+    """
+
+    def __init__(self, file=None, width=40, interval=0.1):
+        self._file = file
+        self._width = width
+        self._interval = interval
+        self._drawn = None
+
+    def __call__(self, event):
+        if event.kind == SUBMITTED:
+            return
+        finished = event.done == event.total
+        if self._drawn is not None and event.elapsed < self._drawn:
+            # a new map started
+            self._drawn = None
+        if (
+            not finished
+            and self._drawn is not None
+            and event.elapsed - self._drawn < self._interval
+        ):
+            return
+        self._drawn = event.elapsed
+        file = sys.stderr if self._file is None else self._file
+        filled = int(self._width * event.fraction)
+        bar = "#" * filled + "-" * (self._width - filled)
+        if event.done:
+            remaining = event.elapsed / event.done * (event.total - event.done)
+            eta = _format_seconds(remaining)
+        else:
+            eta = "?"
+        file.write(
+            f"\r[{bar}] {event.done}/{event.total} ({event.fraction:.0%})"
+            f" {event.failed} failed {_format_seconds(event.elapsed)}<{eta}"
+        )
+        if finished:
+            file.write("\n")
+        file.flush()
+
+
+class LoggingProgress:
+    """
+    Progress callback that logs the progress of maps.
+
+    Parameters
+    ----------
+    logger : logging.Logger, optional
+        The logger used. If None, the "tapr" logger is used. The default is
+        None.
+    level : int, optional
+        The level of the progress messages. Failed elements are logged at
+        level WARNING. The default is logging.INFO.
+    step : float, optional
+        Progress is logged every time another step (fraction) of the
+        elements is done. The default is 0.1.
+
+    """
+
+    def __init__(self, logger=None, level=logging.INFO, step=0.1):
+        self._logger = logging.getLogger("tapr") if logger is None else logger
+        self._level = level
+        self._step = step
+        self._logged = 0
+
+    def __call__(self, event):
+        if event.kind == SUBMITTED:
+            return
+        if event.kind == FAILED:
+            self._logger.warning(
+                "element %s of %s failed", event.index, event.total
+            )
+        if event.done == 1:
+            self._logged = 0
+        steps = int(event.fraction / self._step)
+        if steps > self._logged or event.done == event.total:
+            self._logged = steps
+            self._logger.log(
+                self._level,
+                "%s/%s elements done (%.0f%%), %s failed, %.1fs elapsed",
+                event.done,
+                event.total,
+                100 * event.fraction,
+                event.failed,
+                event.elapsed,
+            )
+
+
+class ProgressStats:
+    """
+    Progress callback that collects throughput metrics and the duration of
+    every element, for example to find the slow outliers of a map. Stats are
+    reset whenever a new map starts.
+    """
+
+    def __init__(self):
+        self._reset(0)
+
+    def _reset(self, total):
+        self.total = total
+        self.submitted = 0
+        self.done = 0
+        self.failed = 0
+        self.elapsed = 0.0
+        self._indices = []
+        self._durations = []
+
+    def __call__(self, event):
+        if event.kind == SUBMITTED:
+            if event.done == 0 and event.index == 0:
+                self._reset(event.total)
+            self.submitted += 1
+            return
+        self.done = event.done
+        self.failed = event.failed
+        self.elapsed = event.elapsed
+        if event.duration is not None:
+            self._indices.append(event.index)
+            self._durations.append(event.duration)
+
+    @property
+    def durations(self):
+        """The duration of every element that finished in its worker, by index."""
+        return dict(zip(self._indices, self._durations))
+
+    @property
+    def throughput(self):
+        """Elements done per second."""
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def histogram(self, bins=10):
+        """
+        The histogram of the durations of the elements, as returned by
+        numpy.histogram.
+        """
+        return np.histogram(np.asarray(self._durations, dtype=float), bins=bins)
+
+    def slowest(self, n=5, ntbl=None):
+        """
+        The n slowest elements, as (index, duration) pairs in decreasing
+        order of duration. If ntbl (the NTable that was computed) is given,
+        elements are identified by the tuple of labels of their cell instead.
+        """
+        durations = np.asarray(self._durations, dtype=float)
+        order = np.argsort(-durations, kind="stable")[:n]
+        indices = [self._indices[i] for i in order]
+        if ntbl is not None:
+            from .handling import cell_labels
+
+            indices = cell_labels(ntbl, np.asarray(indices, dtype="int64"))
+        return list(zip(indices, durations[order].tolist()))
+
+    def __str__(self):
+        return (
+            f"ProgressStats\nDone: {self.done}/{self.total}\n"
+            f"Failed: {self.failed}\nElapsed: {self.elapsed:.3f}s\n"
+            f"Throughput: {self.throughput:.1f}/s"
+        )
+
+    def __repr__(self):
+        return str(self)
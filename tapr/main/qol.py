@@ -4,10 +4,11 @@ import numpy as np
 
 from .ntable import NTable
 from .tabularization import tabularize
-from .utils import full, NULL, default_refmap, xarray_coords_to_dict, basic_refmap
+from .sparse import SparseNTable
+from .utils import full, NULL, default_refmap, default_coords, xarray_coords_to_dict, basic_refmap
 
 
-def blank(coords, dims, engine=None, ttype=None):
+def blank(coords, dims, engine=None, ttype=None, sparse=False):
     """
     Creates an NTable with given coordinates and dimensions
     whose elements are all NULL()
@@ -22,16 +23,21 @@ def blank(coords, dims, engine=None, ttype=None):
         The engine for the resulting NTable to use. Default is None.
     ttype:
         The ttype for the resulting NTable to use. Default is None.
+    sparse:
+        Whether or not to create a SparseNTable, which doesn't store its
+        NULL elements. Default is False.
 
     Returns
     -------
     ntable (NTable): The desired NTable
 
     """
+    if sparse:
+        return SparseNTable([], [], coords, dims, engine=engine, ttype=ttype)
     return full(NULL(), coords=coords, dims=dims, engine=engine, ttype=ttype)
 
 
-def sblank(*shape, engine=None, ttype=None):
+def sblank(*shape, engine=None, ttype=None, sparse=False):
     """
     Similar to blank, but based on a given shape instead of
     coordinates and dimensions.
@@ -44,12 +50,18 @@ def sblank(*shape, engine=None, ttype=None):
         The engine for the resulting NTable to use. Default is None.
     ttype:
         The ttype for the resulting NTable to use. Default is None.
+    sparse:
+        Whether or not to create a SparseNTable, which doesn't store its
+        NULL elements. Default is False.
 
     Returns
     -------
     ntable (NTable): The desired NTable
 
     """
+    if sparse:
+        coords, dims = default_coords(*shape)
+        return SparseNTable([], [], coords, dims, engine=engine, ttype=ttype)
     total_size = 1
     for size in shape:
         total_size *= size
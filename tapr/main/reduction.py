@@ -0,0 +1,138 @@
+import operator as op
+
+import numpy as np
+
+from .handling import handled
+from .utils import basic_refmap
+
+
+def _rows(ntbl, dim):
+    # reflist indexes of the NTable object, one row per label along dim
+    if dim not in ntbl.struct.dims:
+        raise ValueError(f"{dim} dimension does not exist")
+    other_dims = tuple(d for d in ntbl.struct.dims if d != dim)
+    refmap = ntbl.refmap.transpose(dim, *other_dims)
+    return refmap.values.reshape(refmap.shape[0], -1), other_dims
+
+
+def _numeric_reduce(ntbl, rows, ufunc):
+    # vectorized path for NTable objects of plain numbers. Returns None if
+    # the elements aren't numbers.
+    reflist = ntbl.reflist
+    if isinstance(reflist, np.ndarray):
+        array = reflist[rows]
+    else:
+        try:
+            array = np.array([reflist[i] for i in rows.flat])
+        except ValueError:
+            return None
+        if array.dtype.kind in "biu":
+            # python ints (and bools) are reduced as python objects, since
+            # they would overflow (or saturate) as numpy integers
+            array = array.astype(object)
+        elif array.dtype.kind not in "fc":
+            return None
+    if array.dtype.kind not in "biufcO" or array.size != rows.size:
+        return None
+    return list(ufunc.reduce(array.reshape(rows.shape), axis=0))
+
+
+def _tree_reduce(ntbl, rows, func):
+    # Pairwise tree reduction. Every level combines adjacent rows in a
+    # single engine map, so the reduction takes log2(len(rows)) maps.
+    reflist = ntbl.reflist
+    handled_ = handled(func)
+    level = [[reflist[i] for i in row] for row in rows]
+    width = rows.shape[1]
+    while len(level) > 1:
+        pairs = len(level) // 2
+        left = [item for row in level[0 : 2 * pairs : 2] for item in row]
+        right = [item for row in level[1 : 2 * pairs : 2] for item in row]
+        combined = list(ntbl.engine.__tapr_engine_map__(handled_, left, right))
+        next_level = [
+            combined[i * width : (i + 1) * width] for i in range(pairs)
+        ]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0]
+
+
+def reduce(ntbl, func, dim, ufunc=None):
+    """
+    Reduce a NTable object along a dimension by repeatedly combining its
+    elements with a binary function.
+
+    The reduction is done as a tree: adjacent elements along dim are
+    combined pairwise, level by level, with each level mapped over all of
+    its pairs at once by the engine of the NTable object. func must therefore
+    be associative (it doesn't need to be commutative, the order of the
+    elements is preserved).
+
+    Parameters
+    ----------
+    ntbl : NTable
+        The NTable object to reduce.
+    func : callable
+        The binary function used to combine elements.
+    dim : str
+        The dimension to reduce along.
+    ufunc : numpy.ufunc, optional
+        A numpy ufunc equivalent to func. If given and every element is a
+        plain number, the reduction is done with ufunc.reduce instead.
+
+    Returns
+    -------
+    NTable or object
+        The reduced NTable object, without dim. If dim was the only
+        dimension, the reduced element itself.
+
+    """
+    from .ntable import NTable
+
+    rows, other_dims = _rows(ntbl, dim)
+    if len(rows) == 0:
+        raise ValueError(f"Unable to reduce along empty dimension {dim}")
+    if ufunc is None and isinstance(func, np.ufunc):
+        ufunc = func
+    reduced = None
+    if ufunc is not None:
+        reduced = _numeric_reduce(ntbl, rows, ufunc)
+    if reduced is None:
+        reduced = _tree_reduce(ntbl, rows, func)
+
+    if not other_dims:
+        return reduced[0]
+    refmap = basic_refmap(
+        {d: ntbl.struct.label_index(d) for d in other_dims}, other_dims
+    )
+    return NTable(reduced, refmap, engine=ntbl.engine, validate=False)
+
+
+def _concat(left, right):
+    if isinstance(left, np.ndarray):
+        return np.concatenate((left, right))
+    return left + right
+
+
+def reduce_sum(ntbl, dim):
+    """Sum the elements of a NTable object along a dimension."""
+    return reduce(ntbl, op.add, dim, ufunc=np.add)
+
+
+def reduce_min(ntbl, dim):
+    """The smallest element of a NTable object along a dimension."""
+    return reduce(ntbl, min, dim, ufunc=np.minimum)
+
+
+def reduce_max(ntbl, dim):
+    """The largest element of a NTable object along a dimension."""
+    return reduce(ntbl, max, dim, ufunc=np.maximum)
+
+
+def concat(ntbl, dim):
+    """
+    Concatenate the elements (sequences or numpy arrays) of a NTable object
+    along a dimension.
+    """
+    return reduce(ntbl, _concat, dim)
@@ -0,0 +1,284 @@
+import itertools as it
+
+import numpy as np
+import pandas as pd
+
+from .defs import UFUNC_TO_OP
+from .engines import StandardEngine
+from .handling import handled
+from .utils import NULL, basic_refmap
+
+
+class SparseNTable(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    A NTable object whose cells are mostly NULL. Only the populated cells
+    are stored, as their flat (C order) positions plus their elements. Every
+    other cell is implicitly NULL.
+
+    Tabularized functions called with SparseNTable objects only visit the
+    cells populated in all of them, assuming (like the operators of NULL)
+    that the result of any cell with a NULL argument is NULL. Convert to a
+    regular NTable object with to_dense.
+
+    Parameters
+    ----------
+    reflist : list
+        The elements of the populated cells.
+    positions : Sequence of int
+        The flat positions of the populated cells, in the same order as
+        reflist. Must be sorted and unique.
+    coords : dict
+        The labels of each dimension.
+    dims : Sequence of str
+        The dimensions.
+    engine : Engine, optional
+        The engine to be used when doing computations. If None, a standard
+        serial engine will be used. The default is None.
+    ttype : set, optional
+        Set of the types of the elements. If None, it is inferred from
+        reflist. The default is None.
+
+    """
+
+    def __init__(
+        self, reflist, positions, coords, dims, engine=None, ttype=None
+    ):
+        self._reflist = list(reflist)
+        self._positions = np.asarray(positions, dtype="int64")
+        self._dims = tuple(dims)
+        self._indexes = {dim: pd.Index(coords[dim]) for dim in self._dims}
+        if len(self._positions) != len(self._reflist):
+            raise ValueError(
+                "positions and reflist must have the same length"
+            )
+        if len(self._positions) and (
+            self._positions[0] < 0 or self._positions[-1] >= self.size
+        ):
+            raise ValueError("positions are out of bounds")
+        if np.any(np.diff(self._positions) <= 0):
+            raise ValueError("positions must be sorted and unique")
+        self._engine = StandardEngine() if engine is None else engine
+        if ttype is None:
+            ttype = {type(item) for item in self._reflist}
+        self._ttype = set(ttype)
+
+    @classmethod
+    def from_ntable(cls, ntbl):
+        """Create a SparseNTable object from the non-NULL cells of ntbl."""
+        null = NULL()
+        refs = ntbl.refmap.values.ravel()
+        is_null = np.fromiter(
+            (item is null for item in ntbl.reflist),
+            dtype=bool,
+            count=len(ntbl.reflist),
+        )
+        positions = np.flatnonzero(~is_null[refs])
+        reflist = [ntbl.reflist[i] for i in refs[positions]]
+        return cls(
+            reflist,
+            positions,
+            {dim: ntbl.struct.label_index(dim) for dim in ntbl.struct.dims},
+            ntbl.struct.dims,
+            engine=ntbl.engine,
+        )
+
+    @property
+    def reflist(self):
+        return self._reflist
+
+    @property
+    def positions(self):
+        return self._positions
+
+    @property
+    def dims(self):
+        return self._dims
+
+    @property
+    def coords(self):
+        return dict(self._indexes)
+
+    @property
+    def shape(self):
+        return tuple(len(self._indexes[dim]) for dim in self._dims)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape, dtype="int64"))
+
+    @property
+    def nnz(self):
+        """The number of populated cells."""
+        return len(self._positions)
+
+    @property
+    def density(self):
+        """The fraction of cells that are populated."""
+        return self.nnz / self.size if self.size else 0.0
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @engine.setter
+    def engine(self, value):
+        self._engine = value
+
+    @property
+    def ttype(self):
+        return self._ttype
+
+    def label_index(self, dim):
+        return self._indexes[dim]
+
+    def same_layout(self, other):
+        """Whether or not other has the same dims and labels."""
+        return self._dims == other.dims and all(
+            self._indexes[dim].equals(other.label_index(dim))
+            for dim in self._dims
+        )
+
+    def items(self):
+        """Iterate over the (labels, element) pairs of the populated cells."""
+        if not self.nnz:
+            return
+        multi_index = np.unravel_index(self._positions, self.shape)
+        labels = [
+            self._indexes[dim][positions]
+            for dim, positions in zip(self._dims, multi_index)
+        ]
+        yield from zip(zip(*labels), self._reflist)
+
+    def to_dense(self):
+        """
+        Convert to a regular NTable object, where every cell that isn't
+        populated refers to a single NULL element.
+        """
+        from .ntable import NTable
+
+        refmap = basic_refmap(self._indexes, self._dims)
+        refs = np.full(self.size, self.nnz, dtype="int64")
+        refs[self._positions] = np.arange(self.nnz)
+        refmap.values[...] = refs.reshape(self.shape)
+        ttype = set(self._ttype)
+        if self.nnz < self.size:
+            ttype.add(NULL)
+        return NTable(
+            self._reflist + [NULL()],
+            refmap,
+            engine=self._engine,
+            ttype=ttype,
+            validate=False,
+        )
+
+    def __str__(self):
+        dims = ", ".join(
+            f"{dim}: {size}" for dim, size in zip(self._dims, self.shape)
+        )
+        return f"SparseNTable\nDims: ({dims})\nPopulated: {self.nnz} ({self.density:.2%})"
+
+    def __repr__(self):
+        return str(self)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        from .tabularization import tabularize
+
+        ufunc = UFUNC_TO_OP.get(ufunc, ufunc)
+        handled_ = handled(ufunc)
+        return tabularize(engine=self._engine)(handled_)(*inputs, **kwargs)
+
+
+def sparse_call(tabularized, args, kwargs):
+    """
+    Call a tabularized function on arguments containing SparseNTable
+    objects, visiting only the cells populated in all of them. Results that
+    are NULL are left out of the result.
+    """
+    from .ntable import NTable
+
+    sparse = [
+        arg
+        for arg in it.chain(args, kwargs.values())
+        if isinstance(arg, SparseNTable)
+    ]
+    if any(isinstance(arg, NTable) for arg in it.chain(args, kwargs.values())):
+        raise TypeError(
+            "Unable to mix SparseNTable and NTable objects, use to_dense"
+        )
+    first = sparse[0]
+    for other in sparse[1:]:
+        if not first.same_layout(other):
+            raise ValueError(
+                "SparseNTable objects must have the same dims and labels"
+            )
+
+    # the cells populated in every SparseNTable object, and where each of
+    # them is in the reflist of every SparseNTable object
+    positions = first.positions
+    for other in sparse[1:]:
+        positions = np.intersect1d(positions, other.positions, assume_unique=True)
+    refs = {
+        id(sp): np.searchsorted(sp.positions, positions) for sp in sparse
+    }
+
+    def values(arg):
+        if isinstance(arg, SparseNTable):
+            return [arg.reflist[i] for i in refs[id(arg)]]
+        return it.repeat(arg, len(positions))
+
+    arg_values = [values(arg) for arg in args]
+    kwarg_values = [values(arg) for arg in kwargs.values()]
+    cell_args = (
+        [tuple(cell) for cell in zip(*arg_values)]
+        if args
+        else [()] * len(positions)
+    )
+    cell_kwargs = (
+        [dict(zip(kwargs, cell)) for cell in zip(*kwarg_values)]
+        if kwargs
+        else [{}] * len(positions)
+    )
+    results = list(
+        tabularized._map(
+            it.repeat(tabularized._func, len(positions)), cell_args, cell_kwargs
+        )
+    )
+
+    null = NULL()
+    keep = np.fromiter(
+        (result is not null for result in results),
+        dtype=bool,
+        count=len(results),
+    )
+    return SparseNTable(
+        [result for result, kept in zip(results, keep) if kept],
+        positions[keep],
+        first.coords,
+        first.dims,
+        engine=first.engine,
+    )
+
+
+def walker_to_sparse_ntable(walker, dims=None, engine=None, ttype=None):
+    """
+    Create a SparseNTable object from the cells collected by a mapping
+    walker (see tapr.main.conversion), without ever building the dense
+    layout. Cells that weren't populated are NULL.
+    """
+    positions = []
+    reflist = []
+    for position, value in walker.cells():
+        if value is not NULL():
+            positions.append(position)
+            reflist.append(value)
+    positions = np.asarray(positions, dtype="int64")
+    order = np.argsort(positions, kind="stable")
+    coords = walker.coords(dims)
+    return SparseNTable(
+        [reflist[i] for i in order],
+        positions[order],
+        coords,
+        tuple(coords.keys()),
+        engine=engine,
+        ttype=ttype,
+    )
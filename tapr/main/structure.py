@@ -1,10 +1,122 @@
 import warnings as wn
 import itertools as it
+import sys
 
 import numpy as np
 import xarray as xr
 
-from .utils import concatenate_ntables, xarray_coords_to_dict, basic_refmap
+from . import defs
+from .tracking import mark_written
+from .utils import (
+    concatenate_ntables,
+    xarray_coords_to_dict,
+    basic_refmap,
+    compact_reflist,
+    is_typed,
+    accepts,
+)
+
+
+def _maybe_compact(ntbl):
+    # automatic compaction policy for views. See defs.AUTO_COMPACT_FRACTION
+    fraction = defs.AUTO_COMPACT_FRACTION
+    if fraction is None:
+        return ntbl
+    threshold = fraction * len(ntbl.reflist)
+    if ntbl.refmap.size >= threshold:
+        # the view may still reference few items if it is multi-referential
+        if len(np.unique(ntbl.refmap.values)) >= threshold:
+            return ntbl
+    return ntbl.struct.compact()
+
+
+def _share(ntbl, view):
+    # Mark both NTable objects as sharing a reflist so that the next
+    # assignment to either of them copies the reflist first (copy-on-write).
+    if view.reflist is ntbl.reflist:
+        ntbl._shared_reflist = True
+        view._shared_reflist = True
+        # error indices are reflist indices, so they hold for the view too
+        view._errors = ntbl._errors
+    return view
+
+
+def _detach(ntbl):
+    # Give the NTable object its own reflist before it gets written to. Only
+    # the items it references are copied, and the copy is shallow.
+    #
+    # This is a deliberate simplification of copying only the entries
+    # written to: the first write after the reflist got shared costs
+    # O(k + refmap.size) for the k items the NTable object references (a
+    # np.unique of its refmap plus a shallow copy of those items), whatever
+    # the number of entries written. A view of a few cells copies those few
+    # items, but writing to an NTable object a view was taken from copies
+    # all of its items once. Later writes are free until the reflist is
+    # shared again. Copying per entry would need an overlay of written
+    # entries that every read goes through, which isn't worth it for
+    # reflists of references.
+    if ntbl._shared_reflist:
+        ntbl._reflist, ntbl._refmap = compact_reflist(ntbl.reflist, ntbl.refmap)
+        ntbl._shared_reflist = False
+        ntbl._errors = None
+
+
+def _promote(ntbl, values):
+    # Turn the typed reflist of the NTable object into a list if any of the
+    # values about to be written to it can't be stored in it.
+    if not accepts(ntbl.reflist, values):
+        ntbl._reflist = list(ntbl.reflist)
+
+
+def _assign(ntbl, get_index_map, value):
+    from .ntable import NTable
+
+    _detach(ntbl)
+    ntbl._errors = None
+    index_map = get_index_map(ntbl.refmap)
+
+    if len(np.unique(index_map)) < index_map.values.size:
+        wn.warn(
+            """Warning: The index corresponds to a part of the
+                structure that is multi-referential. This means that there 
+                are multiple items in the refmap that point to the same 
+                item in the reflist. As such, assignment operations could result in some
+                unexpected behavior."""
+        )
+
+    def _setreflist(i, v):
+        ntbl.ttype.add(type(v))
+        ntbl.reflist[i] = v
+
+    if not isinstance(value, NTable):
+        _promote(ntbl, (value,))
+        list(
+            map(
+                _setreflist,
+                index_map.values.flat,
+                (value for item in index_map.values.flat),
+            )
+        )
+    else:
+        # should numpy or xarray broadcasting be used here?
+        bi, bv = xr.broadcast(index_map, value.refmap)
+        if np.isnan(bi.values).any() or np.isnan(bv.values).any():
+            raise ValueError("Unable to assign input value")
+        if is_typed(ntbl.reflist) and not (
+            is_typed(value.reflist)
+            and np.can_cast(
+                value.reflist.dtype, ntbl.reflist.dtype, casting="same_kind"
+            )
+        ):
+            _promote(ntbl, (value.reflist[vi] for vi in bv.values.flat))
+        list(
+            map(
+                _setreflist,
+                bi.values.flat,
+                (value.reflist[vi] for vi in bv.values.flat),
+            )
+        )
+    mark_written(ntbl, index_map.values)
 
 
 class _LocIndexer:
@@ -18,47 +130,15 @@ class _LocIndexer:
     def __getitem__(self, index):
         from .ntable import NTable
 
-        new_refmap = self._struct.ntable.refmap.loc[index]
-        return NTable(self._struct.ntable.reflist, new_refmap, validate=False)
+        ntbl = self._struct.ntable
+        new_refmap = ntbl.refmap.loc[index]
+        return _share(
+            ntbl,
+            _maybe_compact(NTable(ntbl.reflist, new_refmap, validate=False)),
+        )
 
     def __setitem__(self, index, value):
-        from .ntable import NTable
-
-        index_map = self._struct.ntable.refmap.loc[index]
-
-        if len(np.unique(index_map)) < index_map.values.size:
-            wn.warn(
-                """Warning: The index corresponds to a part of the
-                    structure that is multi-referential. This means that there 
-                    are multiple items in the refmap that point to the same 
-                    item in the reflist. As such, assignment operations could result in some
-                    unexpected behavior."""
-            )
-
-        def _setreflist(i, v):
-            self._struct.ntable.ttype.add(type(v))
-            self._struct.ntable.reflist[i] = v
-
-        if not isinstance(value, NTable):
-            list(
-                map(
-                    _setreflist,
-                    index_map.values.flat,
-                    (value for item in index_map.values.flat),
-                )
-            )
-        else:
-            # should numpy or xarray broadcasting be used here?
-            bi, bv = xr.broadcast(index_map, value.refmap)
-            if np.isnan(bi.values).any() or np.isnan(bv.values).any():
-                raise ValueError("Unable to assign input value")
-            list(
-                map(
-                    _setreflist,
-                    bi.values.flat,
-                    (value.reflist[vi] for vi in bv.values.flat),
-                )
-            )
+        _assign(self._struct.ntable, lambda refmap: refmap.loc[index], value)
 
 
 class NTableStructure:
@@ -66,6 +146,11 @@ class NTableStructure:
     NTable structure object. Used for structure-oriented operations such as
     indexing, assigning, transposing, iterating over elements, etc.
 
+    NTable objects returned by indexing, transposing, relabeling, etc. share
+    the reflist of the NTable object they came from. Assigning to either of
+    them first copies the items it references into a reflist of its own, so
+    assignments never leak into other NTable objects.
+
     Parameters
     ----------
     ntbl : NTable
@@ -126,57 +211,27 @@ class NTableStructure:
         """The transposed NTable object."""
         from .ntable import NTable
 
-        return NTable(
-            self._ntbl.reflist,
-            self._ntbl.refmap.T,
-            self._ntbl.engine,
-            self._ntbl.ttype,
+        return _share(
+            self._ntbl,
+            NTable(
+                self._ntbl.reflist,
+                self._ntbl.refmap.T,
+                self._ntbl.engine,
+                self._ntbl.ttype,
+            ),
         )
 
     def __getitem__(self, index):
         from .ntable import NTable
 
         new_refmap = self._ntbl.refmap[index]
-        return NTable(self._ntbl.reflist, new_refmap)
+        return _share(
+            self._ntbl,
+            _maybe_compact(NTable(self._ntbl.reflist, new_refmap)),
+        )
 
     def __setitem__(self, index, value):
-        from .ntable import NTable
-
-        index_map = self._ntbl.refmap[index]
-
-        if len(np.unique(index_map)) < index_map.values.size:
-            wn.warn(
-                """Warning: The index corresponds to a part of the
-                    structure that is multi-referential. This means that there 
-                    are multiple items in the refmap that point to the same 
-                    item in the reflist. As such, assignment operations could result in some
-                    unexpected behavior."""
-            )
-
-        def _setreflist(i, v):
-            self._ntbl.ttype.add(type(v))
-            self._ntbl.reflist[i] = v
-
-        if not isinstance(value, NTable):
-            list(
-                map(
-                    _setreflist,
-                    index_map.values.flat,
-                    (value for item in index_map.values.flat),
-                )
-            )
-        else:
-            # should numpy or xarray broadcasting be used here?
-            bi, bv = xr.broadcast(index_map, value.refmap)
-            if np.isnan(bi.values).any() or np.isnan(bv.values).any():
-                raise ValueError("Unable to assign input value")
-            list(
-                map(
-                    _setreflist,
-                    bi.values.flat,
-                    (value.reflist[vi] for vi in bv.values.flat),
-                )
-            )
+        _assign(self._ntbl, lambda refmap: refmap[index], value)
 
     def __add__(self, right):
         return concatenate_ntables(
@@ -186,13 +241,137 @@ class NTableStructure:
     def transpose(self, *refmap_args, **refmap_kwargs):
         from .ntable import NTable
 
-        return NTable(
-            self._ntbl.reflist,
-            self._ntbl.refmap.transpose(*refmap_args, **refmap_kwargs),
-            self._ntbl.engine,
-            self._ntbl.ttype,
+        return _share(
+            self._ntbl,
+            NTable(
+                self._ntbl.reflist,
+                self._ntbl.refmap.transpose(*refmap_args, **refmap_kwargs),
+                self._ntbl.engine,
+                self._ntbl.ttype,
+            ),
+        )
+
+    def label_index(self, dim):
+        """
+        The hash-based index of the labels along the given dimension. It is
+        built once and cached for as long as the layout of the NTable object
+        does not change.
+
+        Parameters
+        ----------
+        dim : str
+            The dimension whose labels to index.
+
+        Returns
+        -------
+        pandas.Index
+            The labels along dim.
+
+        """
+        refmap, indexes = self._ntbl._label_indexes
+        if refmap is not self._ntbl.refmap:
+            indexes = {}
+            self._ntbl._label_indexes = (self._ntbl.refmap, indexes)
+        if dim not in indexes:
+            indexes[dim] = self._ntbl.refmap.indexes[dim]
+        return indexes[dim]
+
+    def positions(self, dim, labels):
+        """
+        Look up the positions of several labels along a dimension at once.
+
+        Parameters
+        ----------
+        dim : str
+            The dimension the labels belong to.
+        labels : Sequence
+            The labels to look up.
+
+        Raises
+        ------
+        KeyError
+            Raised if any of the labels is not found along dim.
+
+        Returns
+        -------
+        ndarray
+            The integer position of each label.
+
+        """
+        positions = self.label_index(dim).get_indexer(labels)
+        if (positions < 0).any():
+            missing = [
+                label for label, i in zip(labels, positions) if i < 0
+            ]
+            raise KeyError(f"{missing} not found along dim {dim}")
+        return positions
+
+    def take(self, indices, dim):
+        """
+        Index the NTable object by position along a single dimension.
+
+        Parameters
+        ----------
+        indices : int, slice or array-like
+            The positions to take along dim.
+        dim : str
+            The dimension to index along.
+
+        Returns
+        -------
+        NTable
+            A view of the NTable object.
+
+        """
+        from .ntable import NTable
+
+        new_refmap = self._ntbl.refmap[{dim: indices}]
+        return _share(
+            self._ntbl,
+            _maybe_compact(
+                NTable(self._ntbl.reflist, new_refmap, validate=False)
+            ),
         )
 
+    def iterate(self, raw=False):
+        """
+        Iterate over the elements of the NTable object in lockstep. See
+        tapr.main.ntable.NTableIterator.
+
+        Parameters
+        ----------
+        raw : bool, optional
+            Whether or not to yield object ndarrays shaped like the NTable
+            object instead of NTable objects. The default is False.
+
+        """
+        from .ntable import NTableIterator
+
+        return NTableIterator(self._ntbl, raw=raw)
+
+    def groupby(self, dim, key):
+        """
+        Group the labels along a dimension by a key function.
+
+        Parameters
+        ----------
+        dim : str
+            The dimension whose labels are grouped.
+        key : callable
+            Function called once on each label along dim. Labels with equal
+            keys belong to the same group.
+
+        Returns
+        -------
+        NTableGroupBy
+            An object used to iterate over, apply functions to and reduce the
+            groups.
+
+        """
+        from .grouping import NTableGroupBy
+
+        return NTableGroupBy(self._ntbl, dim, key)
+
     def item(self):
         """
         If the NTable object has just a single element (regardless of its
@@ -204,6 +383,74 @@ class NTableStructure:
             )
         return next(self.flat)
 
+    def compact(self, threshold=None):
+        """
+        Rebuild the NTable object on a minimal reflist holding only the items
+        its refmap references. Useful for releasing the memory held by the
+        rest of a reflist shared with a much larger NTable.
+
+        Parameters
+        ----------
+        threshold : float, optional
+            Only compact if the fraction of the reflist that is referenced
+            is below this value. If None, always compact.
+
+        Returns
+        -------
+        NTable
+            The compacted NTable, or the NTable object itself if it was not
+            compacted.
+
+        """
+        from .ntable import NTable
+
+        if threshold is not None:
+            if self.memory_report()["referenced_fraction"] >= threshold:
+                return self._ntbl
+        reflist, refmap = compact_reflist(self._ntbl.reflist, self._ntbl.refmap)
+        return NTable(
+            reflist, refmap, self._ntbl.engine, self._ntbl.ttype, validate=False
+        )
+
+    def memory_report(self, nbytes=False):
+        """
+        Report how much of the reflist is reachable through the refmap.
+
+        Parameters
+        ----------
+        nbytes : bool, optional
+            Whether or not to also estimate the size in bytes (as given by
+            sys.getsizeof) of the referenced and of all reflist items. This
+            requires visiting every item of the reflist. The default is False.
+
+        Returns
+        -------
+        dict
+            reflist_length, referenced, unreferenced and referenced_fraction
+            entries, as well as referenced_nbytes and reflist_nbytes if
+            nbytes is True.
+
+        """
+        reflist = self._ntbl.reflist
+        used = np.unique(self._ntbl.refmap.values)
+        report = {
+            "reflist_length": len(reflist),
+            "referenced": len(used),
+            "unreferenced": len(reflist) - len(used),
+            "referenced_fraction": (
+                len(used) / len(reflist) if len(reflist) else 1.0
+            ),
+        }
+        if nbytes and is_typed(reflist):
+            report["referenced_nbytes"] = len(used) * reflist.itemsize
+            report["reflist_nbytes"] = reflist.nbytes
+        elif nbytes:
+            report["referenced_nbytes"] = sum(
+                sys.getsizeof(reflist[i]) for i in used
+            )
+            report["reflist_nbytes"] = sum(map(sys.getsizeof, reflist))
+        return report
+
     def relabel(self, **kwargs):
         """
         Relabel coordinates.
@@ -218,37 +465,135 @@ class NTableStructure:
         Returns
         -------
         NTable
-            The relabled NTable.
+            The relabled NTable. Only the labels are replaced, the refmap
+            data is left as is.
 
         """
         from .ntable import NTable
 
         refmap = self._ntbl.refmap
         for k, v in kwargs.items():
-            refmap = refmap.to_dataset(k).rename(**v).to_array(k)
-
-        return NTable(self._ntbl.reflist, refmap)
+            old_labels = list(v.keys())
+            positions = self.label_index(k).get_indexer(old_labels)
+            if (positions < 0).any():
+                missing = [
+                    label for label, i in zip(old_labels, positions) if i < 0
+                ]
+                raise ValueError(f"{missing} not found along dim {k}")
+            labels = self.label_index(k).to_numpy(dtype="object", copy=True)
+            new_labels = np.empty(len(positions), dtype="object")
+            new_labels[:] = list(v.values())
+            labels[positions] = new_labels
+            refmap = refmap.assign_coords({k: labels})
+
+        return _share(self._ntbl, NTable(self._ntbl.reflist, refmap))
 
     def flatter(self, dims=None):
+        """
+        Iterate over the NTable object along every dimension not in dims.
+
+        The refmap is transposed and reshaped once so that each yielded
+        NTable is a view of a contiguous block of it; no label-based lookups
+        are made and every view shares the reflist of the parent.
+
+        Parameters
+        ----------
+        dims : Sequence, optional
+            The dimensions to keep in each of the yielded NTable objects. If
+            None, every element is yielded as a 0 dimensional NTable.
+
+        Yields
+        ------
+        NTable
+            The NTable object corresponding to each combination of
+            coordinates along the flattened dimensions.
+
+        """
+        from .ntable import NTable
+
         if dims is None:
             dims = tuple()
         for dim in dims:
             if dim not in self.dims:
                 raise ValueError(f"dim {dim} not found")
-        dims = tuple(dim for dim in self.dims if dim not in dims)
-        coord_dict = xarray_coords_to_dict(self.coords)
-        indexes = it.product(*(coord_dict[dim] for dim in dims))
-        for index in indexes:
-            yield self.loc[{dim: coord for dim, coord in zip(dims, index)}]
+        refmap = self._ntbl.refmap
+        flat_dims = tuple(dim for dim in self.dims if dim not in dims)
+        kept_dims = tuple(dim for dim in self.dims if dim in dims)
+        block_shape = tuple(refmap.sizes[dim] for dim in kept_dims)
+        blocks = refmap.transpose(*flat_dims, *kept_dims).values.reshape(
+            (-1,) + block_shape
+        )
+        kept_coords = {
+            name: coord.variable
+            for name, coord in refmap.coords.items()
+            if name not in flat_dims and set(coord.dims) <= set(kept_dims)
+        }
+        # non-index coordinates along flattened dimensions are indexed like
+        # the refmap for every block
+        indexed_coords = {
+            name: coord.variable
+            for name, coord in refmap.coords.items()
+            if name not in flat_dims and name not in kept_coords
+        }
+        flat_shape = tuple(refmap.sizes[dim] for dim in flat_dims)
+        coord_names = list(refmap.coords)
+        labels = it.product(*(refmap.coords[dim].values for dim in flat_dims))
+        for i, (block, index) in enumerate(zip(blocks, labels)):
+            scalars = dict(zip(flat_dims, index))
+            if indexed_coords:
+                position = dict(
+                    zip(flat_dims, np.unravel_index(i, flat_shape))
+                )
+                for name, variable in indexed_coords.items():
+                    scalars[name] = variable.isel(
+                        {d: position[d] for d in variable.dims if d in position}
+                    )
+            coords = {
+                name: scalars[name] if name in scalars else kept_coords[name]
+                for name in coord_names
+            }
+            yield _share(
+                self._ntbl,
+                NTable(
+                    self._ntbl.reflist,
+                    xr.DataArray(block, coords, kept_dims),
+                    self._ntbl.engine,
+                    self._ntbl.ttype,
+                    validate=False,
+                ),
+            )
 
     def compress(self, dims=None):
+        """
+        Compress the given dimensions into the elements of a new NTable
+        object, whose elements are the sub-NTable objects yielded by flatter.
+
+        Parameters
+        ----------
+        dims : Sequence, optional
+            The dimensions to compress. If None, no dimensions are
+            compressed.
+
+        Returns
+        -------
+        NTable
+            The NTable object of NTable objects.
+
+        """
         from .ntable import NTable
 
-        new_reflist = [ntbl for ntbl in self.flatter(dims)]
+        if dims is None:
+            dims = tuple()
+        new_reflist = list(self.flatter(dims))
         new_dims = tuple(dim for dim in self.dims if dim not in dims)
-        coords_dict = xarray_coords_to_dict(self.coords)
-        new_coords = {dim: coords_dict[dim] for dim in new_dims}
+        new_coords = {dim: self.coords[dim].values for dim in new_dims}
 
         new_refmap = basic_refmap(new_coords, new_dims)
 
-        return NTable(new_reflist, new_refmap, engine=self.ntable.engine)
+        return NTable(
+            new_reflist,
+            new_refmap,
+            engine=self.ntable.engine,
+            ttype={NTable},
+            validate=False,
+        )
@@ -1,31 +1,41 @@
 import functools as ft
+import itertools as it
 
 from .processing import tabular_map, broadcast_tables
 from .utils import any_ntables, call_args_kwargs
 from .conversion import tabulate
 from .engines import Engine, StandardEngine
+from .tracking import _Recipe
+from .sparse import SparseNTable, sparse_call
+from . import profiling
 
 
 class _Tabularized:
-    def __init__(self, func, engine):
+    def __init__(self, func, engine, cache=None, track=False, checkpoint=None):
         self._func = func
         self._engine = engine
+        self._cache = cache
+        self._track = track
+        self._checkpoint = checkpoint
 
-    def __call__(self, *args, **kwargs):
+    @property
+    def cache(self):
+        return self._cache
+
+    def _broadcast(self, args, kwargs):
         from .ntable import NTable
 
-        try:
-            targs = tabulate(args)
-        except ValueError:
-            targs = args
-        try:
-            tkwargs = tabulate(kwargs)
-        except ValueError:
-            tkwargs = kwargs
+        with profiling.stage("tabulate"):
+            try:
+                targs = tabulate(args)
+            except ValueError:
+                targs = args
+            try:
+                tkwargs = tabulate(kwargs)
+            except ValueError:
+                tkwargs = kwargs
         if not isinstance(targs, NTable) and not isinstance(tkwargs, NTable):
-            # if there are no NTable objects in args or kwargs, just call the
-            # function normally on the inputs
-            return self._func(*args, **kwargs)
+            return None
 
         bfunc, bargs, bkwargs = broadcast_tables(
             self._func, targs, tkwargs, lite=True
@@ -37,9 +47,37 @@ class _Tabularized:
         # be that of bargs. Same for ttype being STANDARD_TTYPE
         bfunc.engine = bargs.engine
         bfunc.ttype = bargs.ttype
-        return tabular_map(
-            (call_args_kwargs, self._engine), bfunc, bargs, bkwargs
+        return bfunc, bargs, bkwargs
+
+    def _map(self, *iterables):
+        # map the function over already broadcast elements
+        if self._cache is None:
+            return self._engine.__tapr_engine_map__(call_args_kwargs, *iterables)
+        return self._cache.map(self._engine, call_args_kwargs, *iterables)
+
+    def __call__(self, *args, **kwargs):
+        if any(
+            isinstance(arg, SparseNTable)
+            for arg in it.chain(args, kwargs.values())
+        ):
+            # only the populated cells of sparse NTable objects are visited
+            return sparse_call(self, args, kwargs)
+
+        broadcast = self._broadcast(args, kwargs)
+        if broadcast is None:
+            # if there are no NTable objects in args or kwargs, just call the
+            # function normally on the inputs
+            return self._func(*args, **kwargs)
+
+        result = tabular_map(
+            (call_args_kwargs, self._engine),
+            *broadcast,
+            cache=self._cache,
+            checkpoint=self._checkpoint,
         )
+        if self._track:
+            result._recipe = _Recipe(self, args, kwargs)
+        return result
 
     def __str__(self):
         return f"Tabularized:\nfunc: {self._func.__name__}\nengine: {self._engine}"
@@ -47,7 +85,33 @@ class _Tabularized:
     def __repr__(self):
         return str(self)
 
-def tabularize(engine=None):
+def tabularize(engine=None, cache=None, track=False, checkpoint=None):
+    """
+    Decorator that makes a function operate on the elements of NTable
+    objects.
+
+    Parameters
+    ----------
+    engine : Engine, optional
+        The engine used to map the function over the elements. If None, a
+        serial engine is used. The default is None.
+    cache : MemoCache, optional
+        A cache used to memoize the results of the function per element, so
+        that elements whose arguments were seen before are not recomputed.
+        If None, results are not memoized. The default is None.
+    track : bool, optional
+        Whether or not the resulting NTable objects should remember how they
+        were computed. Writes made to the cells of their source NTable
+        objects (through struct, struct.loc or ntable maps) are then
+        recorded, and NTable.refresh recomputes only the cells that depend
+        on cells written to. The default is False.
+    checkpoint : tapr.io_.checkpoint.Checkpoint, optional
+        A checkpoint that completed elements are persisted to as they are
+        computed, so that rerunning the same call after an interruption only
+        computes the remaining cells. If None, nothing is persisted. The
+        default is None.
+
+    """
     if engine is None:
         engine = StandardEngine()
 
@@ -56,7 +120,9 @@ def tabularize(engine=None):
 
     def tabulizer(func):
         if callable(func):
-            return _Tabularized(func, engine)
+            return _Tabularized(
+                func, engine, cache=cache, track=track, checkpoint=checkpoint
+            )
         else:
             raise TypeError(f"func must be callable, which {func} is not")
 
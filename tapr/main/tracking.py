@@ -0,0 +1,170 @@
+import numpy as np
+
+# Logical clock ticked by every tracked write. Each tracked NTable object
+# stamps the cells written to with the time of the write, and each derived
+# NTable object remembers the time it was last computed at, so a cell is
+# dirty if its stamp is more recent than that.
+_clock = 0
+
+
+def _tick():
+    global _clock
+    _clock += 1
+    return _clock
+
+
+def track(ntbl):
+    """
+    Start recording writes made to the cells of a NTable object. Called on
+    the sources of derived NTable objects created by tabularized functions
+    with tracking enabled.
+    """
+    if ntbl._writes is None:
+        ntbl._writes = ntbl.refmap.copy(
+            data=np.zeros(ntbl.refmap.shape, dtype="int64")
+        )
+
+
+def mark_written(ntbl, indices):
+    """
+    Mark every cell of a tracked NTable object that refers to one of the
+    given reflist indices as written to.
+    """
+    if ntbl._writes is None:
+        return
+    written = np.isin(ntbl.refmap.values, np.asarray(indices))
+    ntbl._writes.values[written] = _tick()
+
+
+def relayout(ntbl):
+    """
+    Realign the write stamps of a tracked NTable object whose refmap was
+    replaced by one with different coordinates. Cells that are new are
+    marked as written to.
+    """
+    if ntbl._writes is None:
+        return
+    writes = ntbl._writes.reindex(
+        {dim: ntbl.refmap.indexes[dim] for dim in ntbl._writes.dims},
+        fill_value=_tick(),
+    )
+    ntbl._writes = writes.transpose(*ntbl.refmap.dims)
+
+
+def _find_ntables(obj, found):
+    from .ntable import NTable
+
+    if isinstance(obj, NTable):
+        if not any(obj is ntbl for ntbl in found):
+            found.append(obj)
+    elif isinstance(obj, (tuple, list)):
+        for item in obj:
+            _find_ntables(item, found)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            _find_ntables(item, found)
+    elif isinstance(obj, slice):
+        _find_ntables((obj.start, obj.stop, obj.step), found)
+    return found
+
+
+def _layout(ntbl):
+    return ntbl.refmap.coords.to_dataset()
+
+
+class _Recipe:
+    """
+    How a derived NTable object was computed: the tabularized function, the
+    arguments it was called with and the time it was computed at.
+    """
+
+    def __init__(self, tabularized, args, kwargs):
+        self.tabularized = tabularized
+        self.args = args
+        self.kwargs = kwargs
+        self.sources = _find_ntables((args, kwargs), [])
+        for source in self.sources:
+            track(source)
+        self.layouts = [_layout(source) for source in self.sources]
+        self.computed_at = _clock
+
+    def relaid_out(self):
+        """Whether or not the coordinates of any source changed."""
+        return any(
+            not _layout(source).identical(layout)
+            for source, layout in zip(self.sources, self.layouts)
+        )
+
+    def dirty(self, ntbl):
+        """Boolean array of the cells of ntbl that need recomputing."""
+        refmap = ntbl.refmap
+        dirty = np.zeros(refmap.shape, dtype=bool)
+        for source in self.sources:
+            writes = source._writes.reindex(
+                {
+                    dim: refmap.indexes[dim]
+                    for dim in source._writes.dims
+                    if dim in refmap.dims
+                },
+                fill_value=0,
+            )
+            writes = writes.broadcast_like(refmap).transpose(*refmap.dims)
+            dirty |= writes.values > self.computed_at
+        return dirty
+
+
+def refresh(ntbl):
+    """
+    Recompute the cells of a derived NTable object whose source cells were
+    written to since it was computed. See NTable.refresh.
+    """
+    from .tabularization import tabularize
+    from .structure import _detach, _promote
+
+    recipe = ntbl._recipe
+    if recipe is None:
+        return ntbl
+    for source in recipe.sources:
+        refresh(source)
+
+    relaid_out = recipe.relaid_out()
+    if not relaid_out:
+        dirty = recipe.dirty(ntbl)
+        if not dirty.any():
+            return ntbl
+    computed_at = _clock
+
+    tabularized = recipe.tabularized
+    if relaid_out:
+        # the coordinates of the sources changed, so everything gets
+        # recomputed
+        untracked = tabularize(tabularized._engine, cache=tabularized.cache)
+        result = untracked(tabularized._func)(*recipe.args, **recipe.kwargs)
+        ntbl._reflist = result.reflist
+        ntbl._refmap = result.refmap
+        ntbl._shared_reflist = False
+        ntbl._errors = result._errors
+        ntbl.ttype |= result.ttype
+        relayout(ntbl)
+        mark_written(ntbl, np.arange(len(ntbl.reflist)))
+        recipe.layouts = [_layout(source) for source in recipe.sources]
+    else:
+        broadcast = tabularized._broadcast(recipe.args, recipe.kwargs)
+        positions = np.flatnonzero(dirty)
+        values = tabularized._map(
+            *(
+                [b.reflist[i] for i in b.refmap.values.flat[positions]]
+                for b in broadcast
+            )
+        )
+        _detach(ntbl)
+        ntbl._errors = None
+        values = list(values)
+        _promote(ntbl, values)
+        indices = ntbl.refmap.values.flat[positions]
+        for i, value in zip(indices, values):
+            ntbl.ttype.add(type(value))
+            ntbl.reflist[i] = value
+        mark_written(ntbl, indices)
+    recipe.computed_at = computed_at
+    return ntbl
@@ -5,9 +5,10 @@ from collections.abc import MutableMapping
 
 import h5py
 import numpy as np
+import pandas as pd
 import xarray as xr
 
-from .defs import PRINTABLE_TYPES
+from .defs import PRINTABLE_TYPES, TYPED_STORAGE_KINDS
 from .engines import Engine
 
 
@@ -33,16 +34,17 @@ def validate_ntable_init(reflist, refmap, engine, ttype):
         raise TypeError("refmap must be an xarray DataArray")
     if len(list(refmap.coords.keys())) == 0:
         raise ValueError("Data map must have non empty coordinates")
-    if not isinstance(reflist, list):
-        raise TypeError("reflist must be a list")
-
-    for item in refmap.data.flat:
-        try:
-            reflist[item]
-        except IndexError:
-            raise ValueError(
-                "every element of refmap must be a valid index of reflist"
-            )
+    if not isinstance(reflist, list) and not is_typed(reflist):
+        raise TypeError("reflist must be a list or a 1 dimensional ndarray")
+    if refmap.dtype.kind not in "iu":
+        raise TypeError("refmap must contain integers")
+    if refmap.size and (
+        refmap.values.min() < -len(reflist)
+        or refmap.values.max() >= len(reflist)
+    ):
+        raise ValueError(
+            "every element of refmap must be a valid index of reflist"
+        )
 
     # if len(np.unique(refmap)) < refmap.values.size:
     #     raise ValueError("Every element of refmap must be unique")
@@ -51,6 +53,73 @@ def validate_ntable_init(reflist, refmap, engine, ttype):
     validate_ttype(ttype)
 
 
+def is_typed(reflist):
+    """Whether or not reflist is typed storage (a 1 dimensional ndarray)."""
+    return isinstance(reflist, np.ndarray) and reflist.ndim == 1
+
+
+def typed_storage(values):
+    """
+    The typed reflist and refmap array of a numpy array of numbers (see
+    TYPED_STORAGE_KINDS), or None if values isn't one. The reflist is a view
+    of values whenever values is contiguous, so no data is copied.
+    """
+    if values.dtype.kind not in TYPED_STORAGE_KINDS:
+        return None
+    order = (
+        "F"
+        if values.flags.f_contiguous and not values.flags.c_contiguous
+        else "C"
+    )
+    reflist = values.ravel(order=order)
+    refarray = np.arange(values.size).reshape(values.shape, order=order)
+    return reflist, refarray
+
+
+# the python scalars typed reflists accept, by dtype kind. Only scalars of
+# the same kind are accepted, so that the type of what is read back matches
+# what was written
+_PYTHON_SCALARS = {
+    "b": (bool,),
+    "i": (int,),
+    "u": (int,),
+    "f": (float,),
+    "c": (complex,),
+}
+
+
+def _round_trips(value, dtype):
+    # whether the python scalar value is stored exactly by an array of dtype
+    if dtype.kind in "iu":
+        info = np.iinfo(dtype)
+        return info.min <= value <= info.max
+    with np.errstate(all="ignore"):
+        stored = dtype.type(value)
+    return stored == value or (value != value and stored != stored)
+
+
+def accepts(reflist, values):
+    """
+    Whether or not every value can be written to reflist without changing
+    it, or the value. Lists accept anything. Typed reflists only accept
+    numpy scalars that can safely be cast to their dtype, and python scalars
+    of the same kind as their dtype whose value they store exactly.
+    """
+    if not is_typed(reflist):
+        return True
+    dtype = reflist.dtype
+    for value in values:
+        if isinstance(value, np.generic):
+            if not np.can_cast(value.dtype, dtype, casting="safe"):
+                return False
+        elif type(value) in _PYTHON_SCALARS.get(dtype.kind, ()):
+            if not _round_trips(value, dtype):
+                return False
+        else:
+            return False
+    return True
+
+
 def ttype_to_attrs(ttype):
     attrs = {}
     for type_ in ttype:
@@ -115,6 +184,36 @@ def full_lite(value, coords, dims, engine=None, ttype=None):
     return NTable(dlist, dmap, engine, ttype)
 
 
+def fill_mapping(into, refs, labels, reflist, factory):
+    """
+    Write the elements of a refmap array into a nested mapping, one level
+    per dimension, walking the array once. factory creates the nested
+    mappings.
+    """
+    if len(labels) == 1:
+        for k, i in zip(labels[0], refs.tolist()):
+            into[k] = reflist[i]
+        return into
+    for k, sub_refs in zip(labels[0], refs):
+        into[k] = factory()
+        # re-read in case into stores a different object than it was given
+        fill_mapping(into[k], sub_refs, labels[1:], reflist, factory)
+    return into
+
+
+def iter_paths(ntbl):
+    """
+    Iterate over the (labels, element) pairs of every cell of a NTable
+    object, in C order.
+    """
+    labels = [ntbl.struct.label_index(dim) for dim in ntbl.struct.dims]
+    reflist = ntbl.reflist
+    for path, i in zip(
+        it.product(*labels), ntbl.refmap.values.reshape(-1).tolist()
+    ):
+        yield path, reflist[i]
+
+
 def str_ntable_element(val):
     try:
         return val.__ntable_element__str__()
@@ -139,58 +238,75 @@ def str_ntable_element(val):
             return type(val).__name__
 
 
-def str_ntable(ntbl):
-    from .tabularization import tabularize
-
-    max_rows = 100 + 25
-    max_cols = 20 + 5
-    max_other = 10 + 3
+def _str_positions(size, limit, keep):
+    # the positions displayed along a dimension of the given size
+    if size > limit:
+        return np.r_[0:keep, size - keep : size]
+    return np.arange(size)
 
-    dims = ntbl.struct.dims
 
-    reduce_index = {}
+def _str_table(refs, labels, dims, formatted, ellipsises):
+    # Render the (already reduced) refmap array refs, whose elements are
+    # looked up in formatted.
+    if refs.ndim > 2:
+        # every sub table formats the already formatted elements once more
+        reformatted = {i: str_ntable_element(v) for i, v in formatted.items()}
+        string = ""
+        sep = "#" * 79
+        for i, k in enumerate(labels[-1]):
+            sub = _str_table(
+                refs[..., i], labels[:-1], dims[:-1], reformatted, {}
+            )
+            string += f"{k}:\n\n{sub}\n\n{sep}\n\n"
+            if (i == 4) and ellipsises.get(dims[-1], False):
+                string += f". . .\n\n{sep}\n\n"
+        return string
+    if refs.ndim == 0:
+        return formatted[refs.item()]
 
-    try:
-        if len(ntbl.struct.coords[dims[0]]) > max_rows:
-            reduce_index[dims[0]] = np.r_[0:50, -50:0]
-    except IndexError:
-        pass
+    values = np.empty(refs.shape, dtype="object")
+    values.flat[:] = [formatted[i] for i in refs.flat]
+    index = labels[0].rename(dims[0])
+    if refs.ndim == 1:
+        return str(pd.Series(values, index=index))
+    columns = labels[1].rename(dims[1])
+    return str(pd.DataFrame(values, index=index, columns=columns))
 
-    try:
-        if len(ntbl.struct.coords[dims[1]]) > max_cols:
-            reduce_index[dims[1]] = np.r_[0:10, -10:0]
-    except IndexError:
-        pass
 
-    print_ellipsises = {}
+def str_ntable(ntbl):
+    """
+    Render the elements of a NTable object as text. Only the cells that are
+    displayed are looked at: the refmap array is reduced positionally to the
+    head and tail of every large dimension first, and every displayed
+    element is formatted once.
+    """
+    max_rows = 100 + 25
+    max_cols = 20 + 5
+    max_other = 10 + 3
 
-    for dim in dims[2:]:
-        if len(ntbl.struct.coords[dim]) > max_other:
-            reduce_index[dim] = np.r_[0:5, -5:0]
-            print_ellipsises[dim] = True
+    dims = ntbl.struct.dims
+    shape = ntbl.refmap.shape
+
+    positions = []
+    ellipsises = {}
+    for axis, (dim, size) in enumerate(zip(dims, shape)):
+        if axis == 0:
+            positions.append(_str_positions(size, max_rows, 50))
+        elif axis == 1:
+            positions.append(_str_positions(size, max_cols, 10))
         else:
-            print_ellipsises[dim] = False
-
-    ntbl = ntbl.struct[reduce_index]
-
-    ntbl = tabularize()(str_ntable_element)(ntbl)
+            positions.append(_str_positions(size, max_other, 5))
+            ellipsises[dim] = size > max_other
 
-    if ntbl.struct.ndim > 2:
-        string = ""
-        dim = ntbl.struct.dims[-1]
-        ntbl_map = ntbl.ntable_map(dim)
-        for i, (k, v) in enumerate(ntbl_map.items()):
-            sep = "#" * 79
-            string += f"{k}:\n\n{str_ntable(v)}\n\n{sep}\n\n"
-            if (i == 4) and (print_ellipsises[dim]):
-                string += f". . .\n\n{sep}\n\n"
-
-    elif ntbl.struct.ndim == 0:
-        string = str(ntbl.struct.item())
-    else:
-        string = str(ntbl.to_pandas())
-        string = "\n".join(string.split("\n"))
-    return string
+    refs = ntbl.refmap.values
+    if refs.ndim:
+        refs = refs[np.ix_(*positions)]
+    labels = [
+        ntbl.struct.label_index(dim)[pos] for dim, pos in zip(dims, positions)
+    ]
+    reflist = ntbl.reflist
+    formatted = {i: str_ntable_element(reflist[i]) for i in np.unique(refs)}
+    return _str_table(refs, labels, dims, formatted, ellipsises)
 
 
 def any_ntables(iterable):
@@ -250,74 +366,177 @@ class NULL(np.lib.mixins.NDArrayOperatorsMixin, metaclass=_Singleton):
 
 
 def handle_improper_broadcast(bdata, bmap):
+    if is_typed(bdata):
+        # NULL can't be stored in typed storage
+        bdata = list(bdata)
     bdata.append(NULL())
     new_bmap_array = np.nan_to_num(bmap, nan=len(bdata) - 1).astype("int")
     new_bmap = xr.DataArray(new_bmap_array, bmap.coords, bmap.dims)
     return bdata, new_bmap
 
 
+def compact_reflist(reflist, refmap):
+    """
+    Build a reflist containing only the items referenced by refmap, along
+    with the refmap remapped onto it. Items referenced by several elements
+    of refmap remain shared in the result.
+    """
+    used, inverse = np.unique(refmap.values, return_inverse=True)
+    if is_typed(reflist):
+        new_reflist = reflist[used]
+    else:
+        new_reflist = [reflist[i] for i in used]
+    new_refmap = refmap.copy(data=inverse.reshape(refmap.shape))
+    return new_reflist, new_refmap
+
+
+def _concatenate_refmaps(dmaps, offsets, dim, coords):
+    # Fast path of concatenate_ntables for refmaps whose other dimensions
+    # line up exactly: the offset refmaps are written straight into a single
+    # preallocated array. Returns None if the refmaps don't line up, or if
+    # they have non-index coordinates, which xarray.concat takes care of.
+    first = dmaps[0]
+    dim_is_new = dim not in first.dims
+    other_dims = tuple(d for d in first.dims if d != dim)
+    for dmap in dmaps:
+        if dmap.dims != first.dims or len(dmap.coords) != len(dmap.dims):
+            return None
+        for d in other_dims:
+            if not dmap.indexes[d].equals(first.indexes[d]):
+                return None
+
+    # the coordinate variables keep the dtype of the labels
+    new_coords = {d: first.coords[d].variable for d in other_dims}
+    if dim_is_new:
+        # for NTables, a new dimension is created at the end
+        axis = first.ndim
+        new_dims = first.dims + (dim,)
+        shape = first.shape + (len(dmaps),)
+        new_coords[dim] = (
+            list(range(0, len(dmaps))) if coords is None else coords
+        )
+    else:
+        axis = first.dims.index(dim)
+        new_dims = first.dims
+        lengths = [dmap.shape[axis] for dmap in dmaps]
+        shape = first.shape[:axis] + (sum(lengths),) + first.shape[axis + 1 :]
+        new_coords[dim] = np.concatenate(
+            [dmap.coords[dim].values for dmap in dmaps]
+        )
+
+    new_array = np.empty(shape, dtype="int64")
+    selection = [slice(None)] * len(shape)
+    start = 0
+    for dmap, offset in zip(dmaps, offsets):
+        if dim_is_new:
+            selection[axis] = start
+            start += 1
+        else:
+            selection[axis] = slice(start, start + dmap.shape[axis])
+            start += dmap.shape[axis]
+        np.add(dmap.values, offset, out=new_array[tuple(selection)])
+    return xr.DataArray(new_array, new_coords, new_dims)
+
+
 def concatenate_ntables(objs, dim, coords=None):
+    """
+    Concatenate NTable objects along a dimension.
+
+    Every distinct reflist is copied into the new reflist once, even when it
+    is shared by several of the NTable objects (views of the same NTable
+    object, for example), so that shared references remain shared.
+    Concatenating many NTable objects at once is therefore much cheaper than
+    chaining NTableStructure.__add__.
+
+    Parameters
+    ----------
+    objs : Sequence of NTable
+        The NTable objects to concatenate.
+    dim : str
+        The dimension to concatenate along. If it is new, it is created as
+        the last dimension.
+    coords : Sequence, optional
+        The coordinates of dim if it is new. If None, a simple integer index
+        is used. The default is None.
+
+    Returns
+    -------
+    NTable
+        The concatenated NTable object. Elements missing from the NTable
+        objects (when their other dimensions don't line up) are NULL.
+
+    """
     from .ntable import NTable
 
-    dmaps = tuple(obj.refmap for obj in objs)
-    dlists = tuple(obj.reflist for obj in objs)
-    true_sizes = tuple(len(dlist) for dlist in dlists)
-
+    objs = tuple(objs)
     new_engine = objs[0].engine
 
     new_ttype = set()
     for obj in objs:
         new_ttype |= obj.ttype
 
-    new_dmaps = tuple(
-        dmap + sum(true_sizes[0:i]) for i, dmap in enumerate(dmaps)
-    )
-
-    # TODO: handle when dim is new and assign new coordinates
-    new_dmap = xr.concat(new_dmaps, dim)
-    dim_is_new = True
-    for new_dmap_ in new_dmaps:
-        if dim in new_dmap_.dims:
-            dim_is_new = False
-            break
+    # one slot per distinct reflist, with one prefix sum for the offsets
+    slots = {}
+    dlists = []
+    for obj in objs:
+        if id(obj.reflist) not in slots:
+            slots[id(obj.reflist)] = len(dlists)
+            dlists.append(obj.reflist)
+    starts = np.concatenate(
+        ([0], np.cumsum([len(dlist) for dlist in dlists])[:-1])
+    ).astype("int64")
+    offsets = [starts[slots[id(obj.reflist)]] for obj in objs]
+    if all(is_typed(dlist) for dlist in dlists) and (
+        len({dlist.dtype for dlist in dlists}) == 1
+    ):
+        new_dlist = np.concatenate(dlists)
+    else:
+        new_dlist = list(it.chain.from_iterable(dlists))
 
-    if dim_is_new:
-        # if dim is new, then dim was added along axis=0 per xarray.concate
-        # for NTables we want the behavior so that it is a new dimension
-        # created at the end so we need to rearange...
-        new_dmap = new_dmap.transpose(
-            *(new_dmap.dims[1:] + (new_dmap.dims[0],))
+    dmaps = tuple(obj.refmap for obj in objs)
+    new_dmap = _concatenate_refmaps(dmaps, offsets, dim, coords)
+    if new_dmap is None:
+        new_dmaps = tuple(
+            dmap + offset for dmap, offset in zip(dmaps, offsets)
         )
-        if coords is None:
-            # if dim is new then we need to assign it coordinates. If not
-            # supplied, create them as list of integers ranging from 0 to
-            # the number of input ntables
-            coords = list(range(0, len(objs)))
-        # if dim is new, we need to assign new coordinates which have either
-        # been supplied by the caller or set to be a simple integer index
-        new_dmap = new_dmap.assign_coords({dim: coords})
-
-    new_dlist = []
-    for dlist in dlists:
-        new_dlist.extend(dlist)
+        new_dmap = xr.concat(new_dmaps, dim)
+        if all(dim not in dmap.dims for dmap in dmaps):
+            # if dim is new, then dim was added along axis=0 per xarray.concat
+            # for NTables we want the behavior so that it is a new dimension
+            # created at the end so we need to rearange...
+            new_dmap = new_dmap.transpose(
+                *(new_dmap.dims[1:] + (new_dmap.dims[0],))
+            )
+            if coords is None:
+                coords = list(range(0, len(objs)))
+            new_dmap = new_dmap.assign_coords({dim: coords})
+        if new_dmap.isnull().any():
+            # the other dimensions didn't line up, so xarray filled the
+            # missing elements with NaN
+            new_dlist, new_dmap = handle_improper_broadcast(new_dlist, new_dmap)
+            new_ttype.add(NULL)
+        else:
+            new_dmap = new_dmap.astype("int64")
+
+    return NTable(
+        new_dlist, new_dmap, engine=new_engine, ttype=new_ttype, validate=False
+    )
 
-    try:
-        return NTable(new_dlist, new_dmap)
-    except:
-        new_dlist, new_dmap = handle_improper_broadcast(new_dlist, new_dmap)
-        return NTable(new_dlist, new_dmap, engine=new_engine, ttype=new_ttype)
 
 def _infinite_alphabet():
     for i in it.count(1):
         for p in it.product(string.ascii_uppercase, repeat=i):
             yield ''.join(p)
 
-def default_refmap(*shape):
+def default_coords(*shape):
     dims = tuple(dim for i, dim in zip(range(len(shape)),_infinite_alphabet()))
     coords = {dim: [] for dim in dims}
     for dim, size in zip(dims, shape):
         coords[dim] = [f"{dim}{i}" for i in range(size)]
+    return coords, dims
 
+def default_refmap(*shape):
+    coords, dims = default_coords(*shape)
     refarray = np.arange(np.prod(shape)).reshape(shape)
     refmap = xr.DataArray(refarray, coords, dims)
     return refmap
@@ -399,5 +618,18 @@ def dictifyh5(group_or_file):
 #         return self._current
 
 
-class NTableStopIteration(Exception):
-    pass
+def __getattr__(name):
+    # NTableStopIteration isn't raised anymore, since iterating over NTable
+    # objects doesn't tabularize next(). It is kept as an alias of
+    # StopIteration for one release, so that code catching it still imports.
+    if name == "NTableStopIteration":
+        import warnings as wn
+
+        wn.warn(
+            "NTableStopIteration is deprecated and will be removed, catch "
+            "StopIteration instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return StopIteration
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
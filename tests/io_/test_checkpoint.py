@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+from tapr.main.conversion import ntable
+from tapr.main.tabularization import tabularize
+from tapr.main.handling import handled, FunctionError
+from tapr.io_.checkpoint import Checkpoint
+
+
+class Interrupted(BaseException):
+    # like KeyboardInterrupt, it isn't handled into a FunctionError
+    pass
+
+
+CALLS = []
+INTERRUPT_AFTER = [None]
+
+
+def double(x):
+    if len(CALLS) == INTERRUPT_AFTER[0]:
+        raise Interrupted
+    CALLS.append(x)
+    if x == 0:
+        raise ZeroDivisionError
+    return x * 2
+
+
+def triple(x):
+    return x * 3
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self._ntbl = ntable(
+            {
+                "row1": {"col1": 1, "col2": 2, "col3": 3},
+                "row2": {"col1": 4, "col2": 0, "col3": 6},
+            }
+        )
+        # the same cells, with other values
+        self._negated = ntable(
+            {
+                "row1": {"col1": -1, "col2": -2, "col3": -3},
+                "row2": {"col1": -4, "col2": 0, "col3": -6},
+            }
+        )
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "checkpoint.jsonl")
+        CALLS.clear()
+        INTERRUPT_AFTER[0] = None
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_resume(self):
+        checkpoint = Checkpoint(self._path, chunksize=2)
+        func = tabularize(checkpoint=checkpoint)(handled(double))
+        INTERRUPT_AFTER[0] = 3
+        with self.assertRaises(Interrupted):
+            func(self._ntbl)
+        # only the first chunk was completed
+        self.assertEqual(len(checkpoint.load()), 2)
+
+        INTERRUPT_AFTER[0] = None
+        CALLS.clear()
+        result = func(self._ntbl)
+        self.assertEqual(len(CALLS), 4)
+        self.assertEqual(result.struct.loc["row1", "col1"].item(), 2)
+        self.assertEqual(result.struct.loc["row2", "col3"].item(), 12)
+        self.assertTrue(
+            isinstance(result.struct.loc["row2", "col2"].item(), FunctionError)
+        )
+
+        # errors aren't persisted, so only they are computed again
+        CALLS.clear()
+        func(self._ntbl)
+        self.assertEqual(CALLS, [0])
+
+    def test_different_inputs(self):
+        checkpoint = Checkpoint(self._path)
+        func = tabularize(checkpoint=checkpoint)(handled(double))
+        func(self._ntbl)
+        # same labels, but different arguments or functions
+        result = func(self._negated)
+        self.assertEqual(result.struct.loc["row1", "col1"].item(), -2)
+        result = tabularize(checkpoint=checkpoint)(triple)(self._ntbl)
+        self.assertEqual(result.struct.loc["row1", "col1"].item(), 3)
+        CALLS.clear()
+        func(self._negated)
+        self.assertEqual(CALLS, [0])
+
+    def test_partial_line(self):
+        checkpoint = Checkpoint(self._path)
+        tabularize(checkpoint=checkpoint)(triple)(self._ntbl)
+        with open(self._path, "a") as fo:
+            fo.write('{"key": "[\\"row')
+        self.assertEqual(len(checkpoint.load()), 6)
+        # records appended later are still readable
+        tabularize(checkpoint=checkpoint)(triple)(self._negated)
+        self.assertEqual(len(checkpoint.load()), 11)
+        with open(self._path) as fo:
+            self.assertEqual(len(fo.readlines()), 12)
+        checkpoint.clear()
+        self.assertFalse(os.path.exists(self._path))
@@ -23,6 +23,17 @@ class TestNTableAlchemy(unittest.TestCase):
         )
         assert_ntable_equivalent(result, expected)
 
+    def test_getitem_optional_group(self):
+        # the second group doesn't take part in the match of row1
+        result = self._ntbl_a.dim0.alchemy[r"(row)(2)?"]
+        expected = ntable(
+            {
+                "__ALCHEMY__1": {"col1": "r1c1", "col2": "r1c2"},
+                "__ALCHEMY____ALCHEMY__": {"col1": "r2c1", "col2": "r2c2"},
+            }
+        )
+        assert_ntable_equivalent(result, expected)
+
     def test_setitem(self):
         self._ntbl_a.dim0.alchemy["3"] = self._ntbl_a.dim0.alchemy[r"r.*(1)"]
         expected = ntable(
@@ -34,6 +45,18 @@ class TestNTableAlchemy(unittest.TestCase):
         )
         assert_ntable_equivalent(self._ntbl_a, expected)
 
+    def test_setitem_several_labels(self):
+        self._ntbl_a.dim0.alchemy["X"] = self._ntbl_a.dim0.alchemy[r"(row)\d"]
+        expected = ntable(
+            {
+                "row1": {"col1": "r1c1", "col2": "r1c2"},
+                "row2": {"col1": "r2c1", "col2": "r2c2"},
+                "X1": {"col1": "r1c1", "col2": "r1c2"},
+                "X2": {"col1": "r2c1", "col2": "r2c2"},
+            }
+        )
+        assert_ntable_equivalent(self._ntbl_a, expected)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,8 +4,9 @@ import numpy as np
 import pandas as pd
 import xarray as xr
 
-from tapr.main.conversion import ntable, tabulate
+from tapr.main.conversion import ntable, ntable_from_stream, tabulate
 from tapr.main.ntable import NTable
+from tapr.main.utils import NULL
 from tests.testing_utils import assert_ntable_equivalent
 
 
@@ -34,6 +35,36 @@ class TestNTable(unittest.TestCase):
         ntbl = ntable(self._dictionary)
         assert_ntable_equivalent(self._expected_ntbl, ntbl)
 
+    def test_ntable_dictionary_ragged(self):
+        dictionary = {
+            "x1": {"y1": 0, "y3": 2},
+            "x2": {"y2": 4, "y1": "three"},
+            "x3": NULL(),
+        }
+        ntbl = ntable(dictionary)
+        self.assertEqual(
+            list(ntbl.struct.label_index("dim1")), ["y1", "y3", "y2"]
+        )
+        self.assertTrue(ntbl.struct.loc["x1", "y2"].struct.item() is NULL())
+        self.assertEqual(ntbl.struct.loc["x2", "y2"].struct.item(), 4)
+        # a shallow leaf is indexed with the remaining labels
+        self.assertTrue(ntbl.struct.loc["x3", "y1"].struct.item() is NULL())
+        # one element per cell
+        self.assertEqual(len(ntbl.reflist), 9)
+
+    def test_ntable_from_stream(self):
+        stream = [
+            {"x1": {"y1": 0, "y2": "1"}},
+            (("x2", "y1"), "three"),
+            {"x1": {"y3": 2}, "x2": {"y2": 4}},
+            (("x2", "y3"), "5"),
+        ]
+        assert_ntable_equivalent(
+            self._expected_ntbl, ntable_from_stream(iter(stream))
+        )
+        sntbl = ntable_from_stream(iter(stream), sparse=True)
+        assert_ntable_equivalent(self._expected_ntbl, sntbl.to_dense())
+
     def test_ntable_dataframe(self):
         ntbl = ntable(self._dataframe, dims=("dim1", "dim0")).struct.T
         assert_ntable_equivalent(self._expected_ntbl, ntbl)
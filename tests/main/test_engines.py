@@ -1,14 +1,44 @@
+import threading
+import time
 import unittest
 
 
 from tapr.main.conversion import ntable
-from tapr.main.engines import StandardEngine, ThreadEngine, ProcessEngine
+from tapr.main.engines import (
+    StandardEngine,
+    ThreadEngine,
+    ProcessEngine,
+    CancelToken,
+    TimedOut,
+    Cancelled,
+)
+from tapr.main.tabularization import tabularize
+from tapr.main.handling import handled
 
 
 def func(a, b):
     return a + b
 
 
+def sleepy(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+class Flaky:
+    def __init__(self, failures):
+        self._failures = failures
+        self._lock = threading.Lock()
+
+    def __call__(self, a):
+        with self._lock:
+            self._failures -= 1
+            failing = self._failures >= 0
+        if failing:
+            raise ConnectionError("try again")
+        return a
+
+
 class TestStandardEngine(unittest.TestCase):
     def setUp(self):
         self._ntbl_a = ntable(
@@ -96,5 +126,69 @@ class TestProcessEngine(unittest.TestCase):
         )
 
 
+class TestPolicies(unittest.TestCase):
+    def test_process_timeout(self):
+        engine = ProcessEngine(2, timeout=0.5)
+        start = time.monotonic()
+        result = engine.__tapr_engine_map__(sleepy, [0, 30, 0.1, 0])
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(result, [0, TimedOut(0.5), 0.1, 0])
+
+    def test_thread_timeout(self):
+        engine = ThreadEngine(2, timeout=0.2)
+        result = engine.__tapr_engine_map__(sleepy, [0, 1, 0])
+        self.assertEqual(result, [0, TimedOut(0.2), 0])
+
+        # the elements queued behind a stuck thread still run
+        engine = ThreadEngine(1, timeout=0.3)
+        result = engine.__tapr_engine_map__(sleepy, [2, 0, 0.1, 0])
+        self.assertEqual(result, [TimedOut(0.3), 0, 0.1, 0])
+
+        # timeouts are measured from when elements start, not from when the
+        # engine starts waiting for them
+        engine = ThreadEngine(2, timeout=0.3)
+        result = engine.__tapr_engine_map__(sleepy, [0.25, 0.5])
+        self.assertEqual(result, [0.25, TimedOut(0.3)])
+        engine = ThreadEngine(1, timeout=0.3)
+        result = engine.__tapr_engine_map__(sleepy, [0.2, 0.2])
+        self.assertEqual(result, [0.2, 0.2])
+
+    def test_retries(self):
+        engine = ThreadEngine(1, retries=2, retry_on=(ConnectionError,))
+        self.assertEqual(engine.__tapr_engine_map__(Flaky(2), [1]), [1])
+        with self.assertRaises(ConnectionError):
+            engine.__tapr_engine_map__(Flaky(3), [1])
+
+        # exceptions handled by NTable operations are retried too
+        ntbl = ntable({"a": 1, "b": 2})
+        result = tabularize(StandardEngine(retries=1))(handled(Flaky(1)))(ntbl)
+        self.assertEqual(result.struct.loc["a"].item(), 1)
+        result = tabularize(StandardEngine(retries=1, retry_on=(KeyError,)))(
+            handled(Flaky(1))
+        )(ntbl)
+        self.assertEqual(len(result.error_report()), 1)
+
+    def test_cancel(self):
+        token = CancelToken()
+        engine = ThreadEngine(1, cancel=token)
+        threading.Timer(0.3, token.cancel).start()
+        result = engine.__tapr_engine_map__(sleepy, [0, 0.1] + [1] * 5)
+        self.assertEqual(result[:2], [0, 0.1])
+        self.assertTrue(all(isinstance(r, Cancelled) for r in result[3:]))
+
+        # partial results survive in the NTable, and are reported
+        ntbl = ntable({"a": 1, "b": 2})
+        result = tabularize(StandardEngine(cancel=token))(abs)(ntbl)
+        self.assertEqual(len(result.error_report()), 2)
+        token.reset()
+        self.assertEqual(
+            tabularize(StandardEngine(cancel=token))(abs)(ntbl)
+            .struct.loc["b"]
+            .item(),
+            2,
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
+
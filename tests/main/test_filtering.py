@@ -0,0 +1,61 @@
+import unittest
+
+from tapr.main.conversion import ntable
+from tapr.main.filtering import isin, contains, matches
+from tests.testing_utils import assert_ntable_equivalent
+
+
+class TestPredicates(unittest.TestCase):
+    def test_isin(self):
+        self.assertTrue(isin(["a", "b"])("a"))
+        self.assertFalse(isin(["a", "b"])("c"))
+
+    def test_contains(self):
+        self.assertTrue(contains("ow")("row1"))
+        self.assertFalse(contains("col")("row1"))
+
+    def test_matches(self):
+        self.assertTrue(matches(r"r.*1")("row1"))
+        self.assertFalse(matches(r"r.*1")("row2"))
+
+
+class TestNTableFilter(unittest.TestCase):
+    def setUp(self):
+        self._ntbl_a = ntable(
+            {
+                "row1": {"col1": "r1c1", "col2": "r1c2"},
+                "row2": {"col1": "r2c1", "col2": "r2c2"},
+                "row3": {"col1": "r3c1", "col2": "r3c2"},
+            }
+        )
+
+    def test_getitem(self):
+        result = self._ntbl_a.filter[
+            {"dim0": matches(r"row[13]"), "dim1": contains("2")}
+        ]
+        expected = ntable(
+            {
+                "row1": {"col2": "r1c2"},
+                "row3": {"col2": "r3c2"},
+            }
+        )
+        assert_ntable_equivalent(result, expected)
+
+    def test_call(self):
+        result = self._ntbl_a.filter(dim0=isin({"row2"}))
+        expected = ntable({"row2": {"col1": "r2c1", "col2": "r2c2"}})
+        assert_ntable_equivalent(result, expected)
+
+    def test_plain_function(self):
+        result = self._ntbl_a.filter[{"dim0": lambda label: label > "row2"}]
+        expected = ntable({"row3": {"col1": "r3c1", "col2": "r3c2"}})
+        assert_ntable_equivalent(result, expected)
+
+    def test_bad_dim(self):
+        self.assertRaises(
+            ValueError, self._ntbl_a.filter.__getitem__, {"dim2": isin([])}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
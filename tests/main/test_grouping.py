@@ -0,0 +1,91 @@
+import operator as op
+import unittest
+
+from tapr.main.conversion import ntable
+from tapr.main.engines import ThreadEngine
+from tests.testing_utils import assert_ntable_equivalent
+
+
+def first_letter(label):
+    return label[0]
+
+
+def count_labels(ntbl):
+    return len(ntbl.ntable_map("dim0"))
+
+
+class TestNTableGroupBy(unittest.TestCase):
+    def setUp(self):
+        self._ntbl_a = ntable(
+            {
+                "a1": {"col1": "a1c1", "col2": "a1c2"},
+                "b1": {"col1": "b1c1", "col2": "b1c2"},
+                "a2": {"col1": "a2c1", "col2": "a2c2"},
+            },
+            engine=ThreadEngine(2),
+        )
+        self._groupby = self._ntbl_a.struct.groupby("dim0", first_letter)
+
+    def test_groups(self):
+        self.assertListEqual(self._groupby.keys(), ["a", "b"])
+        expected = ntable(
+            {
+                "a1": {"col1": "a1c1", "col2": "a1c2"},
+                "a2": {"col1": "a2c1", "col2": "a2c2"},
+            }
+        )
+        assert_ntable_equivalent(self._groupby["a"], expected)
+        self.assertListEqual([key for key, _ in self._groupby], ["a", "b"])
+
+    def test_apply(self):
+        result = self._groupby.apply(count_labels)
+        expected = ntable({"a": 2, "b": 1}, dims=("dim0",))
+        assert_ntable_equivalent(result, expected)
+
+        # results that keep dim are concatenated along it
+        result = self._groupby.apply(lambda ntbl: ntbl)
+        expected = ntable(
+            {
+                "a1": {"col1": "a1c1", "col2": "a1c2"},
+                "a2": {"col1": "a2c1", "col2": "a2c2"},
+                "b1": {"col1": "b1c1", "col2": "b1c2"},
+            }
+        )
+        assert_ntable_equivalent(result, expected)
+
+    def test_reduce(self):
+        result = self._groupby.reduce(op.add)
+        expected = ntable(
+            {
+                "col1": {"a": "a1c1a2c1", "b": "b1c1"},
+                "col2": {"a": "a1c2a2c2", "b": "b1c2"},
+            },
+            dims=("dim1", "dim0"),
+        )
+        assert_ntable_equivalent(result, expected)
+
+    def test_missing_keys(self):
+        # None and NaN keys form a single group
+        keys = {"a1": "a", "b1": None, "a2": float("nan")}
+        groupby = self._ntbl_a.struct.groupby("dim0", keys.get)
+        self.assertEqual(len(groupby), 2)
+        self.assertEqual(groupby.keys(), ["a", None])
+        expected = ntable(
+            {
+                "b1": {"col1": "b1c1", "col2": "b1c2"},
+                "a2": {"col1": "a2c1", "col2": "a2c2"},
+            }
+        )
+        assert_ntable_equivalent(groupby[None], expected)
+        assert_ntable_equivalent(groupby[float("nan")], expected)
+        with self.assertRaises(KeyError):
+            self._groupby[None]
+
+    def test_bad_dim(self):
+        self.assertRaises(
+            ValueError, self._ntbl_a.struct.groupby, "dim2", first_letter
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import threading
+import unittest
+
+from tapr.main.conversion import ntable
+from tapr.main.handling import (
+    handled,
+    error_policy,
+    FunctionError,
+    ErrorRecord,
+)
+from tapr.main.utils import NULL
+
+
+class TestHandling(unittest.TestCase):
+    def setUp(self):
+        self._ntbl = ntable(
+            {
+                "row1": {"col1": 1, "col2": 0},
+                "row2": {"col1": 0, "col2": 4},
+            }
+        )
+
+    def test_function_error(self):
+        result = 1 / self._ntbl
+        self.assertTrue(
+            isinstance(result.struct.loc["row1", "col2"].item(), FunctionError)
+        )
+        report = result.error_report()
+        self.assertEqual(
+            [coords for coords, _ in report],
+            [
+                {"dim0": "row1", "dim1": "col2"},
+                {"dim0": "row2", "dim1": "col1"},
+            ],
+        )
+
+    def test_record(self):
+        with error_policy("record"):
+            result = 1 / self._ntbl
+        error = result.struct.loc["row2", "col1"].item()
+        self.assertTrue(isinstance(error, ErrorRecord))
+        self.assertIs(error.exc_type, ZeroDivisionError)
+        self.assertIn("ZeroDivisionError", error.traceback)
+        self.assertEqual(error.coords, {"dim0": "row2", "dim1": "col1"})
+        self.assertFalse(hasattr(error, "__dict__"))
+        self.assertEqual(result.struct.loc["row2", "col2"].item(), 0.25)
+        # views keep the error indices of the NTable they were taken from
+        self.assertEqual(len(result.struct[0:1].error_report()), 1)
+
+    def test_null_and_raise(self):
+        with error_policy("null"):
+            result = 1 / self._ntbl
+        self.assertTrue(result.struct.loc["row1", "col2"].item() is NULL())
+        self.assertEqual(result.error_report(), [])
+
+        with error_policy("raise"):
+            with self.assertRaises(ZeroDivisionError):
+                1 / self._ntbl
+
+        with self.assertRaises(ValueError):
+            with error_policy("ignore"):
+                pass
+
+    def test_policy_per_thread(self):
+        entered = threading.Event()
+        done = threading.Event()
+        results = []
+
+        def record():
+            with error_policy("record"):
+                entered.set()
+                done.wait(5)
+                results.append(1 / self._ntbl)
+
+        thread = threading.Thread(target=record)
+        thread.start()
+        entered.wait(5)
+        # the policy of the other thread doesn't leak into this one
+        result = 1 / self._ntbl
+        done.set()
+        thread.join()
+        self.assertTrue(
+            isinstance(result.struct.loc["row1", "col2"].item(), FunctionError)
+        )
+        self.assertTrue(
+            isinstance(results[0].struct.loc["row1", "col2"].item(), ErrorRecord)
+        )
+
+    def test_handled_equal(self):
+        self.assertEqual(handled(divmod), handled(divmod))
+        self.assertEqual(hash(handled(divmod)), hash(handled(divmod)))
+        self.assertNotEqual(handled(divmod), handled(divmod, "record"))
+        self.assertIs(handled(divmod, "raise"), divmod)
+
+    def test_lazy_error_indices(self):
+        result = 1 / self._ntbl
+        # errors are only looked for when a report is asked for
+        self.assertIsNone(result._errors)
+        self.assertEqual(len(result.error_report()), 2)
+        self.assertEqual(list(result._errors), [1, 2])
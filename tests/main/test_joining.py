@@ -0,0 +1,114 @@
+import unittest
+
+from tapr.main import joining
+from tapr.main.conversion import ntable
+from tapr.main.ntable import NTable
+from tapr.main.utils import NULL
+from tests.testing_utils import assert_ntable_equivalent
+
+
+class TestJoining(unittest.TestCase):
+    def setUp(self):
+        self._ntbl_a = ntable(
+            {
+                "row1": {"col1": 1, "col2": 2},
+                "row2": {"col1": 3, "col2": 4},
+                "row3": {"col1": 5, "col2": 6},
+            }
+        )
+        self._ntbl_b = ntable(
+            {
+                "row3": {"col1": "e", "col2": "f"},
+                "row4": {"col1": "g", "col2": "h"},
+                "row1": {"col1": "a", "col2": "b"},
+            }
+        )
+
+    def test_inner(self):
+        left, right = joining.align(self._ntbl_a, self._ntbl_b, dims=["dim0"])
+        assert_ntable_equivalent(
+            left,
+            ntable(
+                {
+                    "row1": {"col1": 1, "col2": 2},
+                    "row3": {"col1": 5, "col2": 6},
+                }
+            ),
+        )
+        assert_ntable_equivalent(
+            right,
+            ntable(
+                {
+                    "row1": {"col1": "a", "col2": "b"},
+                    "row3": {"col1": "e", "col2": "f"},
+                }
+            ),
+        )
+        self.assertEqual(left.refmap.dtype.kind, "i")
+        # no labels are missing, so the reflist is shared
+        self.assertIs(left.reflist, self._ntbl_a.reflist)
+
+    def test_left(self):
+        left, right = joining.align(
+            self._ntbl_a, self._ntbl_b, how="left", fill_value=None
+        )
+        assert_ntable_equivalent(left, self._ntbl_a)
+        assert_ntable_equivalent(
+            right,
+            ntable(
+                {
+                    "row1": {"col1": "a", "col2": "b"},
+                    "row2": {"col1": None, "col2": None},
+                    "row3": {"col1": "e", "col2": "f"},
+                }
+            ),
+        )
+        self.assertEqual(right.refmap.dtype.kind, "i")
+        self.assertEqual(len(right.reflist), len(self._ntbl_b.reflist) + 1)
+
+    def test_outer(self):
+        left, right = joining.align(self._ntbl_a, self._ntbl_b, how="outer")
+        self.assertEqual(
+            list(left.struct.label_index("dim0")),
+            ["row1", "row2", "row3", "row4"],
+        )
+        self.assertTrue(left.struct.loc["row4", "col1"].struct.item() is NULL())
+        self.assertTrue(right.struct.loc["row2", "col2"].struct.item() is NULL())
+        self.assertEqual(right.struct.loc["row4", "col2"].struct.item(), "h")
+        # the source NTable objects are left untouched
+        self.assertEqual(len(self._ntbl_b.struct.label_index("dim0")), 3)
+
+    def test_mismatched(self):
+        with self.assertRaises(ValueError):
+            joining.align(self._ntbl_a, self._ntbl_b, dims=["dim1"])
+        with self.assertRaises(ValueError):
+            joining.align(self._ntbl_a, self._ntbl_b, how="cross")
+        with self.assertRaises(ValueError):
+            joining.align(self._ntbl_a, self._ntbl_b, dims=["dim2"])
+
+    def test_join(self):
+        result = joining.join(
+            self._ntbl_a, self._ntbl_b, how="left", fill_value=None
+        )
+        self.assertEqual(
+            list(result.struct.label_index("dim0")), ["row1", "row2", "row3"]
+        )
+        self.assertEqual(result.struct.loc["row1", "col2"].item(), (2, "b"))
+        self.assertEqual(result.struct.loc["row2", "col1"].item(), (3, None))
+
+    def test_coords(self):
+        ntbl = NTable(
+            self._ntbl_b.reflist,
+            self._ntbl_b.refmap.assign_coords(
+                name=("dim0", ["three", "four", "one"]), source="b"
+            ),
+        )
+        left, right = joining.align(self._ntbl_a, ntbl, how="left")
+        self.assertEqual(
+            list(right.refmap.coords["name"].values), ["one", None, "three"]
+        )
+        self.assertEqual(right.refmap.coords["source"].item(), "b")
+        # no labels are missing, so the reflists are shared
+        self.assertIs(left.reflist, self._ntbl_a.reflist)
+        left.struct.loc["row1", "col1"] = 0
+        self.assertEqual(self._ntbl_a.struct.loc["row1", "col1"].item(), 1)
@@ -0,0 +1,127 @@
+import tempfile
+import unittest
+import weakref
+
+import numpy as np
+
+from tapr.main.conversion import ntable
+from tapr.main.memoization import MemoCache
+from tapr.main.tabularization import tabularize
+from tests.testing_utils import assert_ntable_equivalent
+
+
+ADD_CALLS = []
+
+
+def add(a, b):
+    ADD_CALLS.append(a)
+    return a + b
+
+
+class Counter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, a, b):
+        self.calls.append(a)
+        return a + b
+
+
+class TestMemoCache(unittest.TestCase):
+    def setUp(self):
+        self._ntbl_a = ntable(
+            {
+                "row1": {"col1": 1, "col2": 2},
+                "row2": {"col1": 3, "col2": 4},
+            }
+        )
+        self._expected = ntable(
+            {
+                "row1": {"col1": 11, "col2": 12},
+                "row2": {"col1": 13, "col2": 14},
+            }
+        )
+
+    def test_memoized_call(self):
+        func = Counter()
+        cache = MemoCache()
+        tfunc = tabularize(cache=cache)(func)
+        assert_ntable_equivalent(tfunc(self._ntbl_a, 10), self._expected)
+        self.assertEqual(len(func.calls), 4)
+
+        self._ntbl_a.struct.loc["row2", "col2"] = 5
+        result = tfunc(self._ntbl_a, 10)
+        self.assertListEqual(list(result.struct.flat), [11, 12, 13, 15])
+        self.assertListEqual(func.calls, [1, 2, 3, 4, 5])
+        self.assertEqual(cache.hits, 3)
+
+    def test_unhashable_arguments(self):
+        func = Counter()
+        tfunc = tabularize(cache=MemoCache())(func)
+        array = np.arange(3)
+        tfunc(self._ntbl_a, array)
+        tfunc(self._ntbl_a, array)
+        self.assertEqual(len(func.calls), 4)
+
+    def test_identity_hashed_arguments(self):
+        class Box:
+            def __init__(self, value):
+                self.value = value
+
+        def add(x, box):
+            return x + box.value
+
+        cache = MemoCache()
+        tfunc = tabularize(cache=cache)(add)
+        box = Box(10)
+        tfunc(self._ntbl_a, box)
+        # objects hashed by identity aren't kept alive by the cache, and
+        # aren't memoized, so modifying them doesn't give stale results
+        self.assertEqual(len(cache), 0)
+        reference = weakref.ref(box)
+        box.value = 20
+        result = tfunc(self._ntbl_a, box)
+        self.assertListEqual(list(result.struct.flat), [21, 22, 23, 24])
+        del box
+        self.assertIsNone(reference())
+
+    def test_eviction(self):
+        cache = MemoCache(maxsize=2)
+        tabularize(cache=cache)(Counter())(self._ntbl_a, 10)
+        self.assertEqual(len(cache), 2)
+
+        cache = MemoCache(maxsize=None, maxbytes=1)
+        tabularize(cache=cache)(Counter())(self._ntbl_a, 10)
+        self.assertEqual(len(cache), 0)
+
+    def test_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            tabularize(cache=MemoCache(directory=directory))(add)(
+                self._ntbl_a, 10
+            )
+            ADD_CALLS.clear()
+            result = tabularize(cache=MemoCache(directory=directory))(add)(
+                self._ntbl_a, 10
+            )
+        assert_ntable_equivalent(result, self._expected)
+        self.assertListEqual(ADD_CALLS, [])
+
+    def test_directory_function_identity(self):
+        def offset(n):
+            return lambda a: a + n
+
+        with tempfile.TemporaryDirectory() as directory:
+            # lambdas and closures share names, but not code or closures
+            results = [
+                tabularize(cache=MemoCache(directory=directory))(func)(
+                    self._ntbl_a
+                )
+                for func in (lambda a: a * 2, lambda a: a * 3, offset(1), offset(2))
+            ]
+        self.assertListEqual(
+            [result.struct.loc["row1", "col2"].item() for result in results],
+            [4, 6, 3, 4],
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+import io
+import json
 import unittest
 
 from dataclasses import dataclass
@@ -9,7 +11,7 @@ import xarray as xr
 import operator as op
 
 from tapr.main.ntable import NTable
-from tapr.main.conversion import ntable
+from tapr.main.conversion import ntable, ntable_from_stream
 from tapr.main.handling import FunctionError
 from tapr.main.alchemy import NTableMapAlchemy, NTableAlchemy
 from tests.testing_utils import assert_ntable_equivalent
@@ -82,6 +84,45 @@ class TestNTableCoversion(unittest.TestCase):
             },
         )
 
+    def test_to_dictionary_nested(self):
+        ntbl = ntable(
+            {
+                "a": {"x": {"p": 1, "q": 2}, "y": {"p": 3, "q": 4}},
+                "b": {"x": {"p": 5, "q": 6}, "y": {"p": 7, "q": 8}},
+            }
+        )
+        into = OrderedDict()
+        result = ntbl.to_dictionary(into)
+        self.assertIs(result, into)
+        self.assertTrue(isinstance(result["b"]["y"], OrderedDict))
+        self.assertEqual(result["b"]["y"]["q"], 8)
+        result = ntbl.to_dictionary(OrderedDict(), enforce_nested_typing=False)
+        self.assertEqual(type(result["a"]), dict)
+
+    def test_to_paths(self):
+        self.assertEqual(
+            list(self._ntable_a.to_paths()),
+            [
+                (("x1", "y1"), 0),
+                (("x1", "y2"), "1"),
+                (("x1", "y3"), 2),
+                (("x2", "y1"), "three"),
+                (("x2", "y2"), 4),
+                (("x2", "y3"), "5"),
+            ],
+        )
+
+    def test_to_json_lines(self):
+        lines = list(self._ntable_a.to_json_lines())
+        self.assertEqual(lines[0], '{"x1": {"y1": 0}}')
+        fo = io.StringIO()
+        self._ntable_a.to_json_lines(fo)
+        result = ntable_from_stream(
+            (json.loads(line) for line in fo.getvalue().splitlines()),
+            dims=("dim_0", "dim_1"),
+        )
+        assert_ntable_equivalent(result, self._ntable_a)
+
     def test_to_pandas(self):
         dframe = self._ntable_a.to_pandas()
         test_dframe = pd.DataFrame(
@@ -103,6 +144,84 @@ class TestNTableCoversion(unittest.TestCase):
         )
         xr.testing.assert_equal(darray, test_darray)
 
+    def test_typed_round_trip(self):
+        dframe = pd.DataFrame(
+            np.arange(12, dtype="float32").reshape(4, 3),
+            index=["a", "b", "c", "d"],
+            columns=["x", "y", "z"],
+        )
+        ntbl = ntable(dframe)
+        # the elements are not boxed, and the data isn't copied
+        self.assertTrue(isinstance(ntbl.reflist, np.ndarray))
+        self.assertTrue(np.shares_memory(ntbl.reflist, dframe.values))
+        result = ntbl.to_pandas()
+        self.assertTrue((result.dtypes == "float32").all())
+        np.testing.assert_array_equal(result.values, dframe.values)
+        self.assertEqual(ntbl.struct.loc["b", "z"].item(), 5)
+
+        darray = ntable(
+            xr.DataArray(
+                np.arange(6).reshape(2, 3),
+                coords={"r": [0, 1], "c": [0, 1, 2]},
+                dims=["r", "c"],
+            )
+        ).to_data_array()
+        self.assertEqual(darray.dtype, np.arange(1).dtype)
+        np.testing.assert_array_equal(darray.values, np.arange(6).reshape(2, 3))
+
+    def test_typed_write(self):
+        dframe = pd.DataFrame(np.zeros((2, 2)))
+        ntbl = ntable(dframe)
+        ntbl.struct.loc[0, 0] = 3.0
+        # the data the NTable was converted from is left untouched
+        self.assertEqual(dframe.values.sum(), 0)
+        self.assertTrue(isinstance(ntbl.reflist, np.ndarray))
+        # writing an element that doesn't fit the dtype falls back to a list
+        ntbl.struct.loc[0, 1] = "text"
+        self.assertTrue(isinstance(ntbl.reflist, list))
+        self.assertEqual(
+            list(ntbl.to_data_array().values.flat), [3.0, "text", 0.0, 0.0]
+        )
+
+        array = np.zeros((2, 2))
+        ntbl = ntable(array)
+        ntbl.struct[0, 0] = 3.0
+        self.assertEqual(array.sum(), 0)
+        self.assertEqual(ntbl.struct[0, 0].item(), 3)
+
+        darray = xr.DataArray(
+            np.zeros(2), coords={"r": [0, 1]}, dims=["r"]
+        )
+        ntbl = ntable(darray)
+        ntbl.struct[1] = 3.0
+        self.assertEqual(darray.values.sum(), 0)
+
+    def test_typed_write_exact(self):
+        # values that would be changed by the dtype fall back to a list
+        ntbl = ntable(np.zeros(3, dtype="int8"))
+        ntbl.struct[0] = 100
+        self.assertTrue(isinstance(ntbl.reflist, np.ndarray))
+        ntbl.struct[1] = 300
+        self.assertTrue(isinstance(ntbl.reflist, list))
+        self.assertEqual(ntbl.struct[1].item(), 300)
+
+        # and so do values of another kind, whose type would be lost
+        ntbl = ntable(np.zeros(3))
+        ntbl.struct[0] = np.float32(0.5)
+        self.assertTrue(isinstance(ntbl.reflist, np.ndarray))
+        ntbl.struct[1] = True
+        self.assertTrue(isinstance(ntbl.reflist, list))
+        self.assertIs(ntbl.struct[1].item(), True)
+
+        ntbl = ntable(np.zeros(3))
+        ntbl.struct[0] = 2
+        self.assertIs(type(ntbl.struct[0].item()), int)
+
+        ntbl = ntable(np.zeros(3, dtype="float32"))
+        ntbl.struct[0] = 0.1
+        self.assertTrue(isinstance(ntbl.reflist, list))
+        self.assertEqual(ntbl.struct[0].item(), 0.1)
+
 
 class TestNTableCore(unittest.TestCase):
     def setUp(self):
@@ -163,6 +282,21 @@ class TestNTableCore(unittest.TestCase):
         for result, expected in zip(self._ntbl_a, expecteds):
             assert_ntable_equivalent(result, expected)
 
+    def test_iterate(self):
+        results = list(self._ntbl_a)
+        self.assertEqual(len(results), 4)
+        # every step shares one refmap
+        self.assertIs(results[0].refmap, results[-1].refmap)
+
+        arrays = list(self._ntbl_d.struct.iterate(raw=True))
+        self.assertEqual(len(arrays), 3)
+        self.assertEqual(arrays[1].shape, (2, 2))
+        self.assertEqual(arrays[1].tolist(), [[1, 1], [1, 1]])
+
+        # iteration stops with the shortest element
+        ntbl = ntable({"row1": {"col1": [1, 2], "col2": [1, 2, 3]}})
+        self.assertEqual(len(list(ntbl.struct.iterate(raw=True))), 2)
+
     def test_getitem(self):
         # in bounds
         expected = ntable(
@@ -371,6 +505,28 @@ class TestNTableMap(unittest.TestCase):
         assert_ntable_equivalent(self._ntbl_a, expected)
 
 
+    def test_len_iter_contains(self):
+        dim0_map = self._ntbl_a.ntable_map("dim0")
+        self.assertEqual(len(dim0_map), 2)
+        self.assertListEqual(list(dim0_map), ["row1", "row2"])
+        self.assertTrue("row1" in dim0_map)
+        self.assertFalse("row3" in dim0_map)
+        self.assertFalse(["row1"] in dim0_map)
+
+    def test_getitem_list_key(self):
+        dim0_map = self._ntbl_a.ntable_map("dim0")
+        result = dim0_map[["row2", "row1"]]
+        expected = ntable(
+            {
+                "row2": {"col1": "r2c1", "col2": "r2c2"},
+                "row1": {"col1": "r1c1", "col2": "r1c2"},
+            }
+        )
+        assert_ntable_equivalent(result, expected)
+        self.assertRaises(KeyError, dim0_map.__getitem__, ["row1", "row3"])
+        self.assertRaises(KeyError, dim0_map.__getitem__, "row3")
+
+
 class TestTabularizedAttributes(unittest.TestCase):
     def setUp(self):
         self._ntbl_a = ntable(
@@ -37,6 +37,17 @@ class TestBroadcastTables(unittest.TestCase):
         test_ntbl2 = NTable(reflist, self._ntbl_a.refmap)
         assert_ntable_equivalent(ntbl2, test_ntbl2)
 
+    def test_broadcast_tables_shared(self):
+        ntbl1, ntbl2 = broadcast_tables(self._ntbl_a, self._ntbl_b)
+        self.assertTrue(ntbl1.reflist is self._ntbl_a.reflist)
+        # the input isn't marked shared, so writing to it doesn't copy it
+        reflist = self._ntbl_a.reflist
+        self._ntbl_a.struct[0, 0] = "test"
+        self.assertTrue(self._ntbl_a.reflist is reflist)
+        # while writing to a broadcast table does
+        ntbl2.struct[0, 0] = "test"
+        self.assertListEqual(list(self._ntbl_b.struct.flat), ["c1", "c2"])
+
     def test_broadcast_tables_bad(self):
         ntbl1, ntbl2 = broadcast_tables(self._ntbl_a, self._ntbl_c)
         test_ntbl1 = ntable(
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import threading
+import unittest
+
+from tapr.main.conversion import ntable
+from tapr.main.engines import ThreadEngine
+from tapr.main.memoization import MemoCache
+from tapr.main.tabularization import tabularize
+from tapr.main import profiling
+from tapr.main.profiling import profile
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self._ntbl = ntable(
+            {
+                "row1": {"col1": 1, "col2": 2},
+                "row2": {"col1": 3, "col2": 4},
+            }
+        )
+
+    def test_profile(self):
+        with profile() as profiler:
+            result = self._ntbl + self._ntbl
+            tabularize(ThreadEngine(2))(abs)(self._ntbl)
+        self.assertIsNone(profiling.active())
+        self.assertEqual(result.struct.loc["row2", "col2"].item(), 8)
+        stats = profiler.stats
+        for stage in (
+            "tabulate",
+            "broadcast_tables",
+            "validation",
+            "engine",
+            "function",
+            "assembly",
+        ):
+            self.assertIn(stage, stats)
+        # tabulate maps over elements too
+        self.assertGreaterEqual(stats["function"]["calls"], 8)
+        engine_calls = stats["engine"]["calls"]
+        # tabulate broadcasts tables, whose time isn't part of its self time
+        self.assertLess(stats["tabulate"]["self_wall"], stats["tabulate"]["wall"])
+        self.assertTrue(profiler.report().startswith("stage"))
+
+        # nothing is recorded once the profiler isn't active anymore
+        self._ntbl + self._ntbl
+        self.assertEqual(profiler.stats["engine"]["calls"], engine_calls)
+
+    def test_cache(self):
+        # elements mapped through a cache aren't profiled individually
+        negated = -self._ntbl
+        with profile() as profiler:
+            tabularize()(abs)(negated)
+        with profile() as cached_profiler:
+            result = tabularize(cache=MemoCache())(abs)(negated)
+        self.assertEqual(
+            profiler.stats["function"]["calls"]
+            - cached_profiler.stats["function"]["calls"],
+            4,
+        )
+        self.assertEqual(result.struct.loc["row1", "col2"].item(), 2)
+
+    def test_threads(self):
+        # a profiler isn't active in the other threads
+        seen = []
+
+        def work():
+            seen.append(profiling.active())
+            with profile() as other:
+                self._ntbl + self._ntbl
+            seen.append(other)
+
+        with profile() as profiler:
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+            self.assertIs(profiling.active(), profiler)
+        self.assertIsNone(seen[0])
+        self.assertEqual(profiler.stats, {})
+        self.assertIn("engine", seen[1].stats)
+
+    def test_environment(self):
+        code = "import tapr; tapr.ntable({'a': 1}) + 1"
+        env = dict(os.environ, TAPR_PROFILE="1")
+        process = subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True
+        )
+        self.assertIn("tapr profile", process.stderr)
+        self.assertIn("engine", process.stderr)
@@ -0,0 +1,54 @@
+import io
+import logging
+import time
+import unittest
+
+from tapr.main.conversion import ntable
+from tapr.main.engines import StandardEngine, ThreadEngine, ProcessEngine
+from tapr.main.tabularization import tabularize
+from tapr.main.handling import handled
+from tapr.main.progress import TextProgressBar, LoggingProgress, ProgressStats
+
+
+def slow_inverse(x):
+    time.sleep(x / 100)
+    return 1 / x
+
+
+class TestProgress(unittest.TestCase):
+    def setUp(self):
+        self._ntbl = ntable(
+            {
+                "row1": {"col1": 1, "col2": 0},
+                "row2": {"col1": 5, "col2": 2},
+            }
+        )
+
+    def _check(self, engine, stats):
+        result = tabularize(engine)(handled(slow_inverse))(self._ntbl)
+        self.assertEqual(result.struct.loc["row2", "col2"].item(), 0.5)
+        self.assertEqual((stats.total, stats.submitted), (4, 4))
+        self.assertEqual((stats.done, stats.failed), (4, 1))
+        self.assertEqual(len(stats.durations), 4)
+        self.assertEqual(int(stats.histogram(bins=2)[0].sum()), 4)
+        slowest = stats.slowest(1, result)
+        self.assertEqual(slowest[0][0], ("row2", "col1"))
+        self.assertGreater(slowest[0][1], 0.04)
+
+    def test_engines(self):
+        stats = ProgressStats()
+        self._check(StandardEngine(progress=stats), stats)
+        self._check(ThreadEngine(2, progress=[stats]), stats)
+        self._check(ProcessEngine(2, progress=stats), stats)
+
+    def test_sinks(self):
+        file = io.StringIO()
+        with self.assertLogs("tapr", level=logging.INFO) as logs:
+            tabularize(
+                StandardEngine(
+                    progress=[TextProgressBar(file, width=4), LoggingProgress()]
+                )
+            )(handled(slow_inverse))(self._ntbl)
+        self.assertTrue(file.getvalue().endswith("[####] 4/4 (100%) 1 failed 00:00<00:00\n"))
+        self.assertIn("WARNING:tapr:element 1 of 4 failed", logs.output)
+        self.assertIn("4/4 elements done (100%), 1 failed", logs.output[-1])
@@ -0,0 +1,71 @@
+import operator as op
+import unittest
+
+import numpy as np
+
+from tapr.main import reduction
+from tapr.main.conversion import ntable
+from tapr.main.engines import ThreadEngine
+from tests.testing_utils import assert_ntable_equivalent
+
+
+class TestReduction(unittest.TestCase):
+    def setUp(self):
+        self._ntbl_a = ntable(
+            {
+                "row1": {"col1": 1, "col2": 2},
+                "row2": {"col1": 3, "col2": 4},
+                "row3": {"col1": 5, "col2": 6},
+            }
+        )
+        self._ntbl_b = ntable(
+            {
+                "row1": {"col1": "a", "col2": "b"},
+                "row2": {"col1": "c", "col2": "d"},
+                "row3": {"col1": "e", "col2": "f"},
+            },
+            engine=ThreadEngine(4),
+        )
+
+    def test_reduce(self):
+        result = self._ntbl_b.reduce(op.add, "dim0")
+        expected = ntable({"col1": "ace", "col2": "bdf"}, dims=("dim1",))
+        assert_ntable_equivalent(result, expected)
+        self.assertTrue(isinstance(result.engine, ThreadEngine))
+
+        result = self._ntbl_b.reduce(op.add, "dim1")
+        expected = ntable(
+            {"row1": "ab", "row2": "cd", "row3": "ef"}, dims=("dim0",)
+        )
+        assert_ntable_equivalent(result, expected)
+
+    def test_reduce_to_element(self):
+        result = self._ntbl_b.dim1["col1"].reduce(op.add, "dim0")
+        self.assertEqual(result, "ace")
+
+    def test_sum_min_max(self):
+        expected = ntable({"col1": 9, "col2": 12}, dims=("dim1",))
+        assert_ntable_equivalent(reduction.reduce_sum(self._ntbl_a, "dim0"), expected)
+        expected = ntable({"col1": 1, "col2": 2}, dims=("dim1",))
+        assert_ntable_equivalent(reduction.reduce_min(self._ntbl_a, "dim0"), expected)
+        expected = ntable({"col1": 5, "col2": 6}, dims=("dim1",))
+        assert_ntable_equivalent(reduction.reduce_max(self._ntbl_a, "dim0"), expected)
+
+    def test_sum_exact(self):
+        # python ints don't overflow, and python bools add up as ints
+        ntbl = ntable({"row1": 2**62, "row2": 2**62})
+        self.assertEqual(reduction.reduce_sum(ntbl, "dim0"), 2**63)
+        ntbl = ntable({"row1": True, "row2": True})
+        self.assertEqual(reduction.reduce_sum(ntbl, "dim0"), 2)
+
+    def test_concat(self):
+        ntbl = ntable({"row1": np.arange(2), "row2": np.arange(3)})
+        result = reduction.concat(ntbl, "dim0")
+        np.testing.assert_array_equal(result, [0, 1, 0, 1, 2])
+
+    def test_bad_dim(self):
+        self.assertRaises(ValueError, reduction.reduce_sum, self._ntbl_a, "dim2")
+
+
+if __name__ == "__main__":
+    unittest.main()
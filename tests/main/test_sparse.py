@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from tapr.main.conversion import ntable
+from tapr.main.engines import ThreadEngine
+from tapr.main.qol import blank, sblank
+from tapr.main.sparse import SparseNTable
+from tapr.main.tabularization import tabularize
+from tapr.main.utils import NULL
+from tests.testing_utils import assert_ntable_equivalent
+
+
+class TestSparse(unittest.TestCase):
+    def setUp(self):
+        self._mapping = {
+            "row1": {"col1": 1, "col3": 3},
+            "row2": {"col2": 5},
+            "row3": {"col1": 7, "col2": 8},
+        }
+        self._sntbl = ntable(self._mapping, sparse=True)
+
+    def test_from_mapping(self):
+        self.assertEqual(self._sntbl.shape, (3, 3))
+        self.assertEqual(self._sntbl.nnz, 5)
+        self.assertAlmostEqual(self._sntbl.density, 5 / 9)
+        self.assertEqual(
+            list(self._sntbl.items()),
+            [
+                (("row1", "col1"), 1),
+                (("row1", "col3"), 3),
+                (("row2", "col2"), 5),
+                (("row3", "col1"), 7),
+                (("row3", "col2"), 8),
+            ],
+        )
+        assert_ntable_equivalent(self._sntbl.to_dense(), ntable(self._mapping))
+
+    def test_from_ntable(self):
+        sntbl = SparseNTable.from_ntable(ntable(self._mapping))
+        np.testing.assert_array_equal(sntbl.positions, self._sntbl.positions)
+        self.assertEqual(sntbl.reflist, self._sntbl.reflist)
+
+    def test_shallow_leaf(self):
+        mapping = {"row1": {"col1": 1}, "row2": {"col1": 2, "col2": 3}}
+        assert_ntable_equivalent(
+            ntable(mapping, sparse=True).to_dense(), ntable(mapping)
+        )
+
+    def test_tabularized(self):
+        calls = []
+
+        @tabularize(engine=ThreadEngine(2))
+        def add(x, y):
+            calls.append((x, y))
+            return x + y
+
+        # row1/col1, row3/col2 and row3/col3
+        other = SparseNTable(
+            [10, 30, 20],
+            [0, 7, 8],
+            self._sntbl.coords,
+            self._sntbl.dims,
+        )
+        result = add(self._sntbl, other)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(
+            list(result.items()),
+            [(("row1", "col1"), 11), (("row3", "col2"), 28)],
+        )
+
+        result = self._sntbl * 2
+        self.assertTrue(isinstance(result, SparseNTable))
+        self.assertEqual(result.reflist, [2, 6, 10, 14, 16])
+
+        with self.assertRaises(TypeError):
+            add(self._sntbl, ntable(self._mapping))
+
+    def test_blank(self):
+        sntbl = blank({"x": [1, 2], "y": ["a"]}, ("x", "y"), sparse=True)
+        self.assertEqual(sntbl.nnz, 0)
+        assert_ntable_equivalent(
+            sntbl.to_dense(), blank({"x": [1, 2], "y": ["a"]}, ("x", "y"))
+        )
+        sntbl = sblank(2, 3, sparse=True)
+        self.assertEqual(sntbl.shape, (2, 3))
+        assert_ntable_equivalent(sntbl.to_dense(), sblank(2, 3))
@@ -5,6 +5,7 @@ import pandas as pd
 import xarray as xr
 
 
+from tapr.main import defs
 from tapr.main.conversion import ntable
 from tapr.main.ntable import NTable
 from tests.testing_utils import assert_ntable_equivalent
@@ -87,6 +88,139 @@ class TestNTableStructure(unittest.TestCase):
         )
         assert_ntable_equivalent(self._ntbl_a, expected)
 
+    def test_flatter(self):
+        result = list(self._ntbl_a.struct.flatter(("dim1",)))
+        expected = [
+            self._ntbl_a.struct.loc["row1"],
+            self._ntbl_a.struct.loc["row2"],
+        ]
+        self.assertEqual(len(result), len(expected))
+        for result_, expected_ in zip(result, expected):
+            assert_ntable_equivalent(result_, expected_)
+            self.assertTrue(result_.reflist is self._ntbl_a.reflist)
+
+    def test_flatter_coords(self):
+        refmap = self._ntbl_a.refmap.assign_coords(
+            upper=("dim0", ["R1", "R2"]),
+            cell=(("dim0", "dim1"), [[1, 2], [3, 4]]),
+        )
+        ntbl = NTable(self._ntbl_a.reflist, refmap)
+        # non-index coordinates along flattened dimensions are kept, as
+        # with a label based selection
+        for result in ntbl.struct.flatter(("dim1",)):
+            label = result.refmap.coords["dim0"].item()
+            expected = ntbl.struct.loc[label].refmap
+            xr.testing.assert_identical(result.refmap, expected)
+        results = list(ntbl.struct.flatter())
+        self.assertEqual(results[3].refmap.coords["upper"].item(), "R2")
+        self.assertEqual(results[3].refmap.coords["cell"].item(), 4)
+
+    def test_compress(self):
+        result = self._ntbl_a.struct.compress(("dim0",))
+        self.assertEqual(result.struct.dims, ("dim1",))
+        for label, sub_ntbl in zip(["col1", "col2"], result.struct.flat):
+            assert_ntable_equivalent(
+                sub_ntbl, self._ntbl_a.struct.loc[:, label]
+            )
+
+    def test_setitem_copy_on_write(self):
+        view = self._ntbl_a.struct[0]
+        self.assertTrue(view.reflist is self._ntbl_a.reflist)
+
+        view.struct[0] = "test"
+        expected = NTable(["test", "r1c2"], self._ntbl_a.refmap[0])
+        assert_ntable_equivalent(view, expected)
+        self.assertListEqual(
+            list(self._ntbl_a.struct.flat), ["r1c1", "r1c2", "r2c1", "r2c2"]
+        )
+
+        self._ntbl_a.struct.loc["row1", "col2"] = "test"
+        self.assertListEqual(
+            list(self._ntbl_a.struct.flat), ["r1c1", "test", "r2c1", "r2c2"]
+        )
+        self.assertListEqual(list(view.struct.flat), ["test", "r1c2"])
+
+    def test_setitem_copy_cost(self):
+        ntbl = ntable(
+            {
+                f"row{i}": {f"col{j}": [i, j] for j in range(10)}
+                for i in range(100)
+            }
+        )
+        view = ntbl.struct[0]
+        view.struct[0] = "test"
+        # the view copies the items it references, not the whole reflist,
+        # and the copy is shallow
+        self.assertEqual(len(view.reflist), 10)
+        self.assertTrue(
+            view.reflist[1] is ntbl.reflist[ntbl.refmap.values[0, 1]]
+        )
+
+        # the NTable the view was taken from copies all of its items once
+        view = ntbl.struct[0]
+        ntbl.struct[0, 0] = "test"
+        reflist = ntbl.reflist
+        self.assertEqual(len(reflist), 1000)
+        ntbl.struct[0, 1] = "test"
+        self.assertTrue(ntbl.reflist is reflist)
+
+    def test_label_index(self):
+        result = self._ntbl_a.struct.label_index("dim1")
+        self.assertListEqual(list(result), ["col1", "col2"])
+        self.assertTrue(result is self._ntbl_a.struct.label_index("dim1"))
+
+        positions = self._ntbl_a.struct.positions("dim1", ["col2", "col1"])
+        self.assertListEqual(list(positions), [1, 0])
+
+    def test_take(self):
+        result = self._ntbl_a.struct.take([1], "dim0")
+        expected = NTable(self._ntbl_a.reflist, self._ntbl_a.refmap[[1]])
+        assert_ntable_equivalent(result, expected)
+
+    def test_relabel(self):
+        result = self._ntbl_a.struct.relabel(
+            dim0={"row1": "row2", "row2": "row1"}, dim1={"col2": "col3"}
+        )
+        expected = ntable(
+            {
+                "row2": {"col1": "r1c1", "col3": "r1c2"},
+                "row1": {"col1": "r2c1", "col3": "r2c2"},
+            }
+        )
+        assert_ntable_equivalent(result, expected)
+        self.assertEqual(result.struct.dims, self._ntbl_a.struct.dims)
+        self.assertRaises(
+            ValueError, self._ntbl_a.struct.relabel, dim0={"row3": "row4"}
+        )
+
+    def test_compact(self):
+        view = self._ntbl_a.struct[0]
+        result = view.struct.compact()
+        assert_ntable_equivalent(result, view)
+        self.assertEqual(result.reflist, ["r1c1", "r1c2"])
+
+        # compaction is skipped when enough of the reflist is referenced
+        result = view.struct.compact(threshold=0.5)
+        self.assertTrue(result is view)
+
+    def test_memory_report(self):
+        result = self._ntbl_a.struct[0].struct.memory_report()
+        expected = {
+            "reflist_length": 4,
+            "referenced": 2,
+            "unreferenced": 2,
+            "referenced_fraction": 0.5,
+        }
+        self.assertDictEqual(result, expected)
+
+    def test_auto_compact(self):
+        defs.AUTO_COMPACT_FRACTION = 0.75
+        try:
+            result = self._ntbl_a.struct.loc["row2"]
+        finally:
+            defs.AUTO_COMPACT_FRACTION = None
+        self.assertEqual(result.reflist, ["r2c1", "r2c2"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from tapr.main.conversion import ntable
+from tapr.main.tabularization import tabularize
+from tests.testing_utils import assert_ntable_equivalent
+
+
+class Counter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, a, b):
+        self.calls.append((a, b))
+        return a + b
+
+
+class TestTracking(unittest.TestCase):
+    def setUp(self):
+        self._ntbl_a = ntable(
+            {
+                "row1": {"col1": 1, "col2": 2},
+                "row2": {"col1": 3, "col2": 4},
+            }
+        )
+        self._ntbl_b = ntable({"col1": 10, "col2": 20}, dims=("dim1",))
+
+    def test_refresh_written_cells(self):
+        func = Counter()
+        result = tabularize(track=True)(func)(self._ntbl_a, self._ntbl_b)
+        func.calls.clear()
+
+        self._ntbl_a.struct.loc["row2", "col2"] = 5
+        result.refresh()
+        expected = ntable(
+            {
+                "row1": {"col1": 11, "col2": 22},
+                "row2": {"col1": 13, "col2": 25},
+            }
+        )
+        assert_ntable_equivalent(result, expected)
+        self.assertListEqual(func.calls, [(5, 20)])
+
+        # writes to a broadcast source dirty every cell depending on them
+        func.calls.clear()
+        self._ntbl_b.dim1["col1"] = 0
+        result.refresh()
+        self.assertListEqual(func.calls, [(1, 0), (3, 0)])
+
+        # nothing to do
+        func.calls.clear()
+        result.refresh()
+        self.assertListEqual(func.calls, [])
+
+    def test_refresh_chained(self):
+        first = tabularize(track=True)(Counter())(self._ntbl_a, 1)
+        second = tabularize(track=True)(Counter())(first, 1)
+        self._ntbl_a.struct[0, 0] = 10
+        second.refresh()
+        expected = ntable(
+            {
+                "row1": {"col1": 12, "col2": 4},
+                "row2": {"col1": 5, "col2": 6},
+            }
+        )
+        assert_ntable_equivalent(second, expected)
+
+    def test_refresh_new_labels(self):
+        result = tabularize(track=True)(Counter())(self._ntbl_a, 1)
+        self._ntbl_a.dim0["row3"] = 7
+        result.refresh()
+        expected = ntable(
+            {
+                "row1": {"col1": 2, "col2": 3},
+                "row2": {"col1": 4, "col2": 5},
+                "row3": {"col1": 8, "col2": 8},
+            }
+        )
+        assert_ntable_equivalent(result, expected)
+
+    def test_refresh_untracked(self):
+        result = tabularize()(Counter())(self._ntbl_a, 1)
+        self._ntbl_a.struct[0, 0] = 10
+        self.assertTrue(result.refresh() is result)
+        self.assertEqual(result.struct[0, 0].item(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,7 @@ from tapr.main.utils import (
     NULL,
     concatenate_ntables,
     default_refmap,
+    str_ntable,
 )
 from tapr.main.engines import StandardEngine, ProcessEngine, ThreadEngine
 
@@ -196,6 +197,27 @@ DataArray|int|list|ndarray|str"""
         result = str(ntbl)
         self.assertEqual(result, expected)
 
+    def test_str_ntable_displayed_only(self):
+        calls = []
+
+        class Element:
+            def __ntable_element__str__(self):
+                calls.append(self)
+                return "element"
+
+        array = np.empty((1000, 200), dtype="object")
+        array.flat[:] = [Element() for _ in range(array.size)]
+        ntbl = ntable(array)
+        result = str_ntable(ntbl)
+        # only the 100 x 20 displayed cells are formatted
+        self.assertEqual(len(calls), 100 * 20)
+        self.assertIn("[100 rows x 20 columns]", result)
+
+        calls.clear()
+        result = str(ntbl.__ntable_element__str__)
+        self.assertEqual(len(calls), 0)
+        self.assertIn("__nta...str__", result)
+
     def test_str_ntable(self):
         dictionary = {}
         for i in range(150):
@@ -625,6 +647,49 @@ ndarray"""
 
         assert_ntable_equivalent(new_ntbl1, expected_ntbl1)
 
+    def test_concat_ntables_many(self):
+        ntbls = [
+            ntable({f"x{i}": {"y1": i, "y2": str(i)}}) for i in range(50)
+        ]
+        new_ntbl = concatenate_ntables(ntbls, dim="dim0")
+        expected_ntbl = ntable(
+            {f"x{i}": {"y1": i, "y2": str(i)} for i in range(50)}
+        )
+        assert_ntable_equivalent(new_ntbl, expected_ntbl)
+        self.assertEqual(new_ntbl.refmap.dtype.kind, "i")
+
+        # a reflist shared by several inputs is only copied once
+        ntbl = ntable({"x1": {"y1": 0, "y2": 1}}, engine=ThreadEngine(2))
+        new_ntbl = concatenate_ntables([ntbl] * 10, dim="dim2")
+        self.assertEqual(len(new_ntbl.reflist), 2)
+        self.assertEqual(new_ntbl.struct.shape, (1, 2, 10))
+        self.assertTrue(isinstance(new_ntbl.engine, ThreadEngine))
+
+    def test_concat_ntables_views(self):
+        ntbl = ntable({"a": {"x": 1, "y": 2}, "b": {"x": 3, "y": 4}})
+        views = [ntbl.dim0["a"], ntbl.dim0["b"]]
+        new_ntbl = concatenate_ntables(views, dim="new")
+        expected = xr.concat([view.refmap for view in views], "new")
+        # the scalar coordinates of the views are concatenated along new
+        self.assertListEqual(
+            list(new_ntbl.refmap.coords["dim0"].values), ["a", "b"]
+        )
+        self.assertEqual(new_ntbl.refmap.coords["dim0"].dims, ("new",))
+        self.assertEqual(
+            new_ntbl.refmap.coords["dim1"].dtype, expected.coords["dim1"].dtype
+        )
+
+        new_ntbl = concatenate_ntables([ntbl, ntbl], dim="dim0")
+        self.assertEqual(
+            new_ntbl.refmap.coords["dim0"].dtype, ntbl.refmap.coords["dim0"].dtype
+        )
+
+    def test_ntable_stop_iteration(self):
+        from tapr.main import utils
+
+        with self.assertWarns(DeprecationWarning):
+            self.assertIs(utils.NTableStopIteration, StopIteration)
+
     def test_default_refmap(self):
         refmap = default_refmap(3, 2)
         expected = xr.DataArray(